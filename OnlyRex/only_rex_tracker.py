@@ -34,12 +34,19 @@ except ImportError as e:
     sys.exit(1)
 
 # Import Modules from src
+from src.chrono_scraper import ChronoClient  # noqa: E402
+from src.db import close_databases, get_database  # noqa: E402
+from src.http_cache import ResponseCache  # noqa: E402
 from src.processing import build_dataframe  # noqa: E402
+from src.rate_limiter import AdaptiveRateLimiter  # noqa: E402
+from src.sheet_metadata import metadata_cache  # noqa: E402
 from src.sheets import (  # noqa: E402
     export_to_gsheets,
     get_gspread_client,
     reorder_sheets,
 )
+from src.sheets_scheduler import SheetsScheduler  # noqa: E402
+from src.telemetry import RunTelemetry, add, annotate, fail, record_sleep, span, traced  # noqa: E402
 from src.utils import (  # noqa: E402
     LogColor,
     clear_screen,
@@ -47,9 +54,9 @@ from src.utils import (  # noqa: E402
     setup_windows_console,
 )
 
-# Global locks to prevent concurrent resource exhaustion
-SHEETS_LOCK = asyncio.Lock()
-API_SEMAPHORE = asyncio.Semaphore(1)
+# Sheets writes: one job per worksheet at a time; the quota-aware gspread
+# client handles request pacing and 429/5xx back-off.
+SHEETS_SCHEDULER = SheetsScheduler.from_env()
 
 def parse_sheet_title(title: str):
     """
@@ -133,32 +140,32 @@ def pick_club() -> dict | str:
         return CLUBS[choice]
     return CLUBS[list(CLUBS.keys())[0]]
 
+@traced("club")
 async def process_club_workflow(
     key: str,
     cfg: dict,
     gc_client,
+    chrono: ChronoClient,
     engine,
     retry_delay: int,
     max_attempts: int,
     per_club_timeout_seconds: int,
 ) -> bool:
     title = cfg["title"]
+    annotate(club=title)
     attempt = 0
     
     while attempt < max_attempts:
         try:
-            from src.chrono_scraper import scrape_club_data
             cfg_with_key = {**cfg, "api_key": CHRONO_API_KEY}
-            async with API_SEMAPHORE:
+            with span("fetch"):
                 raw_data, status_code = await asyncio.wait_for(
-                    scrape_club_data(cfg_with_key),
+                    chrono.fetch_club_data(cfg_with_key),
                     timeout=per_club_timeout_seconds
                 )
             
             if status_code == 429:
-                prefix = colorize("[Rate Limit]", LogColor.RETRY)
-                print(f"  {prefix} {title}: 429 hit. Cool-down 30s...", flush=True)
-                await asyncio.sleep(30)
+                # Back-off is handled by the shared rate limiter.
                 raise Exception("Rate limited")
             
             if status_code != 200 or not raw_data:
@@ -176,30 +183,16 @@ async def process_club_workflow(
                 print(f"  {prefix} {title}: No history data available in API yet. Skipping sheet update.", flush=True)
                 return True
 
-            df = build_dataframe(data)
+            with span("transform"):
+                df = build_dataframe(data)
             
-            async with SHEETS_LOCK:
-                loop = asyncio.get_running_loop()
-                try:
-                    await loop.run_in_executor(
-                        None, 
-                        export_to_gsheets, 
-                        gc_client, df, SHEET_ID, cfg['title'], cfg["THRESHOLD"],
-                        data.get("club_daily_history"), cfg.get("club_id")
-                    )
-                except Exception as e:
-                    if "429" in str(e):
-                        prefix = colorize("[Quota]", LogColor.RETRY)
-                        print(f"  {prefix} {title}: Quota exceeded (429). Waiting 60s for reset...", flush=True)
-                        await asyncio.sleep(60) 
-                        await loop.run_in_executor(
-                            None, 
-                            export_to_gsheets, 
-                            gc_client, df, SHEET_ID, cfg['title'], cfg["THRESHOLD"],
-                            data.get("club_daily_history"), cfg.get("club_id")
-                        )
-                    else:
-                        raise e
+            with span("commit"):
+                await SHEETS_SCHEDULER.run(
+                    cfg['title'],
+                    export_to_gsheets,
+                    gc_client, df, SHEET_ID, cfg['title'], cfg["THRESHOLD"],
+                    data.get("club_daily_history"), cfg.get("club_id")
+                )
             
             prefix = colorize("[Success]", LogColor.SUCCESS)
             print(f"  {prefix} {title}", flush=True)
@@ -212,43 +205,26 @@ async def process_club_workflow(
 
             attempt += 1
             if attempt >= max_attempts:
+                fail(str(e))
                 return False
+            add("retries")
 
             delay = retry_delay + random.uniform(1, 4)
             prefix = colorize("[Retry]", LogColor.RETRY)
             print(f"  {prefix} {title}: sleeping {delay:.1f}s before attempt {attempt + 1}...", flush=True)
+            record_sleep(delay, "retry")
             await asyncio.sleep(delay)
 
-async def fetch_db_quota_for_circle(database_url: str, check_date, circle_id: str) -> tuple:
+async def fetch_db_quota_for_circle(database_url: str, check_date, circle_id: str, use_cache: bool = True) -> tuple:
     """
     Fetch the quota and quota_period for a specific circle ID from the database.
+    Served from the per-game-day cache when possible (see src/db.py).
     """
-    import asyncpg
-    conn = None
     try:
-        conn = await asyncpg.connect(database_url)
-        query = """
-            SELECT 
-                COALESCE(
-                    (SELECT daily_quota FROM quota_requirements qr 
-                     WHERE qr.club_id = c.club_id AND qr.effective_date <= $1 
-                     ORDER BY qr.effective_date DESC LIMIT 1),
-                    c.daily_quota
-                ) as quota,
-                c.quota_period
-            FROM clubs c
-            WHERE c.circle_id = $2 AND c.is_active = TRUE
-        """
-        row = await conn.fetchrow(query, check_date, str(circle_id))
-        if row:
-            return int(row['quota']), row['quota_period']
-        return None, None
+        return await get_database(database_url).club_quota(check_date, circle_id, use_cache)
     except Exception as e:
         print(f"Error: Failed to fetch club quota from database: {e}.", flush=True)
         raise e
-    finally:
-        if conn:
-            await conn.close()
 
 async def main():
     setup_windows_console(VERSION)
@@ -278,7 +254,7 @@ async def main():
     if not is_cron:
         print("Fetching active worksheets...", flush=True)
     try:
-        ss = GC.open_by_key(SHEET_ID)
+        ss = metadata_cache(GC, SHEET_ID).spreadsheet
         worksheets = ss.worksheets()
     except Exception as e:
         print(f"Error accessing Google Spreadsheet: {e}", flush=True)
@@ -316,7 +292,7 @@ async def main():
         sys.exit(1)
 
     try:
-        quota, period = await fetch_db_quota_for_circle(database_url, effective_date.date(), "150259101")
+        quota, period = await fetch_db_quota_for_circle(database_url, effective_date.date(), "150259101", use_cache="--force" not in sys.argv)
         if quota is None:
             print("Error: Club 150259101 is not registered or not active in the database.", flush=True)
             sys.exit(1)
@@ -383,41 +359,55 @@ async def main():
 
     total_failures = 0
     print(f"\nProcessing {len(clubs_to_process)} clubs (OnlyRex)...\n", flush=True)
+    # The processing phase is recorded as one telemetry run (see src/telemetry.py).
+    telemetry = RunTelemetry.from_env("onlyrex.run", sys.argv)
+    if telemetry is not None:
+        telemetry.start()
 
     tasks = []
     outcomes = []
+    async with ChronoClient(
+        api_key=CHRONO_API_KEY,
+        cache=ResponseCache.from_env(),
+        use_fresh_cache=not force_run,
+        limiter=AdaptiveRateLimiter.from_env(max_in_flight=1),
+    ) as chrono:
     
-    for key, cfg in clubs_to_process.items():
-        is_complete = cfg.get("complete", False)
-        is_up_to_date = cfg.get("up_to_date_today", False)
+        for key, cfg in clubs_to_process.items():
+            is_complete = cfg.get("complete", False)
+            is_up_to_date = cfg.get("up_to_date_today", False)
         
-        if is_complete and not force_run:
-            print(f"--- Skip: {cfg['title']} is complete (all days recorded) ---", flush=True)
-            continue
+            if is_complete and not force_run:
+                print(f"--- Skip: {cfg['title']} is complete (all days recorded) ---", flush=True)
+                continue
             
-        if is_up_to_date and not force_run:
-            print(f"--- Skip: {cfg['title']} is already up to date with {target_col_name} ---", flush=True)
-            continue
+            if is_up_to_date and not force_run:
+                print(f"--- Skip: {cfg['title']} is already up to date with {target_col_name} ---", flush=True)
+                continue
             
-        # Staggered start
-        await asyncio.sleep(random.uniform(0.5, 1.0))
-        tasks.append(
-            asyncio.create_task(
-                process_club_workflow(
-                    key,
-                    cfg,
-                    GC,
-                    engine_choice,
-                    RETRY_DELAY,
-                    5,    # Increased max_attempts
-                    90    # timeout
+            # Staggered start
+            stagger = random.uniform(0.5, 1.0)
+            record_sleep(stagger, "stagger")
+            await asyncio.sleep(stagger)
+            tasks.append(
+                asyncio.create_task(
+                    process_club_workflow(
+                        key,
+                        cfg,
+                        GC,
+                        chrono,
+                        engine_choice,
+                        RETRY_DELAY,
+                        5,    # Increased max_attempts
+                        90    # timeout
+                    )
                 )
             )
-        )
             
-    if tasks:
-        results = await asyncio.gather(*tasks)
-        outcomes.extend(results)
+        if tasks:
+            results = await asyncio.gather(*tasks)
+            outcomes.extend(results)
+            chrono.print_timing_summary()
         
     total_failures = outcomes.count(False)
 
@@ -429,6 +419,8 @@ async def main():
         reorder_sheets(GC, SHEET_ID, other_titles + monthly_titles)
     except Exception as e:
         print(f"Warning: Failed to reorder worksheets: {e}", flush=True)
+    if telemetry is not None:
+        telemetry.finish()
 
     print("-" * 30)
     if total_failures > 0:
@@ -441,7 +433,15 @@ async def main():
     if not is_cron:
         input("Press Enter to close...")
 
+async def run_main():
+    # Closes the shared database pool however main() ends.
+    try:
+        await main()
+    finally:
+        await close_databases()
+
+
 if __name__ == "__main__":
     if sys.platform == 'win32': 
         asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
-    asyncio.run(main())
+    asyncio.run(run_main())
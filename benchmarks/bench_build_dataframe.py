@@ -0,0 +1,99 @@
+"""Times build_dataframe on synthetic clubs against the previous pivot_table engine.
+
+Usage: python -m benchmarks.bench_build_dataframe [--clubs 500] [--members 30] [--days 31]
+"""
+import argparse
+import os
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from benchmarks import synthetic  # noqa: E402
+from src import processing  # noqa: E402
+
+
+def _pivot_table_reference(df: pd.DataFrame) -> pd.DataFrame:
+    # The pivot used by build_dataframe before the scatter engine.
+    out = (
+        df.assign(day_col=lambda d: "Day " + d["actual_date"].astype(str))
+            .pivot_table(
+                index=["friend_viewer_id", "friend_name"],
+                columns="day_col",
+                values="adjusted_interpolated_fan_gain",
+                aggfunc="first"
+            )
+            .reset_index()
+    )
+    out.columns.name = None
+    return out
+
+
+def run(clubs: list, sdate: str) -> float:
+    started = time.perf_counter()
+    for payload, join_map in clubs:
+        processing.build_dataframe(payload, join_map, sdate)
+    return time.perf_counter() - started
+
+
+def run_pivot(frames: list, pivot) -> float:
+    started = time.perf_counter()
+    for df in frames:
+        pivot(df)
+    return time.perf_counter() - started
+
+
+def history_frame(payload: dict) -> pd.DataFrame:
+    # build_dataframe's input to the pivot step.
+    df = pd.json_normalize(payload["club_friend_history"])
+    df["actual_date"] = pd.to_numeric(df["actual_date"], errors="coerce").astype("Int64")
+    return df.dropna(subset=["actual_date"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clubs", type=int, default=500)
+    parser.add_argument("--members", type=int, default=30)
+    parser.add_argument("--days", type=int, default=31)
+    args = parser.parse_args()
+
+    sdate = "2026-01-01"
+    clubs = synthetic.clubs(args.clubs, args.members, args.days, sdate)
+    print(f"{args.clubs} clubs x {args.members} members x {args.days} days", flush=True)
+
+    frames = [history_frame(payload) for payload, _ in clubs]
+    pivot_reference = run_pivot(frames, _pivot_table_reference)
+    pivot_scatter = run_pivot(frames, processing._pivot_days)
+
+    scatter = run(clubs, sdate)
+    engine = processing._pivot_days
+    processing._pivot_days = _pivot_table_reference
+    try:
+        reference = run(clubs, sdate)
+    finally:
+        processing._pivot_days = engine
+
+    # Both engines must agree before the timing means anything.
+    for payload, join_map in clubs[:20]:
+        fast = processing.build_dataframe(payload, join_map, sdate)
+        processing._pivot_days = _pivot_table_reference
+        try:
+            slow = processing.build_dataframe(payload, join_map, sdate)
+        finally:
+            processing._pivot_days = engine
+        pd.testing.assert_frame_equal(fast, slow)
+
+    print("Pivot step only:")
+    print(f"  pivot_table: {pivot_reference:.2f}s ({pivot_reference / args.clubs * 1000:.2f} ms/club)")
+    print(f"  scatter:     {pivot_scatter:.2f}s ({pivot_scatter / args.clubs * 1000:.2f} ms/club)")
+    print(f"  speedup:     {pivot_reference / pivot_scatter:.1f}x")
+    print("Full build_dataframe:")
+    print(f"  pivot_table: {reference:.2f}s ({reference / args.clubs * 1000:.1f} ms/club)")
+    print(f"  scatter:     {scatter:.2f}s ({scatter / args.clubs * 1000:.1f} ms/club)")
+    print(f"  speedup:     {reference / scatter:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
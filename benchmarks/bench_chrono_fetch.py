@@ -0,0 +1,110 @@
+"""End-to-end fetch + transform throughput against the local Chrono stand-in.
+
+Usage: python -m benchmarks.bench_chrono_fetch [--clubs 500] [--concurrency 3,6,12] [--latency-ms 40] [--rate-429 0.01]
+
+Starts benchmarks.chrono_standin in-process and, for every concurrency level,
+runs the tracker's fetch and transform stages (ChronoClient + Pipeline +
+TransformExecutor) over --clubs synthetic clubs, with no disk cache so every
+club costs real requests. Prints throughput, limiter behavior and the request mix.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+from datetime import date
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from benchmarks.chrono_standin import (  # noqa: E402
+    ChronoStandIn,
+    add_config_arguments,
+    config_from_args,
+)
+from src.chrono_scraper import ChronoClient  # noqa: E402
+from src.pipeline import Pipeline, Stage  # noqa: E402
+from src.rate_limiter import AdaptiveRateLimiter  # noqa: E402
+from src.transform import TransformExecutor  # noqa: E402
+
+
+async def run(base_url: str, clubs: int, concurrency: int, sdate: str, args) -> dict:
+    limiter = AdaptiveRateLimiter(
+        rate=args.api_rate, max_rate=args.api_rate_max, burst=max(3.0, concurrency),
+        max_in_flight=concurrency, state_path=None,
+    )
+    executor = TransformExecutor(args.transform_executor, args.transform_workers)
+
+    async with ChronoClient(api_key="standin", max_clients=concurrency, limiter=limiter, base_url=base_url) as chrono:
+        async def fetch(cfg):
+            payload = await chrono.fetch_club_payload(cfg)
+            if payload.status != 200 or not payload.raw:
+                raise Exception(f"API fetch failed (Status {payload.status})")
+            return cfg, payload
+
+        async def transform(item):
+            cfg, payload = item
+            result = await executor.run(payload.raw, payload.join_map, cfg["sdate"])
+            if result["status"] == "error":
+                raise Exception(result["error"])
+            return result["status"]
+
+        pipeline = Pipeline([
+            Stage("fetch", fetch, concurrency, attempts=5),
+            Stage("transform", transform, executor.workers),
+        ], queue_size=max(8, concurrency * 2))
+        cfgs = [{"club_id": cid, "title": f"Club {cid}", "sdate": sdate} for cid in range(1, clubs + 1)]
+        started = time.perf_counter()
+        try:
+            results = await pipeline.run(cfgs, label=lambda cfg: cfg["title"])
+        finally:
+            executor.close()
+        wall = time.perf_counter() - started
+        timing = chrono.timing_summary()
+    return {
+        "concurrency": concurrency,
+        "wall_seconds": round(wall, 2),
+        "clubs_per_second": round(clubs / wall, 1),
+        "ok": sum(r == "ok" for r in results),
+        "no_data": sum(r == "no_data" for r in results),
+        "failed": sum(r is None for r in results),
+        "requests": timing.get("requests", 0),
+        "avg_total_ms": timing.get("avg_total_ms", 0.0),
+        "limiter": limiter.summary(),
+        "stages": {s.name: s.summary() for s in pipeline.stages},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clubs", type=int, default=500)
+    parser.add_argument("--concurrency", default="3,6,12", help="comma-separated in-flight request limits to compare")
+    parser.add_argument("--api-rate", type=float, default=50.0, help="starting limiter rate (req/s)")
+    parser.add_argument("--api-rate-max", type=float, default=200.0)
+    parser.add_argument("--transform-executor", default="inline", choices=["inline", "thread", "process"])
+    parser.add_argument("--transform-workers", type=int, default=None)
+    add_config_arguments(parser)
+    args = parser.parse_args()
+
+    sdate = date.today().replace(day=1).isoformat()
+    with ChronoStandIn(config_from_args(args)) as standin:
+        print(f"{args.clubs} synthetic clubs x {args.members} members against {standin.base_url} "
+              f"(latency {args.latency_ms}+/-{args.jitter_ms}ms, 429 {args.rate_429:.1%}, 500 {args.rate_500:.1%})", flush=True)
+        for concurrency in [int(c) for c in args.concurrency.split(",") if c.strip()]:
+            before = standin.stats
+            result = asyncio.run(run(standin.base_url, args.clubs, concurrency, sdate, args))
+            after = standin.stats
+            served = {k: v - before["requests"].get(k, 0) for k, v in after["requests"].items() if v - before["requests"].get(k, 0)}
+            lim = result["limiter"]
+            print(
+                f"  concurrency {concurrency:>3}: {result['wall_seconds']:>7.2f}s, {result['clubs_per_second']:>6.1f} clubs/s, "
+                f"{result['ok']} ok / {result['no_data']} empty / {result['failed']} failed, "
+                f"{result['requests']} requests (avg {result['avg_total_ms']}ms), "
+                f"{lim['throttled']} throttled, ending rate {lim['rate']} req/s, "
+                f"{(after['bytes_sent'] - before['bytes_sent']) / 1e6:.1f} MB",
+                flush=True
+            )
+            print(f"    served: {served}", flush=True)
+
+
+if __name__ == "__main__":
+    main()
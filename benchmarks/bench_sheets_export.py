@@ -0,0 +1,201 @@
+"""Sheets API calls, requests and bytes per export run, measured against the local Sheets emulator.
+
+Usage: python -m benchmarks.bench_sheets_export [--clubs 30] [--members 30] [--days 20] [--reruns 2] [--quota 60] [--time-scale 60] [--inject-failure]
+
+For each exporter (per-club export_to_gsheets followed by the dashboard and
+the reorder, or one export_spreadsheet_batched commit) writes --clubs
+synthetic club sheets into a fresh emulated spreadsheet, then exports again
+--reruns times with one more day of data each time, which takes the
+incremental path through the sheet state store. Prints calls by method,
+batchUpdate request kinds, bytes each way and 429s per pass. Every pass is
+also exported with no state store into a second emulator: each club sheet
+must end up with the same values and formatting as that full rewrite, and
+a rerun must not send more batchUpdate requests or bytes than it.
+--inject-failure fails the first rerun's first values.batchUpdate and
+checks the export that follows still succeeds. --time-scale shortens the
+quota minute on both the emulator and the client so throttled runs finish
+quickly. Exits nonzero when a check fails.
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from benchmarks import synthetic  # noqa: E402
+from benchmarks.sheets_emulator import EmulatorConfig, SheetsEmulator  # noqa: E402
+from src.processing import build_dataframe, club_summary  # noqa: E402
+from src.sheet_metadata import metadata_cache  # noqa: E402
+from src.sheet_state import SheetStateStore  # noqa: E402
+from src.sheets import (  # noqa: E402
+    build_club_sheet,
+    export_all_club_data_to_gsheets,
+    export_spreadsheet_batched,
+    export_to_gsheets,
+    get_gspread_client,
+    reorder_sheets,
+)
+from src.sheets_scheduler import SheetsQuota  # noqa: E402
+
+GRADES = ["SS", "S+", "S", "A+", "A", "B+"]
+THRESHOLD = 1_000_000
+
+
+def build_clubs(count: int, members: int, days: int, sdate: str, late_joiners: int = 3) -> list:
+    """Export jobs (plus dashboard metadata) for `count` synthetic clubs after `days` days of the month."""
+    clubs = []
+    for cid in range(1, count + 1):
+        month = synthetic.month_so_far(synthetic.club_payload(cid, members, 31), days)
+        df = build_dataframe(month, synthetic.join_map(cid, members, sdate, late_joiners), sdate)
+        grade = GRADES[cid % len(GRADES)]
+        clubs.append({
+            "title": f"Club {cid} ({grade})",
+            "df": df,
+            "threshold": THRESHOLD,
+            "club_daily_history": month["club_daily_history"],
+            "circle_id": cid,
+            "metadata": {
+                "short_name": f"Club {cid}", "grade": grade,
+                "rank": f"#{month['club_daily_history'][-1]['rank']}" if month["club_daily_history"] else "",
+                "members": club_summary(df),
+            },
+        })
+    return clubs
+
+
+def _trimmed(values: list) -> list:
+    rows = []
+    for row in values:
+        row = list(row)
+        while row and row[-1] == "":
+            row.pop()
+        rows.append(row)
+    while rows and not rows[-1]:
+        rows.pop()
+    return rows
+
+
+def export_pass(mode: str, gc, spreadsheet_id: str, clubs: list, sdate: str, state_store: SheetStateStore, seed: int = 0):
+    # One tracker run's worth of exports; the metadata cache starts cold like it does in run_once.
+    metadata_cache(gc, spreadsheet_id).invalidate()
+    # New sheets get random ids; the same ones on both emulators keep their byte counts comparable.
+    random.seed(seed)
+    all_clubs_data = [c["metadata"] for c in clubs]
+    titles = [c["title"] for c in clubs] + ["All Club Data"]
+    if mode == "batched":
+        jobs = [{k: c[k] for k in ("title", "df", "threshold", "club_daily_history", "circle_id")} for c in clubs]
+        export_spreadsheet_batched(gc, spreadsheet_id, jobs, (all_clubs_data, sdate), titles, state_store)
+        return
+    for c in clubs:
+        export_to_gsheets(gc, c["df"], spreadsheet_id, c["title"], c["threshold"], c["club_daily_history"], c["circle_id"], state_store)
+    export_all_club_data_to_gsheets(gc, spreadsheet_id, all_clubs_data, sdate)
+    reorder_sheets(gc, spreadsheet_id, titles)
+
+
+def _emulated(args) -> tuple:
+    # A fresh emulator with one spreadsheet, and a client throttled to match it.
+    scale = max(args.time_scale, 1e-9)
+    emulator = SheetsEmulator(EmulatorConfig(
+        read_per_minute=args.quota, write_per_minute=args.quota, window=60.0 / scale,
+        latency_ms=args.latency_ms, rate_429=args.rate_429, seed=args.seed,
+    ))
+    spreadsheet_id = emulator.create_spreadsheet()
+    quota = SheetsQuota(args.quota, args.quota, max_retries=8, max_backoff=64.0 / scale)
+    quota.WINDOW = 60.0 / scale
+    return emulator, get_gspread_client(".", quota=quota, session=emulator), spreadsheet_id
+
+
+def run(mode: str, args, sdate: str) -> bool:
+    emulator, gc, spreadsheet_id = _emulated(args)
+    # Same passes without a state store: the full-rewrite cost each rerun is checked against.
+    twin, twin_gc, twin_id = _emulated(args)
+    ok = True
+
+    print(f"{mode}:", flush=True)
+    with tempfile.TemporaryDirectory(prefix="bench-sheets-") as state_dir:
+        state_store = SheetStateStore(state_dir)
+        for n in range(args.reruns + 1):
+            days = min(31, args.days + n)
+            clubs = build_clubs(args.clubs, args.members, days, sdate)
+            twin.reset_stats()
+            export_pass(mode, twin_gc, twin_id, clubs, sdate, None, args.seed + n)
+            baseline = twin.stats
+            if n == 1 and args.inject_failure:
+                # Both exporters write every club's values with values.batchUpdate.
+                emulator.fail_next("values.batchUpdate")
+                try:
+                    export_pass(mode, gc, spreadsheet_id, clubs, sdate, state_store, args.seed + n)
+                    print("  FAILED: the injected values.batchUpdate failure never fired", flush=True)
+                    emulator.fail_next("values.batchUpdate", 0)
+                    ok = False
+                except Exception as e:
+                    fired = "Injected failure" in str(e)
+                    print(f"  rerun {n} failed{' as injected' if fired else f' unexpectedly: {e}'}; exporting again", flush=True)
+                    ok = ok and fired
+            emulator.reset_stats()
+            started = time.perf_counter()
+            export_pass(mode, gc, spreadsheet_id, clubs, sdate, state_store, args.seed + n)
+            wall = time.perf_counter() - started
+            stats = emulator.stats
+            # Values must match the table, and values plus formatting the sheet the twin rewrote.
+            matches = sum(
+                _trimmed(emulator.sheet_values(spreadsheet_id, c["title"]))
+                == _trimmed(build_club_sheet(c["df"], c["club_daily_history"], c["circle_id"])["values"])
+                and emulator.snapshot(spreadsheet_id, c["title"]) == twin.snapshot(twin_id, c["title"])
+                for c in clubs
+            )
+            label = "full" if n == 0 else f"rerun {n}"
+            print(
+                f"  {label:>8} (day {days:>2}): {stats['total_calls']:>4} calls, {stats['total_requests']:>5} batchUpdate requests, "
+                f"{stats['bytes_in'] / 1e3:>8.1f} KB up, {stats['bytes_out'] / 1e3:>7.1f} KB down, "
+                f"{stats['cells_written']:>6} cells, {stats['throttled']} throttled, {wall:.2f}s, "
+                f"{matches}/{len(clubs)} sheets match",
+                flush=True
+            )
+            if n:
+                cheaper = stats["total_requests"] <= baseline["total_requests"] and stats["bytes_in"] <= baseline["bytes_in"]
+                print(f"{'':>24}full rewrite: {baseline['total_requests']:>5} batchUpdate requests, "
+                      f"{baseline['bytes_in'] / 1e3:>8.1f} KB up{'' if cheaper else '  <- incremental costs more'}", flush=True)
+                ok = ok and cheaper
+            ok = ok and matches == len(clubs)
+            if args.verbose:
+                print(f"    calls: {stats['calls']}", flush=True)
+                print(f"    requests: {stats['requests']}", flush=True)
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clubs", type=int, default=30)
+    parser.add_argument("--members", type=int, default=30)
+    parser.add_argument("--days", type=int, default=20, help="days of data in the first pass")
+    parser.add_argument("--reruns", type=int, default=2, help="incremental passes, one more day each")
+    parser.add_argument("--mode", default="per-club,batched", help="comma-separated exporters: per-club, batched")
+    parser.add_argument("--quota", type=int, default=60, help="read and write requests per quota minute")
+    parser.add_argument("--time-scale", type=float, default=60.0, help="quota minutes per real minute")
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--rate-429", type=float, default=0.0, help="fraction of calls answered 429 regardless of quota")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--inject-failure", action="store_true", help="fail the first rerun's values write once")
+    parser.add_argument("-v", "--verbose", action="store_true", help="print calls and request kinds per pass")
+    args = parser.parse_args()
+
+    sdate = date.today().replace(day=1).isoformat()
+    print(f"{args.clubs} synthetic clubs x {args.members} members, {args.quota} reads/writes per quota minute "
+          f"(x{args.time_scale:g} time), 429 {args.rate_429:.1%}", flush=True)
+    ok = True
+    for mode in [m.strip() for m in args.mode.split(",") if m.strip()]:
+        if mode not in ("per-club", "batched"):
+            parser.error(f"unknown mode '{mode}'")
+        ok = run(mode, args, sdate) and ok
+    if not ok:
+        print("FAILED: a rerun cost more than a full rewrite or left a sheet wrong", flush=True)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
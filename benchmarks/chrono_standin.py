@@ -0,0 +1,281 @@
+"""Local stand-in for the Chrono API: club_data_by_month and club_profile from fixtures or synthetic data.
+
+Usage:
+  python -m benchmarks.chrono_standin serve [--port 8765] [--latency-ms 40] [--rate-429 0.02] ...
+  python -m benchmarks.chrono_standin record --out fixtures/ --circle-id 123 [--sdate 2026-01-01]
+
+Point the tracker at it with CHRONO_BASE_URL=http://127.0.0.1:8765. Responses
+from a non-default base URL are cached under their own keys, so they never mix
+with real API data. Months come from --fixtures when a recorded file exists
+(club_data_by_month/<circle_id>_<sdate>.json, club_profile/<circle_id>.json)
+and are generated with benchmarks.synthetic otherwise. Fault injection
+(latency, 429 with Retry-After, 500, empty months, clubs lagging a day) is
+seeded, so runs are reproducible.
+"""
+import argparse
+import asyncio
+import calendar
+import hashlib
+import json
+import os
+import random
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from datetime import date
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from benchmarks import synthetic  # noqa: E402
+from config.globals import latest_game_day  # noqa: E402
+
+
+@dataclass
+class StandInConfig:
+    latency_ms: float = 0.0
+    jitter_ms: float = 0.0
+    rate_429: float = 0.0
+    rate_500: float = 0.0
+    retry_after: float = 1.0
+    # Fraction of month responses that come back 200 with no history.
+    empty_rate: float = 0.0
+    # "YYYY-MM" months that have no history yet (early-month fallback).
+    empty_months: tuple = ()
+    # Fraction of clubs whose current month stops a day short of the latest game day.
+    lag_rate: float = 0.0
+    members: int = 30
+    # Members per synthetic club who joined mid-month (grayed out before their join day).
+    late_joiners: int = 3
+    fixtures: str = None
+    seed: int = 0
+
+
+def month_days(sdate: str, circle_id: int, config: StandInConfig) -> int:
+    """Days of history a club has for the month starting at sdate, as Chrono would serve today."""
+    month = date.fromisoformat(sdate)
+    latest = latest_game_day()
+    if (month.year, month.month) > (latest.year, latest.month):
+        return 0
+    if (month.year, month.month) < (latest.year, latest.month):
+        return calendar.monthrange(month.year, month.month)[1]
+    lagging = random.Random(f"{config.seed}:lag:{circle_id}:{latest}").random() < config.lag_rate
+    return max(0, latest.day - (1 if lagging else 0))
+
+
+class StandInStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = {}
+        self.bytes_sent = 0
+
+    def count(self, endpoint: str, status: int, size: int):
+        with self._lock:
+            key = f"{endpoint} {status}"
+            self.requests[key] = self.requests.get(key, 0) + 1
+            self.bytes_sent += size
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {"requests": dict(self.requests), "total": sum(self.requests.values()), "bytes_sent": self.bytes_sent}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "ChronoStandIn/1.0"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, endpoint: str, status: int, body: bytes = b"", headers: dict = None):
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        if body:
+            self.wfile.write(body)
+        self.server.stats.count(endpoint, status, len(body))
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        endpoint = url.path.strip("/")
+        params = {k: v[0] for k, v in parse_qs(url.query).items()}
+        standin = self.server.standin
+        if endpoint == "_stats":
+            self._send(endpoint, 200, json.dumps(self.server.stats.snapshot()).encode())
+            return
+        if endpoint not in ("club_data_by_month", "club_profile") or "circle_id" not in params:
+            self._send(endpoint, 404, b'{"detail": "Not Found"}')
+            return
+
+        config = standin.config
+        with standin.rng_lock:
+            roll = standin.rng.random()
+            delay = max(0.0, config.latency_ms + standin.rng.uniform(-config.jitter_ms, config.jitter_ms)) / 1000
+        time.sleep(delay)
+        if roll < config.rate_429:
+            self._send(endpoint, 429, b'{"detail": "Too Many Requests"}', {"Retry-After": f"{config.retry_after:g}"})
+            return
+        if roll < config.rate_429 + config.rate_500:
+            self._send(endpoint, 500, b'{"detail": "Error"}')
+            return
+
+        try:
+            body = standin.body(endpoint, params)
+        except ValueError:
+            self._send(endpoint, 400, b'{"detail": "Bad Request"}')
+            return
+        etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+        if self.headers.get("If-None-Match") == etag:
+            self._send(endpoint, 304, headers={"ETag": etag})
+            return
+        self._send(endpoint, 200, body, {"ETag": etag})
+
+
+class ChronoStandIn:
+    """Threaded HTTP server answering like api.chronogenesis.net for the endpoints the tracker uses."""
+
+    def __init__(self, config: StandInConfig = None, host: str = "127.0.0.1", port: int = 0):
+        self.config = config or StandInConfig()
+        self.rng = random.Random(self.config.seed)
+        self.rng_lock = threading.Lock()
+        self.server = ThreadingHTTPServer((host, port), _Handler)
+        self.server.daemon_threads = True
+        self.server.standin = self
+        self.server.stats = StandInStats()
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def stats(self) -> dict:
+        return self.server.stats.snapshot()
+
+    def _fixture(self, *parts) -> bytes | None:
+        if not self.config.fixtures:
+            return None
+        try:
+            with open(os.path.join(self.config.fixtures, *parts), "rb") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def body(self, endpoint: str, params: dict) -> bytes:
+        circle_id = int(params["circle_id"])
+        if endpoint == "club_profile":
+            recorded = self._fixture("club_profile", f"{circle_id}.json")
+            if recorded is not None:
+                return recorded
+            joins = synthetic.join_map(circle_id, self.config.members, date.today().replace(day=1).isoformat(), self.config.late_joiners)
+            profile = [{"friend_viewer_id": int(vid), "join_time": jt} for vid, jt in joins.items()]
+            return json.dumps({"club_friend_profile": profile}).encode()
+
+        sdate = params.get("sdate") or date.today().replace(day=1).isoformat()
+        recorded = self._fixture("club_data_by_month", f"{circle_id}_{sdate}.json")
+        if recorded is not None:
+            return recorded
+        days = month_days(sdate, circle_id, self.config)
+        with self.rng_lock:
+            empty = self.rng.random() < self.config.empty_rate
+        if empty or sdate[:7] in self.config.empty_months or not days:
+            return json.dumps({"club_friend_history": [], "club_daily_history": []}).encode()
+        return json.dumps(synthetic.club_payload(circle_id, self.config.members, days)).encode()
+
+    def start(self) -> str:
+        self._thread = threading.Thread(target=self.server.serve_forever, name="chrono-standin", daemon=True)
+        self._thread.start()
+        return self.base_url
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+
+def add_config_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--rate-429", type=float, default=0.0, help="fraction of requests answered 429")
+    parser.add_argument("--rate-500", type=float, default=0.0, help="fraction of requests answered 500")
+    parser.add_argument("--retry-after", type=float, default=1.0, help="Retry-After seconds on 429s")
+    parser.add_argument("--empty-rate", type=float, default=0.0, help="fraction of months served without history")
+    parser.add_argument("--empty-month", action="append", default=[], help="YYYY-MM served without history (repeatable)")
+    parser.add_argument("--lag-rate", type=float, default=0.0, help="fraction of clubs a day behind in the current month")
+    parser.add_argument("--members", type=int, default=30, help="members per synthetic club (payload size)")
+    parser.add_argument("--late-joiners", type=int, default=3, help="members per synthetic club who joined mid-month")
+    parser.add_argument("--fixtures", default=None, help="directory of recorded payloads")
+    parser.add_argument("--seed", type=int, default=0)
+
+
+def config_from_args(args) -> StandInConfig:
+    return StandInConfig(
+        latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, rate_429=args.rate_429, rate_500=args.rate_500,
+        retry_after=args.retry_after, empty_rate=args.empty_rate, empty_months=tuple(args.empty_month),
+        lag_rate=args.lag_rate, members=args.members, late_joiners=args.late_joiners, fixtures=args.fixtures, seed=args.seed,
+    )
+
+
+async def record(out: str, circle_ids: list, sdate: str):
+    """Save real API responses as fixtures (needs CHRONO_API_KEY)."""
+    from src.chrono_scraper import ChronoClient
+
+    os.makedirs(os.path.join(out, "club_data_by_month"), exist_ok=True)
+    os.makedirs(os.path.join(out, "club_profile"), exist_ok=True)
+    async with ChronoClient(base_url="https://api.chronogenesis.net") as chrono:
+        for circle_id in circle_ids:
+            month = await chrono.get("club_data_by_month", {"circle_id": circle_id, "sdate": sdate})
+            profile = await chrono.get("club_profile", {"circle_id": circle_id})
+            for name, response in ((f"club_data_by_month/{circle_id}_{sdate}.json", month), (f"club_profile/{circle_id}.json", profile)):
+                if response.status_code != 200:
+                    print(f"  {circle_id}: {name.split('/')[0]} returned {response.status_code}, not recorded", flush=True)
+                    continue
+                with open(os.path.join(out, name), "wb") as f:
+                    f.write(response.content)
+                print(f"  Recorded {name} ({len(response.content)} bytes)", flush=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    sub = parser.add_subparsers(dest="command", required=True)
+    serve = sub.add_parser("serve", help="run the stand-in until interrupted")
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=8765)
+    add_config_arguments(serve)
+    rec = sub.add_parser("record", help="record real API responses as fixtures")
+    rec.add_argument("--out", required=True)
+    rec.add_argument("--circle-id", action="append", required=True)
+    rec.add_argument("--sdate", default=date.today().replace(day=1).isoformat())
+    args = parser.parse_args()
+
+    if args.command == "record":
+        asyncio.run(record(args.out, args.circle_id, args.sdate))
+        return
+
+    standin = ChronoStandIn(config_from_args(args), args.host, args.port)
+    print(f"Chrono stand-in listening on {standin.base_url} (export CHRONO_BASE_URL={standin.base_url})", flush=True)
+    try:
+        standin.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(json.dumps(standin.stats, indent=2), flush=True)
+        standin.server.server_close()
+
+
+if __name__ == "__main__":
+    main()
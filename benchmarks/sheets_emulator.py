@@ -0,0 +1,891 @@
+"""In-process Google Sheets v4 emulator for the subset of the API the exporters use.
+
+Usage:
+  emulator = SheetsEmulator(EmulatorConfig(read_per_minute=60, write_per_minute=60))
+  spreadsheet_id = emulator.create_spreadsheet()
+  gc = get_gspread_client(base_path, session=emulator)
+  ...  # export_to_gsheets / export_spreadsheet_batched / reorder_sheets
+  print(emulator.stats)
+
+SheetsEmulator stands in for the requests session under gspread's HTTP
+client, so QuotaHTTPClient, the metadata cache and the exporters run
+unchanged. Supported: spreadsheets.get (with field masks), batchUpdate
+(add/delete/update sheet, updateCells, repeatCell, updateBorders,
+updateDimensionProperties, moveDimension, merge/unmerge, add/update/delete
+of conditional format rules and banding, basic filter), values.get/update/
+clear and values.batchGet/batchUpdate/batchClear. Sheet structure, cell values and cell formats
+(userEnteredFormat, borders included) are modeled, and Google's validation
+errors are mirrored where the exporters could trip them; snapshot() returns
+what a sheet looks like, for comparing two ways of writing it. Column
+widths are accepted but not stored. Reads and writes draw on
+sliding per-minute quotas and are answered 429 RESOURCE_EXHAUSTED when
+exhausted. fail_next() answers the next calls of one method with an
+error, to exercise recovery from a write that fails halfway. Every call is
+counted with its request kinds and bytes in and out.
+"""
+import copy
+import json
+import random
+import re
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from http import HTTPStatus
+from urllib.parse import unquote, urlencode, urlparse
+
+import requests
+from gspread.utils import a1_to_rowcol, absolute_range_name, rowcol_to_a1
+
+# SheetsEmulator.request takes a `json` argument like requests.Session.request does.
+_dumps = json.dumps
+
+
+@dataclass
+class EmulatorConfig:
+    read_per_minute: int = 60
+    write_per_minute: int = 60
+    # Quota window length; benchmarks shrink it (with the client's SheetsQuota.WINDOW) to compress time.
+    window: float = 60.0
+    latency_ms: float = 0.0
+    # Injected failures on top of quota exhaustion.
+    rate_429: float = 0.0
+    rate_500: float = 0.0
+    retry_after: float = None
+    seed: int = 0
+
+
+class SheetsAPIError(Exception):
+    def __init__(self, code: int, message: str, status: str = None):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+        self.status = status or {400: "INVALID_ARGUMENT", 404: "NOT_FOUND", 429: "RESOURCE_EXHAUSTED"}.get(code, "INTERNAL")
+
+
+def _parse_fields(mask: str) -> dict:
+    """Field mask -> tree of {name: subtree or None (whole field)}."""
+    pos = 0
+
+    def add(tree: dict, parts: list, sub):
+        key = parts[0]
+        if len(parts) > 1:
+            if tree.get(key, {}) is not None:
+                add(tree.setdefault(key, {}), parts[1:], sub)
+        elif sub is None or tree.get(key, {}) is None:
+            tree[key] = None
+        else:
+            tree.setdefault(key, {}).update(sub)
+
+    def parse_list() -> dict:
+        nonlocal pos
+        tree = {}
+        while pos < len(mask):
+            start = pos
+            while pos < len(mask) and mask[pos] not in ",()":
+                pos += 1
+            path = mask[start:pos].strip().replace("/", ".")
+            sub = None
+            if pos < len(mask) and mask[pos] == "(":
+                pos += 1
+                sub = parse_list()
+                pos += 1
+            if path:
+                add(tree, path.split("."), sub)
+            if pos < len(mask) and mask[pos] == ",":
+                pos += 1
+            elif pos < len(mask) and mask[pos] == ")":
+                break
+        return tree
+
+    return parse_list()
+
+
+def _project(value, tree: dict):
+    if tree is None or "*" in tree:
+        return copy.deepcopy(value)
+    if isinstance(value, list):
+        return [_project(v, tree) for v in value]
+    if not isinstance(value, dict):
+        return copy.deepcopy(value)
+    out = {}
+    for key, sub in tree.items():
+        if key in value:
+            projected = _project(value[key], sub)
+            if projected not in ({}, []):
+                out[key] = projected
+    return out
+
+
+def _apply_mask(target: dict, patch: dict, tree: dict):
+    # updateSheetProperties semantics: masked fields are copied from patch, or reset when patch omits them.
+    keys = list(patch) if "*" in tree else list(tree)
+    for key in keys:
+        sub = None if "*" in tree else tree[key]
+        if sub is None:
+            if key in patch:
+                target[key] = copy.deepcopy(patch[key])
+            else:
+                target.pop(key, None)
+        else:
+            _apply_mask(target.setdefault(key, {}), patch.get(key) or {}, sub)
+
+
+def _overlaps(a: tuple, b: tuple) -> bool:
+    return a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3]
+
+
+def _contains(outer: tuple, inner: tuple) -> bool:
+    return outer[0] <= inner[0] and outer[1] <= inner[1] and inner[2] <= outer[2] and inner[3] <= outer[3]
+
+
+def _render(value, option: str):
+    if option == "UNFORMATTED_VALUE" or isinstance(value, str):
+        return value
+    if isinstance(value, bool):
+        return "TRUE" if value else "FALSE"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+class _Sheet:
+    def __init__(self, properties: dict):
+        self.properties = properties
+        self.values = []  # rows of cells, None for empty
+        # (row, col) -> userEnteredFormat; entries are replaced, never mutated, so clones can share them.
+        self.formats = {}
+        self.conditional_formats = []
+        self.banded_ranges = []
+        self.merges = []
+        self.basic_filter = None
+
+    def clone(self) -> "_Sheet":
+        other = _Sheet(copy.deepcopy(self.properties))
+        other.values = [row[:] for row in self.values]
+        other.formats = dict(self.formats)
+        other.conditional_formats = list(self.conditional_formats)
+        other.banded_ranges = list(self.banded_ranges)
+        other.merges = list(self.merges)
+        other.basic_filter = self.basic_filter
+        return other
+
+    @property
+    def sheet_id(self) -> int:
+        return self.properties["sheetId"]
+
+    @property
+    def title(self) -> str:
+        return self.properties["title"]
+
+    @property
+    def grid(self) -> tuple:
+        grid = self.properties["gridProperties"]
+        return grid["rowCount"], grid["columnCount"]
+
+    def box(self, grid_range: dict) -> tuple:
+        """GridRange -> (r0, c0, r1, c1) clamped to the grid; unbounded sides run to its edge."""
+        rows, cols = self.grid
+        return (
+            max(0, grid_range.get("startRowIndex", 0)), max(0, grid_range.get("startColumnIndex", 0)),
+            min(rows, grid_range.get("endRowIndex", rows)), min(cols, grid_range.get("endColumnIndex", cols)),
+        )
+
+    def write(self, r0: int, c0: int, block: list) -> int:
+        written = 0
+        for i, row in enumerate(block):
+            r = r0 + i
+            if len(self.values) <= r:
+                self.values.extend([] for _ in range(r + 1 - len(self.values)))
+            cells = self.values[r]
+            for j, value in enumerate(row):
+                if value is None:
+                    continue  # null leaves the cell as it is
+                c = c0 + j
+                if len(cells) <= c:
+                    cells.extend([None] * (c + 1 - len(cells)))
+                cells[c] = None if value == "" else value
+                written += 1
+        return written
+
+    def clear(self, box: tuple):
+        r0, c0, r1, c1 = box
+        for row in self.values[r0:r1]:
+            for c in range(c0, min(c1, len(row))):
+                row[c] = None
+
+    def read(self, box: tuple, option: str) -> list:
+        r0, c0, r1, c1 = box
+        rows = []
+        for row in self.values[r0:r1]:
+            cells = row[c0:c1]
+            while cells and cells[-1] is None:
+                cells.pop()
+            rows.append(["" if v is None else _render(v, option) for v in cells])
+        while rows and not rows[-1]:
+            rows.pop()
+        return rows
+
+    def truncate(self):
+        rows, cols = self.grid
+        del self.values[rows:]
+        for row in self.values:
+            del row[cols:]
+        self.formats = {(r, c): f for (r, c), f in self.formats.items() if r < rows and c < cols}
+
+    def paint(self, box: tuple, paint):
+        # paint(row, col, format) -> the cell's new userEnteredFormat.
+        r0, c0, r1, c1 = box
+        for r in range(r0, r1):
+            for c in range(c0, c1):
+                fmt = paint(r, c, copy.deepcopy(self.formats.get((r, c), {})))
+                if fmt:
+                    self.formats[(r, c)] = fmt
+                else:
+                    self.formats.pop((r, c), None)
+
+    def move(self, dimension: str, start: int, end: int, destination: int):
+        """moveDimension: indices [start, end) go to `destination`, given in coordinates before the move."""
+        if start <= destination <= end:
+            return
+        size = end - start
+
+        def moved(i):
+            if destination < start:
+                return i - (start - destination) if start <= i < end else i + size if destination <= i < start else i
+            return i + (destination - end) if start <= i < end else i - size if end <= i < destination else i
+
+        span = max(end, destination)
+        if dimension == "ROWS":
+            if len(self.values) < span:
+                self.values.extend([] for _ in range(span - len(self.values)))
+            rows = self.values[:span]
+            for i, row in enumerate(rows):
+                self.values[moved(i)] = row
+            self.formats = {(moved(r), c): f for (r, c), f in self.formats.items()}
+        else:
+            for row in self.values:
+                if len(row) < span:
+                    row.extend([None] * (span - len(row)))
+                cells = row[:span]
+                for i, cell in enumerate(cells):
+                    row[moved(i)] = cell
+            self.formats = {(r, moved(c)): f for (r, c), f in self.formats.items()}
+
+    def resource(self) -> dict:
+        out = {"properties": copy.deepcopy(self.properties)}
+        if self.conditional_formats:
+            out["conditionalFormats"] = copy.deepcopy(self.conditional_formats)
+        if self.banded_ranges:
+            out["bandedRanges"] = copy.deepcopy(self.banded_ranges)
+        if self.merges:
+            out["merges"] = [{"sheetId": self.sheet_id, "startRowIndex": m[0], "startColumnIndex": m[1],
+                              "endRowIndex": m[2], "endColumnIndex": m[3]} for m in self.merges]
+        if self.basic_filter is not None:
+            out["basicFilter"] = copy.deepcopy(self.basic_filter)
+        return out
+
+
+class _Spreadsheet:
+    def __init__(self, spreadsheet_id: str, title: str):
+        self.id = spreadsheet_id
+        self.title = title
+        self.sheets = []
+        self.next_banded_id = 1
+
+
+ROUTES = [
+    ("GET", re.compile(r"^/v4/spreadsheets/([^/:]+)$"), "spreadsheets.get"),
+    ("POST", re.compile(r"^/v4/spreadsheets/([^/:]+):batchUpdate$"), "spreadsheets.batchUpdate"),
+    ("GET", re.compile(r"^/v4/spreadsheets/([^/:]+)/values:batchGet$"), "values.batchGet"),
+    ("POST", re.compile(r"^/v4/spreadsheets/([^/:]+)/values:batchUpdate$"), "values.batchUpdate"),
+    ("POST", re.compile(r"^/v4/spreadsheets/([^/:]+)/values:batchClear$"), "values.batchClear"),
+    ("POST", re.compile(r"^/v4/spreadsheets/([^/:]+)/values/(.+):clear$"), "values.clear"),
+    ("GET", re.compile(r"^/v4/spreadsheets/([^/:]+)/values/(.+)$"), "values.get"),
+    ("PUT", re.compile(r"^/v4/spreadsheets/([^/:]+)/values/(.+)$"), "values.update"),
+]
+
+
+class SheetsEmulator:
+    """requests.Session stand-in that answers Sheets v4 calls from an in-memory model."""
+
+    def __init__(self, config: EmulatorConfig = None):
+        self.config = config or EmulatorConfig()
+        self.rng = random.Random(self.config.seed)
+        self.headers = {}
+        self._spreadsheets = {}
+        self._windows = {"read": deque(), "write": deque()}
+        self._failures = {}
+        self._lock = threading.RLock()
+        self.reset_stats()
+
+    # --- model -----------------------------------------------------------
+
+    def create_spreadsheet(self, spreadsheet_id: str = None, title: str = "Emulated spreadsheet", sheets=("Sheet1",)) -> str:
+        with self._lock:
+            spreadsheet_id = spreadsheet_id or f"emulated-{len(self._spreadsheets) + 1}"
+            ss = _Spreadsheet(spreadsheet_id, title)
+            for index, sheet_title in enumerate(sheets):
+                ss.sheets.append(_Sheet(self._new_properties(ss, {"title": sheet_title, "index": index})))
+            self._spreadsheets[spreadsheet_id] = ss
+            return spreadsheet_id
+
+    def sheet_values(self, spreadsheet_id: str, title: str) -> list:
+        """A sheet's stored cell values (unformatted), for checking what an export wrote."""
+        with self._lock:
+            sheet = self._sheet_by_title(self._spreadsheet(spreadsheet_id), title)
+            return sheet.read((0, 0, *sheet.grid), "UNFORMATTED_VALUE")
+
+    def snapshot(self, spreadsheet_id: str, title: str) -> dict:
+        """What a sheet shows: values, cell formats, conditional formats, bandings, filter and merges.
+
+        Sheet and banded range ids and the grid size are left out, so a sheet
+        updated in place compares equal to the same sheet written from scratch.
+        """
+        with self._lock:
+            sheet = self._sheet_by_title(self._spreadsheet(spreadsheet_id), title)
+            return _without_ids({
+                "values": sheet.read((0, 0, *sheet.grid), "UNFORMATTED_VALUE"),
+                "formats": sorted(([r, c], f) for (r, c), f in sheet.formats.items()),
+                "conditionalFormats": sheet.conditional_formats,
+                "bandedRanges": sheet.banded_ranges,
+                "basicFilter": sheet.basic_filter,
+                "merges": sorted(sheet.merges),
+            })
+
+    def resource(self, spreadsheet_id: str) -> dict:
+        """The full spreadsheet resource, as spreadsheets.get without a field mask returns it."""
+        with self._lock:
+            ss = self._spreadsheet(spreadsheet_id)
+            return {
+                "spreadsheetId": ss.id,
+                "properties": {"title": ss.title, "locale": "en_US", "autoRecalc": "ON_CHANGE", "timeZone": "Etc/GMT"},
+                "sheets": [s.resource() for s in ss.sheets],
+                "spreadsheetUrl": f"https://docs.google.com/spreadsheets/d/{ss.id}/edit",
+            }
+
+    def _spreadsheet(self, spreadsheet_id: str) -> _Spreadsheet:
+        ss = self._spreadsheets.get(spreadsheet_id)
+        if ss is None:
+            raise SheetsAPIError(404, "Requested entity was not found.")
+        return ss
+
+    def _new_properties(self, ss: _Spreadsheet, props: dict) -> dict:
+        props = copy.deepcopy(props)
+        taken = {s.sheet_id for s in ss.sheets}
+        if props.get("sheetId") is None:
+            props["sheetId"] = 0 if not taken else self.rng.randint(1, 2**31 - 1)
+            while props["sheetId"] in taken:
+                props["sheetId"] = self.rng.randint(1, 2**31 - 1)
+        props.setdefault("title", f"Sheet{len(ss.sheets) + 1}")
+        props.setdefault("index", len(ss.sheets))
+        props.setdefault("sheetType", "GRID")
+        grid = props.setdefault("gridProperties", {})
+        grid.setdefault("rowCount", 1000)
+        grid.setdefault("columnCount", 26)
+        return props
+
+    @staticmethod
+    def _sheet_by_id(sheets: list, sheet_id: int) -> _Sheet:
+        for sheet in sheets:
+            if sheet.sheet_id == sheet_id:
+                return sheet
+        raise SheetsAPIError(400, f"No grid with id: {sheet_id}")
+
+    @staticmethod
+    def _sheet_by_title(ss: _Spreadsheet, title: str) -> _Sheet:
+        for sheet in ss.sheets:
+            if sheet.title == title:
+                return sheet
+        raise SheetsAPIError(400, f"Unable to parse range: {title}")
+
+    def _a1(self, ss: _Spreadsheet, a1: str) -> tuple:
+        """A1 range -> (sheet, (r0, c0, r1, c1)) with open sides running to the grid edge."""
+        if "!" in a1 or a1.startswith("'"):
+            if a1.startswith("'"):
+                end = 1
+                while True:
+                    end = a1.index("'", end)
+                    if a1[end + 1:end + 2] != "'":
+                        break
+                    end += 2
+                title, rest = a1[1:end].replace("''", "'"), a1[end + 1:]
+                cells = rest[1:] if rest.startswith("!") else ""
+            else:
+                title, cells = a1.split("!", 1)
+            sheet = self._sheet_by_title(ss, title)
+        elif any(s.title == a1 for s in ss.sheets):
+            sheet, cells = self._sheet_by_title(ss, a1), ""
+        else:
+            sheet, cells = ss.sheets[0], a1
+        rows, cols = sheet.grid
+        if not cells:
+            return sheet, (0, 0, rows, cols)
+        parts = cells.upper().split(":")
+        bounds = []
+        for part in parts:
+            m = re.fullmatch(r"([A-Z]*)(\d*)", part)
+            if m is None or not (m.group(1) or m.group(2)):
+                raise SheetsAPIError(400, f"Unable to parse range: {a1}")
+            col = a1_to_rowcol(f"{m.group(1)}1")[1] if m.group(1) else None
+            row = int(m.group(2)) if m.group(2) else None
+            bounds.append((row, col))
+        (row0, col0), (row1, col1) = bounds[0], bounds[-1]
+        if len(parts) == 1:
+            row1, col1 = row0, col0
+        return sheet, ((row0 or 1) - 1, (col0 or 1) - 1, row1 or rows, col1 or cols)
+
+    def _range_name(self, sheet: _Sheet, box: tuple) -> str:
+        r0, c0, r1, c1 = box
+        return absolute_range_name(sheet.title, f"{rowcol_to_a1(r0 + 1, c0 + 1)}:{rowcol_to_a1(max(r1, r0 + 1), max(c1, c0 + 1))}")
+
+    def fail_next(self, name: str, times: int = 1, code: int = 400):
+        """Answer the next `times` calls of route `name` (e.g. "values.batchUpdate") with `code`."""
+        with self._lock:
+            self._failures[name] = (times, code)
+
+    # --- quota and stats -------------------------------------------------
+
+    def reset_stats(self):
+        with self._lock:
+            self.calls = {}
+            self.request_kinds = {}
+            self.statuses = {}
+            self.bytes_in = 0
+            self.bytes_out = 0
+            self.cells_written = 0
+            self.throttled = 0
+
+    @property
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "calls": dict(self.calls),
+                "total_calls": sum(self.calls.values()),
+                "requests": dict(self.request_kinds),
+                "total_requests": sum(self.request_kinds.values()),
+                "statuses": dict(self.statuses),
+                "throttled": self.throttled,
+                "bytes_in": self.bytes_in,
+                "bytes_out": self.bytes_out,
+                "cells_written": self.cells_written,
+            }
+
+    def _admit(self, kind: str):
+        window = self._windows[kind]
+        limit = self.config.read_per_minute if kind == "read" else self.config.write_per_minute
+        now = time.monotonic()
+        while window and now - window[0] >= self.config.window:
+            window.popleft()
+        if len(window) >= limit:
+            self.throttled += 1
+            raise SheetsAPIError(
+                429, f"Quota exceeded for quota metric '{kind.title()} requests' and limit "
+                     f"'{kind.title()} requests per minute per user' of service 'sheets.googleapis.com'."
+            )
+        window.append(now)
+
+    # --- transport -------------------------------------------------------
+
+    def request(self, method, url, params=None, data=None, headers=None, json=None, files=None, timeout=None, **kwargs):
+        method = method.upper()
+        params = {k: v for k, v in (params or {}).items() if v is not None}
+        # Encoded the way requests would, so bad payloads (NaN, numpy scalars) fail here too.
+        body = _dumps(json, allow_nan=False).encode() if json is not None else (data or b"")
+        query = urlencode(params, doseq=True)
+        path = urlparse(url).path
+
+        if self.config.latency_ms:
+            time.sleep(self.config.latency_ms / 1000)
+        with self._lock:
+            self.bytes_in += len(url) + len(query) + len(body)
+            name = next((name for m, rx, name in ROUTES if m == method and rx.match(path)), None)
+            extra = {}
+            try:
+                if name is None:
+                    raise SheetsAPIError(404, f"Method not found: {method} {path}")
+                self.calls[name] = self.calls.get(name, 0) + 1
+                self._admit("read" if method == "GET" else "write")
+                times, code = self._failures.get(name, (0, 0))
+                if times:
+                    self._failures[name] = (times - 1, code)
+                    raise SheetsAPIError(code, "Injected failure.")
+                roll = self.rng.random()
+                if roll < self.config.rate_429:
+                    self.throttled += 1
+                    if self.config.retry_after is not None:
+                        extra["Retry-After"] = f"{self.config.retry_after:g}"
+                    raise SheetsAPIError(429, "Resource has been exhausted (e.g. check quota).")
+                if roll < self.config.rate_429 + self.config.rate_500:
+                    raise SheetsAPIError(500, "Internal error encountered.")
+                match = next(rx.match(path) for m, rx, n in ROUTES if n == name)
+                handler = getattr(self, "_" + name.replace(".", "_"))
+                status, payload = 200, handler(*[unquote(g) for g in match.groups()], params=params, body=json or {})
+            except SheetsAPIError as e:
+                status, payload = e.code, {"error": {"code": e.code, "message": e.message, "status": e.status}}
+            prepared = requests.PreparedRequest()
+            prepared.method, prepared.url, prepared.body = method, f"{url}?{query}" if query else url, body
+            response = _response(url, status, payload, extra, prepared)
+            self.statuses[status] = self.statuses.get(status, 0) + 1
+            self.bytes_out += len(response.content)
+            return response
+
+    def close(self):
+        pass
+
+    # --- handlers --------------------------------------------------------
+
+    def _spreadsheets_get(self, spreadsheet_id, params, body) -> dict:
+        resource = self.resource(spreadsheet_id)
+        if params.get("fields"):
+            return _project(resource, _parse_fields(params["fields"]))
+        return resource
+
+    def _values_get(self, spreadsheet_id, a1, params, body) -> dict:
+        ss = self._spreadsheet(spreadsheet_id)
+        return self._value_range(ss, a1, params.get("valueRenderOption", "FORMATTED_VALUE"))
+
+    def _values_batchGet(self, spreadsheet_id, params, body) -> dict:
+        ss = self._spreadsheet(spreadsheet_id)
+        ranges = params.get("ranges") or []
+        if isinstance(ranges, str):
+            ranges = [ranges]
+        option = params.get("valueRenderOption", "FORMATTED_VALUE")
+        return {"spreadsheetId": ss.id, "valueRanges": [self._value_range(ss, a1, option) for a1 in ranges]}
+
+    def _value_range(self, ss: _Spreadsheet, a1: str, option: str) -> dict:
+        sheet, box = self._a1(ss, a1)
+        box = sheet.box({"startRowIndex": box[0], "startColumnIndex": box[1], "endRowIndex": box[2], "endColumnIndex": box[3]})
+        out = {"range": self._range_name(sheet, box), "majorDimension": "ROWS"}
+        values = sheet.read(box, option)
+        if values:
+            out["values"] = values
+        return out
+
+    def _check_write(self, sheet: _Sheet, box: tuple, values: list, a1: str):
+        rows, cols = sheet.grid
+        if box[2] > rows or box[3] > cols:
+            raise SheetsAPIError(400, f"Range ({a1}) exceeds grid limits. Max rows: {rows}, max columns: {cols}")
+        if len(values) > box[2] - box[0] or any(len(row) > box[3] - box[1] for row in values):
+            raise SheetsAPIError(400, f"Requested writing within range [{a1}], but tried writing beyond it.")
+
+    def _update_response(self, ss: _Spreadsheet, sheet: _Sheet, r0: int, c0: int, values: list) -> dict:
+        width = max((len(row) for row in values), default=0)
+        return {
+            "spreadsheetId": ss.id,
+            "updatedRange": self._range_name(sheet, (r0, c0, r0 + len(values), c0 + width)),
+            "updatedRows": len(values),
+            "updatedColumns": width,
+            "updatedCells": sum(len(row) for row in values),
+        }
+
+    def _values_update(self, spreadsheet_id, a1, params, body) -> dict:
+        ss = self._spreadsheet(spreadsheet_id)
+        if not params.get("valueInputOption"):
+            raise SheetsAPIError(400, "'valueInputOption' is required but not specified")
+        sheet, box = self._a1(ss, a1)
+        values = body.get("values") or []
+        self._check_write(sheet, box, values, a1)
+        self.cells_written += sheet.write(box[0], box[1], values)
+        return self._update_response(ss, sheet, box[0], box[1], values)
+
+    def _values_batchUpdate(self, spreadsheet_id, params, body) -> dict:
+        ss = self._spreadsheet(spreadsheet_id)
+        if not body.get("valueInputOption"):
+            raise SheetsAPIError(400, "'valueInputOption' is required but not specified")
+        writes = []
+        for item in body.get("data") or []:
+            sheet, box = self._a1(ss, item.get("range", ""))
+            values = item.get("values") or []
+            self._check_write(sheet, box, values, item.get("range", ""))
+            writes.append((sheet, box, values))
+        responses = []
+        for sheet, box, values in writes:
+            self.cells_written += sheet.write(box[0], box[1], values)
+            responses.append(self._update_response(ss, sheet, box[0], box[1], values))
+        return {
+            "spreadsheetId": ss.id,
+            "totalUpdatedRows": sum(r["updatedRows"] for r in responses),
+            "totalUpdatedColumns": sum(r["updatedColumns"] for r in responses),
+            "totalUpdatedCells": sum(r["updatedCells"] for r in responses),
+            "totalUpdatedSheets": len({sheet.sheet_id for sheet, _, _ in writes}),
+            "responses": responses,
+        }
+
+    def _values_clear(self, spreadsheet_id, a1, params, body) -> dict:
+        ss = self._spreadsheet(spreadsheet_id)
+        sheet, box = self._a1(ss, a1)
+        sheet.clear(box)
+        return {"spreadsheetId": ss.id, "clearedRange": self._range_name(sheet, sheet.box(
+            {"startRowIndex": box[0], "startColumnIndex": box[1], "endRowIndex": box[2], "endColumnIndex": box[3]}))}
+
+    def _values_batchClear(self, spreadsheet_id, params, body) -> dict:
+        cleared = [self._values_clear(spreadsheet_id, a1, params, body)["clearedRange"] for a1 in body.get("ranges") or []]
+        return {"spreadsheetId": spreadsheet_id, "clearedRanges": cleared}
+
+    def _spreadsheets_batchUpdate(self, spreadsheet_id, params, body) -> dict:
+        ss = self._spreadsheet(spreadsheet_id)
+        # batchUpdate is atomic: requests run on copies that replace the live sheets only if all succeed.
+        sheets = [sheet.clone() for sheet in ss.sheets]
+        next_banded_id = ss.next_banded_id
+        replies, kinds = [], []
+        for i, request in enumerate(body.get("requests") or []):
+            if len(request) != 1:
+                raise SheetsAPIError(400, f"Invalid requests[{i}]: exactly one request kind must be set.")
+            kind, spec = next(iter(request.items()))
+            handler = getattr(self, f"_request_{kind}", None)
+            if handler is None:
+                raise SheetsAPIError(400, f"Invalid JSON payload received. Unknown name \"{kind}\" at 'requests[{i}]': Cannot find field.")
+            try:
+                reply, next_banded_id = handler(ss, sheets, spec, next_banded_id)
+            except SheetsAPIError as e:
+                raise SheetsAPIError(e.code, f"Invalid requests[{i}].{kind}: {e.message}", e.status) from None
+            except (KeyError, TypeError, ValueError) as e:
+                raise SheetsAPIError(400, f"Invalid requests[{i}].{kind}: malformed request ({e!r})") from None
+            replies.append(reply)
+            kinds.append(kind)
+        for index, sheet in enumerate(sheets):
+            sheet.properties["index"] = index
+        ss.sheets = sheets
+        ss.next_banded_id = next_banded_id
+        for kind in kinds:
+            self.request_kinds[kind] = self.request_kinds.get(kind, 0) + 1
+        return {"spreadsheetId": ss.id, "replies": replies}
+
+    # Each _request_<kind>(ss, sheets, spec, next_banded_id) -> (reply, next_banded_id).
+
+    def _request_addSheet(self, ss, sheets, spec, next_banded_id):
+        props = spec.get("properties") or {}
+        if props.get("sheetId") is not None and any(s.sheet_id == props["sheetId"] for s in sheets):
+            raise SheetsAPIError(400, f"A sheet with id {props['sheetId']} already exists.")
+        if any(s.title == props.get("title") for s in sheets):
+            raise SheetsAPIError(400, f"A sheet with the name \"{props['title']}\" already exists. Please enter another name.")
+        view = _Spreadsheet(ss.id, ss.title)
+        view.sheets = sheets
+        sheet = _Sheet(self._new_properties(view, props))
+        sheets.insert(min(sheet.properties["index"], len(sheets)), sheet)
+        sheet.properties["index"] = sheets.index(sheet)
+        return {"addSheet": {"properties": copy.deepcopy(sheet.properties)}}, next_banded_id
+
+    def _request_deleteSheet(self, ss, sheets, spec, next_banded_id):
+        sheet = self._sheet_by_id(sheets, spec.get("sheetId", 0))
+        if len(sheets) == 1:
+            raise SheetsAPIError(400, "You can't remove all the sheets in a document.")
+        sheets.remove(sheet)
+        return {}, next_banded_id
+
+    def _request_updateSheetProperties(self, ss, sheets, spec, next_banded_id):
+        props = spec.get("properties") or {}
+        if not spec.get("fields"):
+            raise SheetsAPIError(400, "At least one field must be updated.")
+        sheet = self._sheet_by_id(sheets, props.get("sheetId", 0))
+        tree = _parse_fields(spec["fields"])
+        title = props.get("title") if "title" in tree or "*" in tree else None
+        if title is not None and any(s.title == title and s is not sheet for s in sheets):
+            raise SheetsAPIError(400, f"A sheet with the name \"{title}\" already exists. Please enter another name.")
+        _apply_mask(sheet.properties, {k: v for k, v in props.items() if k != "sheetId"}, {k: v for k, v in tree.items() if k != "sheetId"})
+        sheet.properties["sheetId"] = props.get("sheetId", 0)
+        if "index" in tree or "*" in tree:
+            sheets.remove(sheet)
+            sheets.insert(min(max(0, props.get("index", 0)), len(sheets)), sheet)
+        sheet.truncate()
+        return {}, next_banded_id
+
+    def _request_updateCells(self, ss, sheets, spec, next_banded_id):
+        grid_range = spec.get("range") or {"sheetId": (spec.get("start") or {}).get("sheetId", 0)}
+        sheet = self._sheet_by_id(sheets, grid_range.get("sheetId", 0))
+        fields = _parse_fields(spec.get("fields") or "")
+        if not fields:
+            raise SheetsAPIError(400, "At least one field must be updated.")
+        if "userEnteredValue" in fields or "*" in fields:
+            if spec.get("rows"):
+                start = spec.get("start") or grid_range
+                block = [[_cell_value(cell) for cell in row.get("values") or []] for row in spec["rows"]]
+                self.cells_written += sheet.write(start.get("rowIndex", start.get("startRowIndex", 0)),
+                                                  start.get("columnIndex", start.get("startColumnIndex", 0)),
+                                                  [[("" if v is None else v) for v in row] for row in block])
+            else:
+                sheet.clear(sheet.box(grid_range))
+        return {}, next_banded_id
+
+    def _request_repeatCell(self, ss, sheets, spec, next_banded_id):
+        grid_range = spec.get("range") or {}
+        sheet = self._sheet_by_id(sheets, grid_range.get("sheetId", 0))
+        fields = _parse_fields(spec.get("fields") or "")
+        if not fields:
+            raise SheetsAPIError(400, "At least one field must be updated.")
+        patch = (spec.get("cell") or {}).get("userEnteredFormat") or {}
+        tree = fields.get("userEnteredFormat", {})
+        whole = "*" in fields or tree is None
+
+        def paint(r, c, fmt):
+            if whole:
+                return copy.deepcopy(patch)
+            _apply_mask(fmt, patch, tree)
+            return fmt
+
+        sheet.paint(sheet.box(grid_range), paint)
+        return {}, next_banded_id
+
+    def _request_updateBorders(self, ss, sheets, spec, next_banded_id):
+        grid_range = spec.get("range") or {}
+        sheet = self._sheet_by_id(sheets, grid_range.get("sheetId", 0))
+        r0, c0, r1, c1 = box = sheet.box(grid_range)
+        # Borders not set in the request are left as they are.
+        sides = {"top": ("top", "innerHorizontal"), "bottom": ("bottom", "innerHorizontal"),
+                 "left": ("left", "innerVertical"), "right": ("right", "innerVertical")}
+
+        def paint(r, c, fmt):
+            edge = {"top": r == r0, "bottom": r == r1 - 1, "left": c == c0, "right": c == c1 - 1}
+            for side, (outer, inner) in sides.items():
+                border = spec.get(outer if edge[side] else inner)
+                if border is not None:
+                    fmt.setdefault("borders", {})[side] = copy.deepcopy(border)
+            return fmt
+
+        sheet.paint(box, paint)
+        return {}, next_banded_id
+
+    def _request_updateDimensionProperties(self, ss, sheets, spec, next_banded_id):
+        # Validated only; pixel sizes are not stored.
+        grid_range = spec.get("range") or {}
+        self._sheet_by_id(sheets, grid_range.get("sheetId", 0))
+        return {}, next_banded_id
+
+    def _request_moveDimension(self, ss, sheets, spec, next_banded_id):
+        source = spec.get("source") or {}
+        sheet = self._sheet_by_id(sheets, source.get("sheetId", 0))
+        dimension = source.get("dimension")
+        if dimension not in ("ROWS", "COLUMNS"):
+            raise SheetsAPIError(400, "dimension must be ROWS or COLUMNS.")
+        limit = sheet.grid[0] if dimension == "ROWS" else sheet.grid[1]
+        start, end, destination = source.get("startIndex", 0), source.get("endIndex", limit), spec.get("destinationIndex", 0)
+        if not 0 <= start < end <= limit or not 0 <= destination <= limit:
+            raise SheetsAPIError(400, f"Invalid move of {dimension.lower()} [{start}, {end}) to {destination}: outside the grid.")
+        # Merges, bandings and conditional format ranges stay where they are.
+        sheet.move(dimension, start, end, destination)
+        return {}, next_banded_id
+
+    def _request_mergeCells(self, ss, sheets, spec, next_banded_id):
+        grid_range = spec.get("range") or {}
+        sheet = self._sheet_by_id(sheets, grid_range.get("sheetId", 0))
+        box = sheet.box(grid_range)
+        if any(_overlaps(box, m) for m in sheet.merges):
+            raise SheetsAPIError(400, "You can't merge cells that overlap with another merge.")
+        sheet.merges.append(box)
+        return {}, next_banded_id
+
+    def _request_unmergeCells(self, ss, sheets, spec, next_banded_id):
+        grid_range = spec.get("range") or {}
+        sheet = self._sheet_by_id(sheets, grid_range.get("sheetId", 0))
+        box = sheet.box(grid_range)
+        if any(_overlaps(box, m) and not _contains(box, m) for m in sheet.merges):
+            raise SheetsAPIError(400, "You must select all cells in a merged range to merge or unmerge them.")
+        sheet.merges = [m for m in sheet.merges if not _contains(box, m)]
+        return {}, next_banded_id
+
+    def _request_addConditionalFormatRule(self, ss, sheets, spec, next_banded_id):
+        rule = spec.get("rule") or {}
+        ranges = rule.get("ranges") or []
+        if not ranges or len({r.get("sheetId", 0) for r in ranges}) != 1:
+            raise SheetsAPIError(400, "All ranges of a conditional format rule must be on the same sheet.")
+        sheet = self._sheet_by_id(sheets, ranges[0].get("sheetId", 0))
+        sheet.conditional_formats.insert(min(spec.get("index", 0), len(sheet.conditional_formats)), copy.deepcopy(rule))
+        return {}, next_banded_id
+
+    def _request_updateConditionalFormatRule(self, ss, sheets, spec, next_banded_id):
+        sheet = self._sheet_by_id(sheets, spec.get("sheetId", 0))
+        index = spec.get("index", 0)
+        if not 0 <= index < len(sheet.conditional_formats):
+            raise SheetsAPIError(400, f"No conditional format on sheet: {sheet.sheet_id} at index: {index}")
+        if "rule" not in spec:
+            raise SheetsAPIError(400, "Only replacing a rule (rule) is supported, not moving it (newIndex).")
+        sheet.conditional_formats[index] = copy.deepcopy(spec["rule"])
+        return {}, next_banded_id
+
+    def _request_deleteConditionalFormatRule(self, ss, sheets, spec, next_banded_id):
+        sheet = self._sheet_by_id(sheets, spec.get("sheetId", 0))
+        index = spec.get("index", 0)
+        if not 0 <= index < len(sheet.conditional_formats):
+            raise SheetsAPIError(400, f"No conditional format on sheet: {sheet.sheet_id} at index: {index}")
+        rule = sheet.conditional_formats.pop(index)
+        return {"deleteConditionalFormatRule": {"rule": rule}}, next_banded_id
+
+    def _request_addBanding(self, ss, sheets, spec, next_banded_id):
+        banded = copy.deepcopy(spec.get("bandedRange") or {})
+        sheet = self._sheet_by_id(sheets, banded.get("range", {}).get("sheetId", 0))
+        box = sheet.box(banded.get("range", {}))
+        if any(_overlaps(box, sheet.box(b.get("range", {}))) for b in sheet.banded_ranges):
+            raise SheetsAPIError(400, "You cannot add alternating background colors to a range that already has alternating background colors.")
+        if banded.get("bandedRangeId") is None:
+            banded["bandedRangeId"] = next_banded_id
+            next_banded_id += 1
+        sheet.banded_ranges.append(banded)
+        return {"addBanding": {"bandedRange": copy.deepcopy(banded)}}, next_banded_id
+
+    def _request_updateBanding(self, ss, sheets, spec, next_banded_id):
+        patch = spec.get("bandedRange") or {}
+        if not spec.get("fields"):
+            raise SheetsAPIError(400, "At least one field must be updated.")
+        for sheet in sheets:
+            for i, banded in enumerate(sheet.banded_ranges):
+                if banded.get("bandedRangeId") != patch.get("bandedRangeId"):
+                    continue
+                updated = copy.deepcopy(banded)
+                _apply_mask(updated, patch, _parse_fields(spec["fields"]))
+                updated["bandedRangeId"] = banded["bandedRangeId"]
+                box = sheet.box(updated.get("range", {}))
+                if any(_overlaps(box, sheet.box(b.get("range", {}))) for b in sheet.banded_ranges if b is not banded):
+                    raise SheetsAPIError(400, "You cannot add alternating background colors to a range that already has alternating background colors.")
+                sheet.banded_ranges[i] = updated
+                return {}, next_banded_id
+        raise SheetsAPIError(400, f"No banded range with id: {patch.get('bandedRangeId')}")
+
+    def _request_deleteBanding(self, ss, sheets, spec, next_banded_id):
+        banded_id = spec.get("bandedRangeId")
+        for sheet in sheets:
+            for banded in sheet.banded_ranges:
+                if banded.get("bandedRangeId") == banded_id:
+                    sheet.banded_ranges.remove(banded)
+                    return {}, next_banded_id
+        raise SheetsAPIError(400, f"No banded range with id: {banded_id}")
+
+    def _request_setBasicFilter(self, ss, sheets, spec, next_banded_id):
+        basic_filter = spec.get("filter") or {}
+        sheet = self._sheet_by_id(sheets, basic_filter.get("range", {}).get("sheetId", 0))
+        sheet.basic_filter = copy.deepcopy(basic_filter)
+        return {}, next_banded_id
+
+    def _request_clearBasicFilter(self, ss, sheets, spec, next_banded_id):
+        self._sheet_by_id(sheets, spec.get("sheetId", 0)).basic_filter = None
+        return {}, next_banded_id
+
+
+def _without_ids(value):
+    if isinstance(value, dict):
+        return {k: _without_ids(v) for k, v in value.items() if k not in ("sheetId", "bandedRangeId")}
+    if isinstance(value, (list, tuple)):
+        return [_without_ids(v) for v in value]
+    return copy.deepcopy(value)
+
+
+def _cell_value(cell: dict):
+    value = cell.get("userEnteredValue") or {}
+    for key in ("stringValue", "numberValue", "boolValue", "formulaValue"):
+        if key in value:
+            return value[key]
+    return None
+
+
+def _response(url: str, status: int, payload: dict, headers: dict = None, request: requests.PreparedRequest = None) -> requests.Response:
+    response = requests.Response()
+    response.request = request
+    response.status_code = status
+    response.reason = HTTPStatus(status).phrase
+    response.url = url
+    response.encoding = "utf-8"
+    response._content = _dumps(payload).encode()
+    response.headers["Content-Type"] = "application/json; charset=UTF-8"
+    for name, value in (headers or {}).items():
+        response.headers[name] = value
+    return response
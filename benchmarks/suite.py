@@ -0,0 +1,436 @@
+"""Benchmark suite: tracker stages in isolation and end to end against the local stand-ins, tracked in a JSON history.
+
+Usage:
+  python -m benchmarks.suite [--cases processing,summary,sheet_requests,fetch,export,end_to_end]
+                             [--clubs 100] [--members 30] [--days 20] [--late-joiners 3]
+                             [--label NAME] [--baseline LABEL] [--threshold 0.10] [--fail-on-regression]
+  python -m benchmarks.suite --report [--baseline LABEL]
+
+Cases:
+  processing      build_dataframe over every synthetic club
+  summary         club_summary per club, then the dashboard tables and layout
+  sheet_requests  club sheet values and formatting requests, plus the
+                  incremental plan for one more day (no API calls)
+  fetch           ChronoClient + Pipeline fetch/transform against the Chrono stand-in
+  export          the sheet export (full write, then one more day) against the Sheets emulator
+  end_to_end      run_once against both stand-ins: a cold run, then a same-day re-run
+
+Every case runs in its own subprocess, so peak RSS is per case (stand-ins
+run in-process and are included). Results (wall time, peak RSS, HTTP calls
+and bytes, request counts) are appended to --history with the git commit,
+and compared against the latest earlier run with the same parameters (or
+--baseline). A metric that grew by more than --threshold is reported as a
+regression. Synthetic clubs come from benchmarks.synthetic; the stand-ins
+serve the real calendar month, so --days does not apply to fetch and
+end_to_end.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timezone
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.utils import LogColor, colorize  # noqa: E402
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+DEFAULT_HISTORY_PATH = os.path.join(".cache", "benchmarks", "history.json")
+CASES = ("processing", "summary", "sheet_requests", "fetch", "export", "end_to_end")
+# Parameters that make two runs comparable.
+PARAM_KEYS = ("clubs", "members", "days", "late_joiners", "export_mode", "seed")
+# Smallest increase worth flagging per metric suffix, so timer noise on tiny cases is not a regression.
+NOISE_FLOOR = {"seconds": 0.05, "rss_mb": 5.0}
+
+
+def _peak_rss_mb() -> float | None:
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes.
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def _bytes(obj) -> int:
+    return len(json.dumps(obj, default=str))
+
+
+# --- cases (each runs in a fresh subprocess and returns flat numeric metrics) ---
+
+def _frames(p: dict, days: int = None) -> list:
+    from benchmarks import synthetic
+    from src.processing import build_dataframe
+
+    sdate = p["sdate"]
+    out = []
+    for cid in range(1, p["clubs"] + 1):
+        month = synthetic.month_so_far(synthetic.club_payload(cid, p["members"], 31), days or p["days"])
+        out.append((cid, month, build_dataframe(month, synthetic.join_map(cid, p["members"], sdate, p["late_joiners"]), sdate)))
+    return out
+
+
+def case_processing(p: dict) -> dict:
+    from benchmarks import synthetic
+    from src.processing import build_dataframe
+
+    inputs = [
+        (synthetic.month_so_far(synthetic.club_payload(cid, p["members"], 31), p["days"]),
+         synthetic.join_map(cid, p["members"], p["sdate"], p["late_joiners"]))
+        for cid in range(1, p["clubs"] + 1)
+    ]
+    started = time.perf_counter()
+    rows = sum(len(build_dataframe(payload, join_map, p["sdate"])) for payload, join_map in inputs)
+    return {"wall_seconds": time.perf_counter() - started, "rows": rows}
+
+
+def case_summary(p: dict) -> dict:
+    from src.processing import club_summary
+    from src.sheets import build_summary_sheet, summary_format_requests
+
+    frames = _frames(p)
+    started = time.perf_counter()
+    clubs = [
+        {"short_name": f"Club {cid}", "grade": "A", "rank": f"#{month['club_daily_history'][-1]['rank']}", "members": club_summary(df)}
+        for cid, month, df in frames
+    ]
+    layout = build_summary_sheet(clubs, p["sdate"])
+    requests = summary_format_requests(layout, 0)
+    wall = time.perf_counter() - started
+    return {"wall_seconds": wall, "requests": len(requests), "request_bytes": _bytes(requests) + _bytes(layout["values"])}
+
+
+def case_sheet_requests(p: dict) -> dict:
+    from src.sheets import (
+        build_club_sheet,
+        club_format_requests,
+        club_grid,
+        club_sheet_state,
+        plan_club_update,
+    )
+
+    frames = _frames(p)
+    started = time.perf_counter()
+    built = []
+    for cid, month, df in frames:
+        layout = build_club_sheet(df, month["club_daily_history"], cid)
+        built.append((layout, club_format_requests(layout, cid, 1_000_000)))
+    wall = time.perf_counter() - started
+
+    # The next day's sheets, diffed against what the full write left behind.
+    states = []
+    for (cid, _, _), (layout, reqs) in zip(frames, built):
+        grid = club_grid(layout)
+        bands = sum(1 for r in reqs if "addBanding" in r)
+        states.append((club_sheet_state(layout, cid, 1_000_000, grid, list(range(1, bands + 1))), grid))
+    next_day = _frames(p, min(31, p["days"] + 1))
+    started = time.perf_counter()
+    plans = []
+    for (cid, month, df), (state, grid) in zip(next_day, states):
+        layout = build_club_sheet(df, month["club_daily_history"], cid)
+        plans.append(plan_club_update(layout, 1_000_000, state, f"Club {cid}", cid, *grid))
+    plan_wall = time.perf_counter() - started
+    plans = [plan for plan in plans if plan is not None]
+    return {
+        "wall_seconds": wall,
+        "requests": sum(len(reqs) for _, reqs in built),
+        "request_bytes": sum(_bytes(reqs) + _bytes(layout["values"]) for layout, reqs in built),
+        "plan_seconds": plan_wall,
+        "plan_requests": sum(len(reqs) for reqs, _, _ in plans),
+        "plan_bytes": sum(_bytes(reqs) + _bytes(data) for reqs, data, _ in plans),
+        "plan_full_rewrites": len(next_day) - len(plans),
+    }
+
+
+def case_fetch(p: dict) -> dict:
+    from benchmarks.bench_chrono_fetch import run
+    from benchmarks.chrono_standin import ChronoStandIn, StandInConfig
+
+    config = StandInConfig(members=p["members"], late_joiners=p["late_joiners"], seed=p["seed"])
+    args = argparse.Namespace(api_rate=50.0, api_rate_max=200.0, transform_executor="inline", transform_workers=None)
+    with ChronoStandIn(config) as standin:
+        started = time.perf_counter()
+        result = asyncio.run(run(standin.base_url, p["clubs"], 6, date.today().replace(day=1).isoformat(), args))
+        wall = time.perf_counter() - started
+        stats = standin.stats
+    return {"wall_seconds": wall, "chrono_calls": stats["total"], "chrono_bytes": stats["bytes_sent"], "failed": result["failed"]}
+
+
+def _quota(scale: float):
+    from src.sheets_scheduler import SheetsQuota
+
+    quota = SheetsQuota(60, 60, max_retries=8, max_backoff=64.0 / scale)
+    quota.WINDOW = 60.0 / scale
+    return quota
+
+
+def _sheets_metrics(stats: dict, prefix: str = "") -> dict:
+    return {
+        f"{prefix}sheets_calls": stats["total_calls"],
+        f"{prefix}sheets_requests": stats["total_requests"],
+        f"{prefix}sheets_bytes_up": stats["bytes_in"],
+        f"{prefix}sheets_bytes_down": stats["bytes_out"],
+        f"{prefix}sheets_throttled": stats["throttled"],
+    }
+
+
+def case_export(p: dict) -> dict:
+    from benchmarks.bench_sheets_export import build_clubs, export_pass
+    from benchmarks.sheets_emulator import EmulatorConfig, SheetsEmulator
+    from src.sheet_state import SheetStateStore
+    from src.sheets import get_gspread_client
+
+    # Google's 60 requests per minute, with a quota minute lasting a second.
+    emulator = SheetsEmulator(EmulatorConfig(window=1.0, seed=p["seed"]))
+    spreadsheet_id = emulator.create_spreadsheet()
+    gc = get_gspread_client(".", quota=_quota(60.0), session=emulator)
+    metrics = {}
+    with tempfile.TemporaryDirectory(prefix="bench-suite-") as state_dir:
+        state_store = SheetStateStore(state_dir)
+        for prefix, days in (("", p["days"]), ("rerun_", min(31, p["days"] + 1))):
+            clubs = build_clubs(p["clubs"], p["members"], days, p["sdate"], p["late_joiners"])
+            emulator.reset_stats()
+            started = time.perf_counter()
+            export_pass(p["export_mode"], gc, spreadsheet_id, clubs, p["sdate"], state_store)
+            metrics[f"{prefix}wall_seconds"] = time.perf_counter() - started
+            metrics.update(_sheets_metrics(emulator.stats, prefix))
+    return metrics
+
+
+def case_end_to_end(p: dict) -> dict:
+    work = tempfile.mkdtemp(prefix="bench-e2e-")
+    # Everything the tracker reads from the environment at import time points
+    # at the stand-ins and scratch directories, so set it before any import.
+    os.environ.update({
+        "CHRONO_API_KEY": "standin",
+        "SHEET_ID": "bench-e2e",
+        "SHEETS_EXPORT_MODE": p["export_mode"],
+        "CHRONO_CACHE_DIR": os.path.join(work, "chrono"),
+        "DB_CACHE_DIR": os.path.join(work, "db"),
+        "HISTORY_DB": os.path.join(work, "history.sqlite3"),
+        "SHEETS_STATE_DIR": os.path.join(work, "sheets"),
+        "RUN_JOURNAL_DIR": os.path.join(work, "journal"),
+        "TELEMETRY_DIR": os.path.join(work, "telemetry"),
+        "API_RATE": "50", "API_RATE_MAX": "200", "API_CONCURRENCY": "6",
+        "PG_SINK": "0",
+    })
+    from benchmarks.chrono_standin import ChronoStandIn, StandInConfig
+    from benchmarks.sheets_emulator import EmulatorConfig, SheetsEmulator
+
+    standin = ChronoStandIn(StandInConfig(members=p["members"], late_joiners=p["late_joiners"], seed=p["seed"]))
+    os.environ["CHRONO_BASE_URL"] = standin.start()
+    emulator = SheetsEmulator(EmulatorConfig(window=1.0, seed=p["seed"]))
+    emulator.create_spreadsheet(os.environ["SHEET_ID"])
+    from config.globals import SERVER_ID, game_dates
+    from src import main as tracker
+    from src.chrono_scraper import ChronoClient
+    from src.history_store import HistoryStore
+    from src.http_cache import ResponseCache
+    from src.sheets import get_gspread_client
+
+    # The club list is served from the database's game-day cache, so no database is needed.
+    clubs = [
+        {"circle_id": str(cid), "club_name": f"Club {cid}", "quota_period": "daily", "quota": 1_000_000 + cid}
+        for cid in range(1, p["clubs"] + 1)
+    ]
+    ResponseCache(os.environ["DB_CACHE_DIR"]).put(
+        "db_active_clubs", SERVER_ID or "", game_dates()[0].date().isoformat(), json.dumps(clubs), 200
+    )
+    gc = get_gspread_client(".", quota=_quota(60.0), session=emulator)
+    response_cache = ResponseCache.from_env()
+    history = HistoryStore.from_env()
+
+    async def passes() -> dict:
+        metrics = {}
+        async with ChronoClient(cache=response_cache) as chrono:
+            for prefix in ("", "warm_"):
+                emulator.reset_stats()
+                before = standin.stats
+                started = time.perf_counter()
+                await tracker.run_once(gc, chrono, "standin://bench", response_cache, history, True)
+                metrics[f"{prefix}wall_seconds"] = time.perf_counter() - started
+                after = standin.stats
+                metrics[f"{prefix}chrono_calls"] = after["total"] - before["total"]
+                metrics[f"{prefix}chrono_bytes"] = after["bytes_sent"] - before["bytes_sent"]
+                metrics.update(_sheets_metrics(emulator.stats, prefix))
+        # A sanity check rather than a cost: clubs + dashboard + the initial sheet when all went well.
+        metrics["sheets"] = len(emulator.resource(os.environ["SHEET_ID"])["sheets"])
+        return metrics
+
+    try:
+        return asyncio.run(passes())
+    finally:
+        history.close()
+        standin.stop()
+
+
+def run_case(name: str, params: dict, result_path: str):
+    metrics = globals()[f"case_{name}"](params)
+    metrics["peak_rss_mb"] = _peak_rss_mb()
+    with open(result_path, "w", encoding="utf-8") as f:
+        json.dump({k: (round(v, 4) if isinstance(v, float) else v) for k, v in metrics.items()}, f)
+
+
+# --- history and report ---
+
+def git_revision() -> str | None:
+    try:
+        rev = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=ROOT, capture_output=True, text=True).stdout.strip()
+        return f"{rev}-dirty" if dirty else rev
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def load_history(path: str) -> list:
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f).get("runs", [])
+    except (OSError, ValueError):
+        return []
+
+
+def save_history(path: str, runs: list):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"runs": runs}, f, indent=1)
+    os.replace(tmp, path)
+
+
+def find_baseline(runs: list, current: dict, label: str = None) -> dict | None:
+    """Latest earlier run with the same parameters (or the given label)."""
+    for run in reversed(runs):
+        if run is current:
+            continue
+        if label is not None:
+            if run.get("label") == label:
+                return run
+        elif run.get("params") == current.get("params"):
+            return run
+    return None
+
+
+def _is_regression(metric: str, before, after, threshold: float) -> bool:
+    if not isinstance(before, (int, float)) or not isinstance(after, (int, float)) or after <= before:
+        return False
+    floor = next((v for suffix, v in NOISE_FLOOR.items() if metric.endswith(suffix)), 0)
+    if after - before <= floor:
+        return False
+    return before == 0 or (after - before) / before > threshold
+
+
+def compare(current: dict, baseline: dict | None, threshold: float) -> list:
+    """Print current vs baseline per case and metric; returns the regressed "case.metric" names."""
+    if baseline is None:
+        print("No baseline with the same parameters yet; this run becomes the baseline.", flush=True)
+    else:
+        print(f"Compared with {baseline.get('label') or baseline.get('git') or '?'} ({baseline.get('at', '?')[:19]}):", flush=True)
+    regressions = []
+    for case, metrics in current["results"].items():
+        before = (baseline or {}).get("results", {}).get(case, {})
+        print(f"  {case}", flush=True)
+        if "error" in metrics:
+            print(f"    {colorize('failed', LogColor.ERROR)}: {metrics['error']}", flush=True)
+            continue
+        for metric, value in metrics.items():
+            old = before.get(metric)
+            line = f"    {metric:<24} {value!s:>14}"
+            if isinstance(old, (int, float)) and isinstance(value, (int, float)):
+                change = f"{(value - old) / old:+.1%}" if old else ("+inf" if value else "0.0%")
+                line += f"  (was {old!s:>12}, {change})"
+                if _is_regression(metric, old, value, threshold):
+                    regressions.append(f"{case}.{metric}")
+                    line += "  " + colorize("REGRESSION", LogColor.ERROR)
+            print(line, flush=True)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cases", default=",".join(CASES), help="comma-separated cases to run")
+    parser.add_argument("--clubs", type=int, default=100)
+    parser.add_argument("--members", type=int, default=30)
+    parser.add_argument("--days", type=int, default=20, help="days of the month in synthetic payloads")
+    parser.add_argument("--late-joiners", type=int, default=3, help="members per club who joined mid-month")
+    parser.add_argument("--export-mode", default="batched", choices=["batched", "per-club"])
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--history", default=DEFAULT_HISTORY_PATH)
+    parser.add_argument("--label", default=None, help="name for this run in the history")
+    parser.add_argument("--baseline", default=None, help="compare against the latest run with this label")
+    parser.add_argument("--threshold", type=float, default=0.10, help="relative growth reported as a regression")
+    parser.add_argument("--no-save", action="store_true", help="do not append this run to the history")
+    parser.add_argument("--report", action="store_true", help="compare the latest recorded run without running anything")
+    parser.add_argument("--fail-on-regression", action="store_true", help="exit 1 when a metric regressed")
+    parser.add_argument("-v", "--verbose", action="store_true", help="show each case's own output")
+    parser.add_argument("--run-case", help=argparse.SUPPRESS)
+    parser.add_argument("--params", help=argparse.SUPPRESS)
+    parser.add_argument("--result", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_case:
+        run_case(args.run_case, json.loads(args.params), args.result)
+        return
+
+    runs = load_history(args.history)
+    if args.report:
+        if not runs:
+            parser.error(f"no runs recorded in {args.history}")
+        current = runs[-1]
+    else:
+        cases = [c.strip() for c in args.cases.split(",") if c.strip()]
+        unknown = [c for c in cases if c not in CASES]
+        if unknown:
+            parser.error(f"unknown case(s): {', '.join(unknown)}")
+        params = {k: getattr(args, k) for k in PARAM_KEYS}
+        child_params = {**params, "sdate": date.today().replace(day=1).isoformat()}
+        print(f"Benchmark suite: {args.clubs} clubs x {args.members} members, {args.days} days, "
+              f"{args.late_joiners} late joiner(s) per club, {args.export_mode} export", flush=True)
+        results = {}
+        for case in cases:
+            with tempfile.NamedTemporaryFile(suffix=".json", delete=False) as f:
+                result_path = f.name
+            started = time.perf_counter()
+            proc = subprocess.run(
+                [sys.executable, "-m", "benchmarks.suite", "--run-case", case, "--params", json.dumps(child_params), "--result", result_path],
+                cwd=ROOT, capture_output=not args.verbose, text=True,
+            )
+            try:
+                with open(result_path, encoding="utf-8") as f:
+                    results[case] = json.load(f)
+            except (OSError, ValueError):
+                tail = (proc.stderr or "").strip().splitlines()[-1:] or [f"exit code {proc.returncode}"]
+                results[case] = {"error": tail[0]}
+            finally:
+                if os.path.exists(result_path):
+                    os.remove(result_path)
+            print(f"  {case}: done in {time.perf_counter() - started:.1f}s", flush=True)
+        current = {
+            "at": datetime.now(timezone.utc).isoformat(),
+            "label": args.label,
+            "git": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "params": params,
+            "results": results,
+        }
+        runs.append(current)
+        if not args.no_save:
+            save_history(args.history, runs)
+            print(f"Recorded in {args.history}", flush=True)
+
+    regressions = compare(current, find_baseline(runs, current, args.baseline), args.threshold)
+    if regressions:
+        print(colorize(f"{len(regressions)} regression(s): {', '.join(regressions)}", LogColor.ERROR), flush=True)
+        if args.fail_on_regression:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
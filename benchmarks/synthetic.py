@@ -0,0 +1,57 @@
+import random
+from datetime import datetime, timedelta
+
+
+def club_payload(circle_id: int, members: int = 30, days: int = 31, seed: int = None) -> dict:
+    """A Chrono club history payload shaped like /circles/<id>/history for one month.
+
+    Members have steady daily gains with noise; a few join mid-month (so the
+    join map has something to gray out) and a few miss the odd day.
+    """
+    rng = random.Random(seed if seed is not None else circle_id)
+    friend_history = []
+    for m in range(members):
+        viewer_id = circle_id * 1000 + m
+        base = rng.randint(200_000, 3_000_000)
+        for day in range(1, days + 1):
+            if rng.random() < 0.02:
+                continue
+            friend_history.append({
+                "friend_viewer_id": viewer_id,
+                "friend_name": f"Trainer {viewer_id}",
+                "actual_date": day,
+                "adjusted_interpolated_fan_gain": int(base * rng.uniform(0.6, 1.4)),
+            })
+    daily_history = [{"actual_date": day, "rank": rng.randint(1, 5000)} for day in range(1, days + 1)]
+    return {"club_friend_history": friend_history, "club_daily_history": daily_history}
+
+
+def join_map(circle_id: int, members: int = 30, sdate: str = "2026-01-01", late_joiners: int = 3, seed: int = None) -> dict:
+    """viewer_id -> JST join_time; most members joined before sdate, a few mid-month."""
+    rng = random.Random((seed if seed is not None else circle_id) + 1)
+    start = datetime.strptime(sdate, "%Y-%m-%d")
+    out = {}
+    for m in range(members):
+        viewer_id = circle_id * 1000 + m
+        if m < late_joiners:
+            joined = start + timedelta(days=rng.randint(1, 27), hours=rng.randint(0, 23))
+        else:
+            joined = start - timedelta(days=rng.randint(1, 400))
+        out[str(viewer_id)] = joined.strftime("%Y-%m-%dT%H:%M:%S")
+    return out
+
+
+def clubs(count: int = 500, members: int = 30, days: int = 31, sdate: str = "2026-01-01", late_joiners: int = 3) -> list:
+    """(payload, join_map) pairs for `count` synthetic clubs."""
+    return [
+        (club_payload(cid, members, days), join_map(cid, members, sdate, late_joiners))
+        for cid in range(1, count + 1)
+    ]
+
+
+def month_so_far(payload: dict, days: int) -> dict:
+    """A full-month payload as Chrono serves it after `days` days, so later days only add data."""
+    return {
+        "club_friend_history": [e for e in payload["club_friend_history"] if e["actual_date"] <= days],
+        "club_daily_history": [e for e in payload["club_daily_history"] if e["actual_date"] <= days],
+    }
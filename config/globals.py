@@ -11,11 +11,37 @@ SHEET_ID = os.getenv("SHEET_ID", "1O09PM-hYo-H05kWWqMg71GelEpfaGrePQWzdDCKOqyU")
 CHRONO_API_KEY = os.getenv("CHRONO_API_KEY", "YOUR_LOCAL_KEY_HERE")
 SERVER_ID = os.getenv("SERVER_ID") or os.getenv("GUILD_ID", "1108441000873033869")
 
+# Chrono's game day turns over at 10:00 UTC
+RESET_HOUR_UTC = 10
+
+
+def last_reset(now: datetime = None) -> datetime:
+    """Most recent Chrono reset (10:00 UTC) at or before now."""
+    now = now or datetime.now(timezone.utc)
+    reset = now.replace(hour=RESET_HOUR_UTC, minute=0, second=0, microsecond=0)
+    return reset if now >= reset else reset - timedelta(days=1)
+
+
+def next_reset(now: datetime = None) -> datetime:
+    """First Chrono reset strictly after now."""
+    return last_reset(now) + timedelta(days=1)
+
+
+def latest_game_day(now: datetime = None):
+    """Latest game day whose results Chrono publishes at the last reset (i.e. 'yesterday')."""
+    return (last_reset(now) - timedelta(days=1)).date()
+
+
+def game_dates(now: datetime = None) -> tuple:
+    """(effective_date, first_day_of_month) for now; long-running processes call this per run."""
+    now_utc = now or datetime.now(timezone.utc)
+    reset_time = now_utc.replace(hour=RESET_HOUR_UTC, minute=0, second=0, microsecond=0)
+    effective = now_utc if now_utc >= reset_time else now_utc - timedelta(days=1)
+    return effective, effective.replace(day=1).strftime("%Y-%m-%d")
+
+
 # Calculate effective month (Chrono resets at 10:00 UTC)
-now_utc = datetime.now(timezone.utc)
-reset_time = now_utc.replace(hour=10, minute=0, second=0, microsecond=0)
-effective_date = now_utc if now_utc >= reset_time else now_utc - timedelta(days=1)
-first_day_of_month = effective_date.replace(day=1).strftime("%Y-%m-%d")
+effective_date, first_day_of_month = game_dates()
 TEMP_SHEET_ID = os.getenv("TEMP_SHEET_ID", "19BIFTfXUckFhWsQO9e6TiFPFp_p46fN3BVefvdZZi0I")
 
 CLUBS = {}
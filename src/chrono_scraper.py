@@ -1,68 +1,339 @@
+import asyncio
+import json
+import os
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+
+from curl_cffi import CurlHttpVersion, CurlInfo
 from curl_cffi.requests import AsyncSession
 
-from config.globals import CHRONO_API_KEY
+from config.globals import CHRONO_API_KEY, latest_game_day
+from src.http_cache import ResponseCache
+from src.metrics import CHRONO_REQUEST_SECONDS, CHRONO_THROTTLED
+from src.rate_limiter import AdaptiveRateLimiter
+from src.telemetry import add, annotate, span
 from src.utils import LogColor, colorize
 
+DEFAULT_CHRONO_BASE_URL = "https://api.chronogenesis.net"
+# Overridable so runs and benchmarks can point at a local stand-in (benchmarks/chrono_standin.py).
+CHRONO_BASE_URL = (os.getenv("CHRONO_BASE_URL") or DEFAULT_CHRONO_BASE_URL).rstrip("/")
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+
+# Connection-level timings collected from libcurl for every request.
+_CURL_INFOS = [
+    CurlInfo.NUM_CONNECTS,
+    CurlInfo.CONNECT_TIME,
+    CurlInfo.APPCONNECT_TIME,
+    CurlInfo.STARTTRANSFER_TIME,
+    CurlInfo.TOTAL_TIME,
+]
+
+
+@dataclass
+class RequestTiming:
+    """Timing of a single Chrono API request (seconds)."""
+    endpoint: str
+    status: int
+    total: float
+    connect: float = 0.0
+    tls: float = 0.0
+    first_byte: float = 0.0
+    new_connection: bool = False
+
 
-async def scrape_club_data(cfg: dict, zd=None):
+@dataclass
+class ClubPayload:
+    """Everything a club needs from Chrono for one month, fetched in one round trip.
+
+    raw/status come from club_data_by_month; join_map is best-effort (empty on
+    any club_profile failure) and only drives pre-join graying.
     """
-    Fetches club data from ChronoGenesis API directly using the Authorization key.
-    This replaces the old zendriver/browser-based scraping logic.
+    raw: str | None
+    status: int
+    join_map: dict = field(default_factory=dict)
+    join_map_cached: bool = False
+    # True when neither request touched the network (served from the disk cache).
+    from_cache: bool = False
 
-    Uses curl_cffi with browser TLS impersonation: the API rejects the plain
-    requests/curl TLS fingerprint with 403, but accepts browser fingerprints.
+
+class ChronoClient:
+    """Long-lived Chrono API client shared by every club in a run.
+
+    Owns one pooled curl_cffi session (keep-alive, HTTP/2 over TLS with Chrome
+    impersonation), so the TCP + TLS handshake is paid once per connection
+    instead of once per request. Every request is timed; see timing_summary().
     """
-    club_id = cfg.get('club_id')
-    sdate = cfg.get('sdate')
-    endpoint = "club_data_by_month" if sdate else "club_profile"
-    url = f"https://api.chronogenesis.net/{endpoint}?circle_id={club_id}"
-    if sdate:
-        url += f"&sdate={sdate}"
 
-    headers = {
-        "Authorization": cfg.get('api_key') or CHRONO_API_KEY,
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
-    }
+    def __init__(
+        self,
+        api_key: str = None,
+        max_clients: int = None,
+        timeout: int = 15,
+        profile_ttl: float = None,
+        cache: ResponseCache = None,
+        use_fresh_cache: bool = True,
+        limiter: AdaptiveRateLimiter = None,
+        base_url: str = None,
+    ):
+        self.api_key = api_key or CHRONO_API_KEY
+        self.base_url = (base_url or CHRONO_BASE_URL).rstrip("/")
+        self.timeout = timeout
+        self.max_clients = max_clients or int(os.getenv("CHRONO_MAX_CLIENTS", "10"))
+        # club_profile join times barely move within a run; retries and the
+        # early-month fallback reuse the cached map instead of refetching it.
+        self.profile_ttl = profile_ttl if profile_ttl is not None else float(os.getenv("CHRONO_PROFILE_TTL", "600"))
+        self.timings: list[RequestTiming] = []
+        self._session = None
+        # Every network request is admitted by the shared adaptive limiter.
+        self.limiter = limiter or AdaptiveRateLimiter.from_env()
+        self._join_maps: dict[str, tuple[float, dict]] = {}
+        # Optional on-disk cache. With use_fresh_cache=False (--force) entries
+        # are never served blindly, only revalidated with ETag/Last-Modified.
+        self.cache = cache
+        self.use_fresh_cache = use_fresh_cache
+        self.cache_hits = 0
+        self.cache_revalidated = 0
+        # Month payloads still missing the latest game day are only cached briefly.
+        self.pending_ttl = float(os.getenv("CHRONO_CACHE_PENDING_TTL", "900"))
+
+    async def __aenter__(self):
+        self._ensure_session()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    def _ensure_session(self) -> AsyncSession:
+        if self._session is None:
+            self._session = AsyncSession(
+                max_clients=self.max_clients,
+                impersonate="chrome",
+                http_version=CurlHttpVersion.V2TLS,
+                curl_infos=_CURL_INFOS,
+                timeout=self.timeout,
+            )
+        return self._session
+
+    async def close(self):
+        self.limiter.save_state()
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def get(self, endpoint: str, params: dict, api_key: str = None, extra_headers: dict = None):
+        """GET {base_url}/{endpoint} on the pooled session. Returns the raw response."""
+        session = self._ensure_session()
+        headers = {
+            "Authorization": api_key or self.api_key,
+            "User-Agent": USER_AGENT,
+            **(extra_headers or {}),
+        }
+        with span("chrono.get", endpoint=endpoint):
+            async with self.limiter.slot():
+                started = time.perf_counter()
+                try:
+                    response = await session.get(f"{self.base_url}/{endpoint}", params=params, headers=headers)
+                except Exception:
+                    self.timings.append(RequestTiming(endpoint, 0, time.perf_counter() - started))
+                    CHRONO_REQUEST_SECONDS.labels(endpoint, "error").observe(time.perf_counter() - started)
+                    raise
+            self._record(endpoint, response, time.perf_counter() - started)
+            CHRONO_REQUEST_SECONDS.labels(endpoint, response.status_code).observe(time.perf_counter() - started)
+            if response.status_code == 429:
+                CHRONO_THROTTLED.labels(endpoint).inc()
+            self.limiter.on_response(response.status_code, dict(response.headers))
+            annotate(status=response.status_code)
+            add("chrono_calls")
+            add("chrono_bytes", len(response.content))
+        return response
+
+    def _record(self, endpoint: str, response, wall: float):
+        infos = response.infos or {}
+        self.timings.append(RequestTiming(
+            endpoint=endpoint,
+            status=response.status_code,
+            total=infos.get(CurlInfo.TOTAL_TIME, wall),
+            connect=infos.get(CurlInfo.CONNECT_TIME, 0.0),
+            tls=infos.get(CurlInfo.APPCONNECT_TIME, 0.0),
+            first_byte=infos.get(CurlInfo.STARTTRANSFER_TIME, 0.0),
+            new_connection=bool(infos.get(CurlInfo.NUM_CONNECTS, 0)),
+        ))
+
+    async def _cached_get(self, endpoint: str, params: dict, api_key: str = None, ttl_for=None, use_fresh: bool = True):
+        """GET through the disk cache. Returns (text, status, served_without_network).
+
+        Fresh entries are returned without a request (unless use_fresh is
+        False, as for a club named in --force=...); stale ones are
+        revalidated with If-None-Match/If-Modified-Since when the API sent
+        validators. Only non-empty 200 responses are stored; ttl_for(text)
+        may return a shorter TTL than the default reset-aware expiry.
+        """
+        key = (endpoint, params.get("circle_id"), params.get("sdate"))
+        if self.base_url != DEFAULT_CHRONO_BASE_URL:
+            # Responses from another server never mix with the real API's.
+            key = (endpoint, f"{self.base_url}|{key[1]}", key[2])
+        entry = self.cache.get(*key) if self.cache else None
+        if entry and self.use_fresh_cache and use_fresh and entry.is_fresh() and entry.status == 200:
+            self.cache_hits += 1
+            return entry.body, entry.status, True
 
-    prefix = colorize("[Chrono API]", LogColor.SCRAPER)
+        response = await self.get(endpoint, params, api_key, entry.validators() if entry else None)
+        if response.status_code == 304 and entry:
+            self.cache_revalidated += 1
+            self.cache.put(*key, entry.body, 200, entry.headers, ttl_for(entry.body) if ttl_for else None)
+            return entry.body, 200, False
 
-    try:
-        async with AsyncSession() as session:
-            response = await session.get(url, headers=headers, impersonate="chrome", timeout=15)
-            return response.text, response.status_code
+        text = response.text
+        if self.cache and response.status_code == 200 and text:
+            self.cache.put(*key, text, 200, dict(response.headers), ttl_for(text) if ttl_for else None)
+        return text, response.status_code, False
 
-    except Exception as e:
-        print(f"  {prefix} Connection error: {e}", flush=True)
-        return None, 500
+    def _month_ttl(self, sdate: str):
+        """TTL for a club_data_by_month body: short while the latest game day is still missing."""
+        def ttl_for(text: str):
+            target = latest_game_day()
+            try:
+                month = datetime.strptime(sdate, "%Y-%m-%d").date()
+            except (TypeError, ValueError):
+                return None
+            if (month.year, month.month) != (target.year, target.month):
+                return None
+            try:
+                days = [int(x.get("actual_date")) for x in json.loads(text).get("club_friend_history") or []
+                        if x.get("actual_date") is not None]
+            except (ValueError, TypeError, AttributeError):
+                return self.pending_ttl
+            return None if days and max(days) >= target.day else self.pending_ttl
+        return ttl_for
 
+    async def _fetch_club_data(self, cfg: dict):
+        sdate = cfg.get('sdate')
+        endpoint = "club_data_by_month" if sdate else "club_profile"
+        params = {"circle_id": cfg.get('club_id')}
+        if sdate:
+            params["sdate"] = sdate
 
-async def scrape_club_join_map(cfg: dict) -> dict:
-    """Fetch each friend's join_time (JST) from the club profile.
+        try:
+            return await self._cached_get(endpoint, params, cfg.get('api_key'), self._month_ttl(sdate) if sdate else None, not cfg.get('force'))
+        except Exception as e:
+            prefix = colorize("[Chrono API]", LogColor.SCRAPER)
+            print(f"  {prefix} Connection error: {e}", flush=True)
+            return None, 500, False
 
-    Returns a dict keyed by string viewer id -> join_time ISO string.
-    An empty dict is returned on any failure so pre-join graying can be
-    skipped without failing the main data flow.
+    async def fetch_club_data(self, cfg: dict):
+        """Fetch club_data_by_month (or club_profile when no sdate). Returns (text, status)."""
+        text, status, _ = await self._fetch_club_data(cfg)
+        return text, status
+
+    async def _fetch_join_map(self, cfg: dict):
+        try:
+            text, status, cached = await self._cached_get("club_profile", {"circle_id": cfg.get('club_id')}, cfg.get('api_key'), use_fresh=not cfg.get('force'))
+            if status != 200:
+                return {}, False
+            data = json.loads(text)
+        except Exception:
+            return {}, False
+
+        join_map = {}
+        for p in data.get("club_friend_profile") or []:
+            vid = p.get("friend_viewer_id")
+            if vid is not None and p.get("join_time"):
+                join_map[str(vid)] = p["join_time"]
+        return join_map, cached
+
+    async def fetch_join_map(self, cfg: dict) -> dict:
+        """Fetch each friend's join_time (JST) from the club profile.
+
+        Returns a dict keyed by string viewer id -> join_time ISO string.
+        An empty dict is returned on any failure so pre-join graying can be
+        skipped without failing the main data flow.
+        """
+        join_map, _ = await self._fetch_join_map(cfg)
+        return join_map
+
+    async def fetch_club_payload(self, cfg: dict) -> ClubPayload:
+        """Fetch month history and join map concurrently on the pooled session.
+
+        Both requests are multiplexed over the same connection, so the club's
+        critical path is a single round trip. A join map cached within
+        profile_ttl is reused without touching the network.
+        """
+        club_id = str(cfg.get('club_id'))
+        cached = None if cfg.get('force') else self._join_maps.get(club_id)
+        if cached and time.monotonic() - cached[0] < self.profile_ttl:
+            raw, status, from_disk = await self._fetch_club_data(cfg)
+            return ClubPayload(raw, status, cached[1], join_map_cached=True, from_cache=from_disk)
+
+        (raw, status, from_disk), (join_map, join_from_disk) = await asyncio.gather(
+            self._fetch_club_data(cfg),
+            self._fetch_join_map(cfg),
+        )
+        if join_map:
+            self._join_maps[club_id] = (time.monotonic(), join_map)
+        return ClubPayload(raw, status, join_map, from_cache=from_disk and join_from_disk)
+
+    def reset_stats(self):
+        """Start a fresh timing/cache tally (a resident client reports per run)."""
+        self.timings = []
+        self.cache_hits = 0
+        self.cache_revalidated = 0
+
+    def timing_summary(self) -> dict:
+        """Aggregate request timings: counts, new vs reused connections, mean latencies."""
+        n = len(self.timings)
+        if not n:
+            return {"requests": 0}
+        new = [t for t in self.timings if t.new_connection]
+        return {
+            "requests": n,
+            "new_connections": len(new),
+            "reused_connections": n - len(new),
+            "avg_total_ms": round(1000 * sum(t.total for t in self.timings) / n, 1),
+            "avg_first_byte_ms": round(1000 * sum(t.first_byte for t in self.timings) / n, 1),
+            "avg_handshake_ms": round(1000 * sum(t.tls for t in new) / len(new), 1) if new else 0.0,
+        }
+
+    def print_timing_summary(self):
+        s = self.timing_summary()
+        prefix = colorize("[Chrono API]", LogColor.SCRAPER)
+        if self.cache is not None:
+            print(f"  {prefix} Cache: {self.cache_hits} served from disk, {self.cache_revalidated} revalidated (304).", flush=True)
+        lim = self.limiter.summary()
+        print(
+            f"  {prefix} Rate limiter: {lim['throttled']} throttled (429), "
+            f"{lim['wait_seconds']}s queued, ending rate {lim['rate']} req/s",
+            flush=True
+        )
+        if not s["requests"]:
+            print(f"  {prefix} No requests issued.", flush=True)
+            return
+        print(
+            f"  {prefix} {s['requests']} requests, {s['new_connections']} new connections "
+            f"({s['reused_connections']} reused), avg {s['avg_total_ms']}ms "
+            f"(TTFB {s['avg_first_byte_ms']}ms), handshake avg {s['avg_handshake_ms']}ms",
+            flush=True
+        )
+
+
+async def scrape_club_data(cfg: dict, zd=None, client: ChronoClient = None):
+    """
+    Fetches club data from ChronoGenesis API directly using the Authorization key.
+    This replaces the old zendriver/browser-based scraping logic.
+
+    Uses curl_cffi with browser TLS impersonation: the API rejects the plain
+    requests/curl TLS fingerprint with 403, but accepts browser fingerprints.
+    Pass a shared ChronoClient to reuse its pooled connections.
     """
-    club_id = cfg.get('club_id')
-    url = f"https://api.chronogenesis.net/club_profile?circle_id={club_id}"
-
-    headers = {
-        "Authorization": cfg.get('api_key') or CHRONO_API_KEY,
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
-    }
-
-    try:
-        async with AsyncSession() as session:
-            response = await session.get(url, headers=headers, impersonate="chrome", timeout=15)
-            if response.status_code != 200:
-                return {}
-            data = response.json()
-    except Exception:
-        return {}
-
-    join_map = {}
-    for p in data.get("club_friend_profile") or []:
-        vid = p.get("friend_viewer_id")
-        if vid is not None and p.get("join_time"):
-            join_map[str(vid)] = p["join_time"]
-    return join_map
+    if client is not None:
+        return await client.fetch_club_data(cfg)
+    async with ChronoClient() as temp_client:
+        return await temp_client.fetch_club_data(cfg)
+
+
+async def scrape_club_join_map(cfg: dict, client: ChronoClient = None) -> dict:
+    """Fetch each friend's join_time (JST) from the club profile. See ChronoClient.fetch_join_map."""
+    if client is not None:
+        return await client.fetch_join_map(cfg)
+    async with ChronoClient() as temp_client:
+        return await temp_client.fetch_join_map(cfg)
@@ -0,0 +1,94 @@
+import asyncio
+import os
+from datetime import datetime, timedelta, timezone
+
+from config.globals import last_reset, latest_game_day, next_reset
+from src.utils import LogColor, colorize
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, str(default)))
+    except (TypeError, ValueError):
+        return default
+
+
+class ResetScheduler:
+    """Decides when a resident tracker runs next.
+
+    After every 10:00 UTC reset the first run starts reset_delay seconds
+    later. While some club still lacks the newest game day, the tracker polls
+    again after poll_seconds, doubling up to max_poll_seconds, and gives up
+    poll_hours after the reset. Once every club has the new day, it sleeps
+    until the next reset.
+    """
+
+    def __init__(self, reset_delay: float = 60, poll_seconds: float = 60, max_poll_seconds: float = 900, poll_hours: float = 6):
+        self.reset_delay = max(0.0, reset_delay)
+        self.poll_seconds = max(1.0, poll_seconds)
+        self.max_poll_seconds = max(self.poll_seconds, max_poll_seconds)
+        self.poll_hours = max(0.0, poll_hours)
+        self.polls = 0
+
+    @classmethod
+    def from_env(cls):
+        """DAEMON_RESET_DELAY, DAEMON_POLL_SECONDS, DAEMON_POLL_MAX_SECONDS, DAEMON_POLL_HOURS."""
+        return cls(
+            _env_float("DAEMON_RESET_DELAY", 60),
+            _env_float("DAEMON_POLL_SECONDS", 60),
+            _env_float("DAEMON_POLL_MAX_SECONDS", 900),
+            _env_float("DAEMON_POLL_HOURS", 6),
+        )
+
+    def next_run(self, lagging: bool, now: datetime = None, poll_at: datetime = None) -> datetime:
+        """When to run next, given whether the last run left clubs behind.
+
+        poll_at, when given, is the earliest per-club re-poll and replaces the
+        scheduler's own backoff.
+        """
+        now = now or datetime.now(timezone.utc)
+        if lagging and now < last_reset(now) + timedelta(hours=self.poll_hours):
+            if poll_at is not None:
+                self.polls += 1
+                return max(poll_at, now + timedelta(seconds=1))
+            wait = min(self.max_poll_seconds, self.poll_seconds * 2 ** self.polls)
+            self.polls += 1
+            return now + timedelta(seconds=wait)
+        self.polls = 0
+        return next_reset(now) + timedelta(seconds=self.reset_delay)
+
+
+async def run_daemon(run_cycle, scheduler: ResetScheduler = None, force_first: bool = False, next_poll=None):
+    """Call run_cycle(force) forever on the scheduler's timetable.
+
+    run_cycle returns the titles of clubs still missing the latest game day;
+    force is only passed for the first cycle. next_poll() may return when the
+    earliest lagging club is due again (see FreshnessTracker). A failed cycle
+    is logged and retried on the polling schedule instead of stopping the daemon.
+    """
+    scheduler = scheduler or ResetScheduler.from_env()
+    prefix = colorize("[Daemon]", LogColor.COOLDOWN)
+    force = force_first
+    while True:
+        target = latest_game_day()
+        try:
+            lagging = await run_cycle(force)
+        except (Exception, SystemExit) as e:
+            print(f"  {prefix} Run failed: {e!r}", flush=True)
+            lagging = None
+        force = False
+
+        poll_at = next_poll() if lagging and next_poll is not None else None
+        wake = scheduler.next_run(lagging is None or bool(lagging), poll_at=poll_at)
+        if lagging is None:
+            print(f"  {prefix} Retrying at {wake:%Y-%m-%d %H:%M:%S} UTC.", flush=True)
+        elif lagging and scheduler.polls:
+            names = ", ".join(lagging[:5]) + (f" (+{len(lagging) - 5} more)" if len(lagging) > 5 else "")
+            print(f"  {prefix} {len(lagging)} club(s) still missing Day {target.day}: {names}. "
+                  f"Polling again at {wake:%H:%M:%S} UTC.", flush=True)
+        elif lagging:
+            print(f"  {prefix} Giving up on Day {target.day} for {len(lagging)} club(s) until the next reset "
+                  f"({wake:%Y-%m-%d %H:%M} UTC).", flush=True)
+        else:
+            print(f"  {prefix} Up to date with Day {target.day}. Next run at {wake:%Y-%m-%d %H:%M} UTC.", flush=True)
+        await asyncio.sleep(max(0.0, (wake - datetime.now(timezone.utc)).total_seconds()))
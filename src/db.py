@@ -0,0 +1,175 @@
+import asyncio
+import datetime
+import json
+import os
+import threading
+from decimal import Decimal
+
+from src.http_cache import ResponseCache
+from src.telemetry import record_sleep
+
+DEFAULT_DB_CACHE_DIR = os.path.join(".cache", "db")
+
+# Active clubs with the quota in force on $1. DISTINCT ON picks each club's
+# latest quota_requirements row in one pass over the table (an index on
+# quota_requirements (club_id, effective_date) serves it in order) instead of
+# one correlated subquery per club. $2 optionally restricts to a guild.
+ACTIVE_CLUBS_QUERY = """
+    WITH latest_quota AS (
+        SELECT DISTINCT ON (qr.club_id) qr.club_id, qr.daily_quota
+        FROM quota_requirements qr
+        WHERE qr.effective_date <= $1
+        ORDER BY qr.club_id, qr.effective_date DESC
+    )
+    SELECT c.circle_id, c.club_name, c.quota_period,
+           COALESCE(lq.daily_quota, c.daily_quota) AS quota
+    FROM clubs c
+    LEFT JOIN latest_quota lq ON lq.club_id = c.club_id
+    WHERE c.circle_id IS NOT NULL
+      AND c.is_active = TRUE
+      AND ($2::bigint IS NULL OR c.guild_id = $2::bigint)
+"""
+
+# One club's quota in force on $1: a LATERAL top-1 lookup per matching club.
+CLUB_QUOTA_QUERY = """
+    SELECT COALESCE(lq.daily_quota, c.daily_quota) AS quota, c.quota_period
+    FROM clubs c
+    LEFT JOIN LATERAL (
+        SELECT qr.daily_quota
+        FROM quota_requirements qr
+        WHERE qr.club_id = c.club_id AND qr.effective_date <= $1
+        ORDER BY qr.effective_date DESC
+        LIMIT 1
+    ) lq ON TRUE
+    WHERE c.circle_id = $2 AND c.is_active = TRUE
+"""
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, str(default)))
+    except (TypeError, ValueError):
+        return default
+
+
+def _plain(value):
+    # A column value as JSON would round-trip it, so cached and fresh rows have the same types.
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, Decimal):
+        return int(value) if value == value.to_integral_value() else float(value)
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    return str(value)
+
+
+class Database:
+    """Pooled access to the UmaCore database, shared by everything in a run.
+
+    The asyncpg pool is opened on first use (retrying the refused first
+    connects SSH tunnels are prone to) and reused afterwards. asyncpg runs
+    every query as a prepared statement and keeps it in each pooled
+    connection's statement cache, so repeated queries skip parsing and
+    planning. Club and quota lookups are also cached on disk per game day
+    (until the next 10:00 UTC reset), so later runs on the same day make no
+    database round trip at all.
+    """
+
+    def __init__(self, dsn: str, pool_size: int = 4, cache: ResponseCache = None):
+        self.dsn = dsn
+        self.pool_size = max(1, pool_size)
+        self.cache = cache
+        self._pool = None
+        self._pool_lock = asyncio.Lock()
+        self.queries = 0
+        self.cache_hits = 0
+
+    @classmethod
+    def from_env(cls, dsn: str):
+        """Pool sized by DB_POOL_SIZE; the game-day cache lives in DB_CACHE_DIR unless DB_CACHE=0."""
+        cache = None
+        if os.getenv("DB_CACHE", "1").strip().lower() not in ("0", "false", "no", "off"):
+            cache = ResponseCache(os.getenv("DB_CACHE_DIR") or DEFAULT_DB_CACHE_DIR)
+        return cls(dsn, _env_int("DB_POOL_SIZE", 4), cache)
+
+    async def pool(self):
+        async with self._pool_lock:
+            if self._pool is not None:
+                return self._pool
+            import asyncpg
+            # SSH-tunneled databases can refuse the very first connection attempt;
+            # retry transient network errors (ConnectionRefusedError subclasses OSError).
+            last_err = None
+            for attempt in range(3):
+                try:
+                    self._pool = await asyncpg.create_pool(self.dsn, min_size=1, max_size=self.pool_size)
+                    return self._pool
+                except OSError as e:
+                    last_err = e
+                    print(f"  [Retry] DB connect refused (attempt {attempt + 1}/3): {e}", flush=True)
+                    record_sleep(1 + attempt * 2, "db_retry")
+                    await asyncio.sleep(1 + attempt * 2)
+            raise last_err
+
+    async def fetch(self, query: str, *args) -> list:
+        pool = await self.pool()
+        async with pool.acquire() as conn:
+            rows = await conn.fetch(query, *args)
+        self.queries += 1
+        return [dict(row) for row in rows]
+
+    async def _cached(self, key: tuple, use_cache: bool, query: str, *args) -> list:
+        # key is (name, scope, game day); entries expire at the next reset.
+        if self.cache is not None and use_cache:
+            entry = self.cache.get(*key)
+            if entry and entry.is_fresh():
+                try:
+                    rows = json.loads(entry.body)
+                    self.cache_hits += 1
+                    return rows
+                except ValueError:
+                    pass
+        rows = [{k: _plain(v) for k, v in row.items()} for row in await self.fetch(query, *args)]
+        # Empty results are not cached so a newly registered club shows up on the next run.
+        if self.cache is not None and rows:
+            self.cache.put(*key, json.dumps(rows), 200)
+        return rows
+
+    async def active_clubs(self, check_date, guild_id: str = None, use_cache: bool = True) -> list:
+        """circle_id, club_name, quota_period and effective quota of every active club."""
+        return await self._cached(
+            ("db_active_clubs", guild_id or "", check_date.isoformat()), use_cache,
+            ACTIVE_CLUBS_QUERY, check_date, int(guild_id) if guild_id else None,
+        )
+
+    async def club_quota(self, check_date, circle_id: str, use_cache: bool = True) -> tuple:
+        """(quota, quota_period) of an active club, or (None, None)."""
+        rows = await self._cached(
+            ("db_club_quota", str(circle_id), check_date.isoformat()), use_cache,
+            CLUB_QUOTA_QUERY, check_date, str(circle_id),
+        )
+        if not rows:
+            return None, None
+        return int(rows[0]["quota"]), rows[0]["quota_period"]
+
+    async def close(self):
+        if self._pool is not None:
+            await self._pool.close()
+            self._pool = None
+
+
+_DATABASES = {}
+_REGISTRY_LOCK = threading.Lock()
+
+
+def get_database(dsn: str) -> Database:
+    """The process-wide Database for dsn."""
+    with _REGISTRY_LOCK:
+        if dsn not in _DATABASES:
+            _DATABASES[dsn] = Database.from_env(dsn)
+        return _DATABASES[dsn]
+
+
+async def close_databases():
+    for db in list(_DATABASES.values()):
+        await db.close()
@@ -0,0 +1,145 @@
+import os
+from datetime import date, datetime, timedelta, timezone
+
+from src.http_cache import ResponseCache
+from src.sheet_metadata import metadata_cache
+
+SUMMARY_TITLE = "All Club Data"
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, str(default)))
+    except (TypeError, ValueError):
+        return default
+
+
+def _max_day(headers: list) -> int:
+    days = []
+    for h in headers:
+        if isinstance(h, str) and h.startswith("Day "):
+            try:
+                days.append(int(h[4:]))
+            except ValueError:
+                pass
+    return max(days, default=0)
+
+
+class FreshnessTracker:
+    """Per-club record of the latest game day published to each club sheet.
+
+    The published day is kept as a marker in the Chrono response cache (so it
+    survives between runs) and, for clubs without one, read back from the
+    sheet headers. plan() splits a run's clubs into those that are already
+    current, those due for a fetch, and lagging clubs still waiting out their
+    re-poll backoff: every club Chrono has not caught up on is polled again
+    after poll_seconds, doubling per miss up to max_poll_seconds, independently
+    of the others.
+    """
+
+    def __init__(self, cache: ResponseCache = None, spreadsheet_id: str = "", poll_seconds: float = 60, max_poll_seconds: float = 900):
+        self.cache = cache
+        self.spreadsheet_id = spreadsheet_id
+        self.poll_seconds = max(1.0, poll_seconds)
+        self.max_poll_seconds = max(self.poll_seconds, max_poll_seconds)
+        self._published = {}
+        # circle_id -> (misses, next poll time) for clubs behind on Chrono's side
+        # on the game day in self._target.
+        self._polls = {}
+        self._target = None
+
+    @classmethod
+    def from_env(cls, cache: ResponseCache, spreadsheet_id: str):
+        """Backoff from DAEMON_POLL_SECONDS / DAEMON_POLL_MAX_SECONDS (re-polls only matter to --daemon)."""
+        return cls(cache, spreadsheet_id, _env_float("DAEMON_POLL_SECONDS", 60), _env_float("DAEMON_POLL_MAX_SECONDS", 900))
+
+    def _marker(self, circle_id) -> str:
+        return f"published:{self.spreadsheet_id}:{circle_id}"
+
+    def published(self, circle_id) -> date | None:
+        """Latest game day on the club's sheet, if known."""
+        cid = str(circle_id)
+        if cid not in self._published and self.cache is not None:
+            value = self.cache.get_marker(self._marker(cid))
+            try:
+                self._published[cid] = date.fromisoformat(value) if value else None
+            except (TypeError, ValueError):
+                self._published[cid] = None
+        return self._published.get(cid)
+
+    def mark_published(self, circle_id, sdate: str, day: int):
+        if not day:
+            return
+        cid = str(circle_id)
+        published = date.fromisoformat(sdate).replace(day=day)
+        self._published[cid] = published
+        if self.cache is not None:
+            self.cache.set_marker(self._marker(cid), published.isoformat())
+
+    def seed_from_sheets(self, gc_client, clubs: list) -> int:
+        """Fill in unknown clubs from their sheet's "Day N" headers in one batchGet.
+
+        The sheets carry no month, so the summary sheet's title row decides
+        which month those headers belong to. Returns how many clubs were seeded.
+        """
+        unknown = [cfg for cfg in clubs if self.published(cfg.get("club_id")) is None]
+        if not unknown:
+            return 0
+        cache = metadata_cache(gc_client, self.spreadsheet_id)
+        titles = set(cache.titles())
+        if SUMMARY_TITLE not in titles:
+            return 0
+        present = [cfg for cfg in unknown if cfg["title"] in titles]
+        if not present:
+            return 0
+        ranges = [f"'{SUMMARY_TITLE}'!A1"] + [f"'{cfg['title']}'!1:1" for cfg in present]
+        value_ranges = cache.spreadsheet.values_batch_get(ranges).get("valueRanges", [])
+        if len(value_ranges) != len(ranges):
+            return 0
+        title_row = value_ranges[0].get("values") or [[""]]
+        try:
+            month = datetime.strptime(" ".join(str(title_row[0][0]).split()[:2]).title(), "%B %Y").date()
+        except (ValueError, IndexError):
+            return 0
+        seeded = 0
+        for cfg, vr in zip(present, value_ranges[1:]):
+            rows = vr.get("values") or [[]]
+            day = _max_day(rows[0])
+            if day:
+                self._published[str(cfg.get("club_id"))] = month.replace(day=day)
+                seeded += 1
+        return seeded
+
+    def plan(self, clubs: list, target: date, now: datetime = None) -> tuple:
+        """(due, current, waiting) lists of club configs for a run aiming at target."""
+        now = now or datetime.now(timezone.utc)
+        if target != self._target:
+            # A new game day: every club starts polling from scratch.
+            self._polls.clear()
+            self._target = target
+        due, current, waiting = [], [], []
+        for cfg in clubs:
+            cid = str(cfg.get("club_id"))
+            published = self.published(cid)
+            if published is not None and published >= target:
+                current.append(cfg)
+            elif cid in self._polls and self._polls[cid][1] > now:
+                waiting.append(cfg)
+            else:
+                due.append(cfg)
+        return due, current, waiting
+
+    def record(self, circle_id, target: date, caught_up: bool, now: datetime = None):
+        """Note whether a fetched club has the target day; lagging clubs get their next poll scheduled."""
+        cid = str(circle_id)
+        if caught_up:
+            self._polls.pop(cid, None)
+            return
+        now = now or datetime.now(timezone.utc)
+        misses = self._polls.get(cid, (0, now))[0]
+        wait = min(self.max_poll_seconds, self.poll_seconds * 2 ** misses)
+        self._polls[cid] = (misses + 1, now + timedelta(seconds=wait))
+
+    def next_poll(self) -> datetime | None:
+        """Earliest scheduled re-poll of a lagging club."""
+        return min((at for _, at in self._polls.values()), default=None)
@@ -0,0 +1,252 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass, field
+
+DEFAULT_HISTORY_PATH = os.path.join(".cache", "history", "history.sqlite3")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS friend_history (
+    circle_id TEXT NOT NULL,
+    viewer_id TEXT NOT NULL,
+    date TEXT NOT NULL,
+    month TEXT NOT NULL,
+    day INTEGER NOT NULL,
+    friend_name TEXT,
+    fan_gain REAL,
+    row TEXT NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (circle_id, viewer_id, date)
+);
+CREATE INDEX IF NOT EXISTS friend_history_month ON friend_history (circle_id, month);
+CREATE TABLE IF NOT EXISTS daily_history (
+    circle_id TEXT NOT NULL,
+    date TEXT NOT NULL,
+    month TEXT NOT NULL,
+    day INTEGER NOT NULL,
+    rank INTEGER,
+    row TEXT NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (circle_id, date)
+);
+CREATE INDEX IF NOT EXISTS daily_history_month ON daily_history (circle_id, month);
+CREATE TABLE IF NOT EXISTS ingest_marks (
+    circle_id TEXT NOT NULL,
+    month TEXT NOT NULL,
+    high_water INTEGER NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (circle_id, month)
+);
+CREATE TABLE IF NOT EXISTS join_times (
+    circle_id TEXT NOT NULL,
+    viewer_id TEXT NOT NULL,
+    join_time TEXT,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (circle_id, viewer_id)
+);
+"""
+
+
+def _day(row: dict) -> int | None:
+    try:
+        return int(row.get("actual_date"))
+    except (TypeError, ValueError):
+        return None
+
+
+@dataclass
+class IngestDelta:
+    """What saving one month changed in the store.
+
+    high_water is the latest game day stored for the month (the per-club
+    high-water mark); new_days are days past the previous mark, revised_days
+    are days at or before it whose rows Chrono changed or dropped.
+    """
+    high_water_before: int = 0
+    high_water: int = 0
+    new_days: list = field(default_factory=list)
+    revised_days: list = field(default_factory=list)
+    changed_rows: int = 0
+    join_changes: int = 0
+
+    @property
+    def unchanged(self) -> bool:
+        return not self.changed_rows and not self.join_changes
+
+
+class HistoryStore:
+    """Local SQLite copy of every club history row fetched from Chrono.
+
+    club_friend_history rows are keyed by (circle_id, viewer_id, date) and
+    club_daily_history rows by (circle_id, date), where date is the game day
+    inside the month being fetched. Saving a month upserts: rows Chrono
+    revised replace the stored ones, unchanged rows are left alone. The
+    original row JSON is kept, so month_payload() rebuilds exactly what the
+    API returned and build_dataframe can run on it without a request.
+    """
+
+    def __init__(self, path: str = None):
+        self.path = path or DEFAULT_HISTORY_PATH
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+        self.changes = 0
+
+    @classmethod
+    def from_env(cls):
+        """Store at HISTORY_DB; None when disabled with HISTORY_STORE=0."""
+        if os.getenv("HISTORY_STORE", "1").strip().lower() in ("0", "false", "no", "off"):
+            return None
+        return cls(os.getenv("HISTORY_DB") or DEFAULT_HISTORY_PATH)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def save_month(self, circle_id, sdate: str, data: dict, join_map: dict = None, complete: bool = True) -> IngestDelta:
+        """Upsert one month's payload and report what changed against the stored copy.
+
+        Rows without a viewer id or actual_date are skipped (build_dataframe
+        drops them too); within one payload the first row per key wins. A
+        complete payload (a full club_data_by_month response) also removes
+        stored rows of that month the API no longer returns.
+        """
+        cid = str(circle_id)
+        month = sdate[:7]
+        now = time.time()
+        friends = {}
+        for row in data.get("club_friend_history") or []:
+            day = _day(row)
+            if day is None or row.get("friend_viewer_id") is None:
+                continue
+            key = (str(row["friend_viewer_id"]), f"{month}-{day:02d}")
+            if key not in friends:
+                gain = row.get("adjusted_interpolated_fan_gain")
+                friends[key] = (cid, key[0], key[1], month, day, row.get("friend_name"),
+                                gain if isinstance(gain, (int, float)) else None, json.dumps(row), now)
+        daily = {}
+        for row in data.get("club_daily_history") or []:
+            day = _day(row)
+            if day is None:
+                continue
+            date = f"{month}-{day:02d}"
+            if date not in daily:
+                rank = row.get("rank")
+                daily[date] = (cid, date, month, day, rank if isinstance(rank, int) else None, json.dumps(row), now)
+
+        with self._lock, self._conn:
+            stored = {(r[0], r[1]): (r[2], r[3]) for r in self._conn.execute(
+                "SELECT viewer_id, date, day, row FROM friend_history WHERE circle_id = ? AND month = ?", (cid, month)
+            )}
+            stored_daily = dict(self._conn.execute(
+                "SELECT date, row FROM daily_history WHERE circle_id = ? AND month = ?", (cid, month)
+            ).fetchall())
+            mark = self._conn.execute(
+                "SELECT high_water FROM ingest_marks WHERE circle_id = ? AND month = ?", (cid, month)
+            ).fetchone()
+            high_water = mark[0] if mark else max((day for day, _ in stored.values()), default=0)
+            delta = IngestDelta(high_water_before=high_water, high_water=high_water)
+            if friends:
+                latest = max(v[4] for v in friends.values())
+                delta.high_water = latest if complete else max(high_water, latest)
+
+            # Only rows that are new or differ from the stored copy are written.
+            upserts = [v for k, v in friends.items() if k not in stored or stored[k][1] != v[7]]
+            days = {v[4] for v in upserts}
+            removed = [k for k in stored if k not in friends] if complete else []
+            days.update(stored[k][0] for k in removed)
+            daily_upserts = [v for k, v in daily.items() if stored_daily.get(k) != v[5]]
+            daily_removed = [k for k in stored_daily if k not in daily] if complete else []
+
+            self._conn.executemany(
+                "INSERT INTO friend_history VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (circle_id, viewer_id, date) DO UPDATE SET "
+                "friend_name = excluded.friend_name, fan_gain = excluded.fan_gain, "
+                "row = excluded.row, updated_at = excluded.updated_at",
+                upserts,
+            )
+            self._conn.executemany(
+                "DELETE FROM friend_history WHERE circle_id = ? AND viewer_id = ? AND date = ?",
+                [(cid, vid, date) for vid, date in removed],
+            )
+            self._conn.executemany(
+                "INSERT INTO daily_history VALUES (?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (circle_id, date) DO UPDATE SET "
+                "rank = excluded.rank, row = excluded.row, updated_at = excluded.updated_at",
+                daily_upserts,
+            )
+            self._conn.executemany(
+                "DELETE FROM daily_history WHERE circle_id = ? AND date = ?", [(cid, date) for date in daily_removed]
+            )
+            if join_map:
+                before = self._conn.total_changes
+                self._conn.executemany(
+                    "INSERT INTO join_times VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT (circle_id, viewer_id) DO UPDATE SET "
+                    "join_time = excluded.join_time, updated_at = excluded.updated_at "
+                    "WHERE join_time IS NOT excluded.join_time",
+                    [(cid, str(vid), jt, now) for vid, jt in join_map.items()],
+                )
+                delta.join_changes = self._conn.total_changes - before
+            self._conn.execute(
+                "INSERT INTO ingest_marks VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (circle_id, month) DO UPDATE SET high_water = excluded.high_water, updated_at = excluded.updated_at",
+                (cid, month, delta.high_water, now),
+            )
+
+            delta.new_days = sorted(d for d in days if d > delta.high_water_before)
+            delta.revised_days = sorted(d for d in days if d <= delta.high_water_before)
+            delta.changed_rows = len(upserts) + len(removed) + len(daily_upserts) + len(daily_removed)
+            self.changes += delta.changed_rows
+            return delta
+
+    def save_raw(self, circle_id, sdate: str, raw, join_map: dict = None) -> IngestDelta:
+        """save_month for an undecoded club_data_by_month body."""
+        return self.save_month(circle_id, sdate, json.loads(raw), join_map)
+
+    def month_payload(self, circle_id, sdate: str) -> dict | None:
+        """The stored month in the club_data_by_month shape, or None if nothing is stored."""
+        cid = str(circle_id)
+        month = sdate[:7]
+        with self._lock:
+            friends = self._conn.execute(
+                "SELECT row FROM friend_history WHERE circle_id = ? AND month = ? ORDER BY viewer_id, day",
+                (cid, month),
+            ).fetchall()
+            daily = self._conn.execute(
+                "SELECT row FROM daily_history WHERE circle_id = ? AND month = ? ORDER BY day",
+                (cid, month),
+            ).fetchall()
+        if not friends and not daily:
+            return None
+        return {
+            "club_friend_history": [json.loads(r[0]) for r in friends],
+            "club_daily_history": [json.loads(r[0]) for r in daily],
+        }
+
+    def join_map(self, circle_id) -> dict:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT viewer_id, join_time FROM join_times WHERE circle_id = ?", (str(circle_id),)
+            ).fetchall()
+        return dict(rows)
+
+    def high_water(self, circle_id, sdate: str) -> int:
+        """Latest game day stored for the club's month (0 when nothing is stored)."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT high_water FROM ingest_marks WHERE circle_id = ? AND month = ?", (str(circle_id), sdate[:7])
+            ).fetchone()
+        return row[0] if row else 0
+
+    def months(self, circle_id) -> list:
+        """Months ("YYYY-MM") stored for a club, oldest first."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT DISTINCT month FROM friend_history WHERE circle_id = ? ORDER BY month", (str(circle_id),)
+            ).fetchall()
+        return [r[0] for r in rows]
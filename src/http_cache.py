@@ -0,0 +1,105 @@
+import hashlib
+import json
+import os
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+
+from config.globals import next_reset
+
+DEFAULT_CACHE_DIR = os.path.join(".cache", "chrono")
+
+
+@dataclass
+class CachedResponse:
+    """A stored Chrono response. Times are UNIX epoch seconds."""
+    body: str
+    status: int
+    headers: dict = field(default_factory=dict)
+    fetched_at: float = 0.0
+    expires_at: float = 0.0
+
+    def is_fresh(self, now: float = None) -> bool:
+        return (now if now is not None else time.time()) < self.expires_at
+
+    def validators(self) -> dict:
+        """Conditional request headers for revalidating this entry, if the API sent any."""
+        out = {}
+        if self.headers.get("etag"):
+            out["If-None-Match"] = self.headers["etag"]
+        if self.headers.get("last-modified"):
+            out["If-Modified-Since"] = self.headers["last-modified"]
+        return out
+
+
+def reset_expiry(fetched_at: float) -> float:
+    """Default expiry: Chrono data only changes at the next 10:00 UTC reset."""
+    return next_reset(datetime.fromtimestamp(fetched_at, timezone.utc)).timestamp()
+
+
+class ResponseCache:
+    """Persistent on-disk cache of Chrono responses keyed by (endpoint, circle_id, sdate).
+
+    One JSON file per key holds body, status, headers (ETag/Last-Modified),
+    fetch time and expiry. Entries expire at the next reset unless the caller
+    passes a shorter TTL. Writes go through a temp file so a killed run never
+    leaves a half-written entry behind.
+    """
+
+    def __init__(self, directory: str = None):
+        self.directory = directory or DEFAULT_CACHE_DIR
+        os.makedirs(self.directory, exist_ok=True)
+
+    @classmethod
+    def from_env(cls):
+        """Cache configured via CHRONO_CACHE_DIR; None when disabled with CHRONO_CACHE=0."""
+        if os.getenv("CHRONO_CACHE", "1").strip().lower() in ("0", "false", "no", "off"):
+            return None
+        return cls(os.getenv("CHRONO_CACHE_DIR") or DEFAULT_CACHE_DIR)
+
+    def _path(self, *key) -> str:
+        digest = hashlib.sha1(json.dumps([str(k) for k in key]).encode()).hexdigest()
+        return os.path.join(self.directory, f"{key[0]}-{digest[:20]}.json")
+
+    def _read(self, path: str):
+        try:
+            with open(path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write(self, path: str, obj):
+        tmp = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(obj, f)
+            os.replace(tmp, path)
+        except OSError as e:
+            print(f"Warning: Failed to write cache entry {path}: {e}", flush=True)
+
+    def get(self, endpoint: str, circle_id, sdate: str = None) -> CachedResponse | None:
+        raw = self._read(self._path(endpoint, circle_id, sdate))
+        if not raw:
+            return None
+        try:
+            return CachedResponse(**raw)
+        except TypeError:
+            return None
+
+    def put(self, endpoint: str, circle_id, sdate: str, body: str, status: int, headers: dict = None, ttl: float = None) -> CachedResponse:
+        now = time.time()
+        expires_at = reset_expiry(now)
+        if ttl is not None:
+            expires_at = min(expires_at, now + ttl)
+        keep = {k.lower(): v for k, v in (headers or {}).items() if k.lower() in ("etag", "last-modified", "date")}
+        entry = CachedResponse(body, status, keep, now, expires_at)
+        self._write(self._path(endpoint, circle_id, sdate), entry.__dict__)
+        return entry
+
+    def get_marker(self, name: str):
+        """Small named values stored beside the responses (e.g. last exported digest)."""
+        raw = self._read(self._path("marker", name))
+        return raw.get("value") if raw else None
+
+    def set_marker(self, name: str, value):
+        self._write(self._path("marker", name), {"value": value, "updated_at": time.time()})
@@ -0,0 +1,89 @@
+import hashlib
+import json
+import os
+import threading
+import time
+
+DEFAULT_JOURNAL_DIR = os.path.join(".cache", "journal")
+
+# Per-club stages, in order: the fetched month is in the history store
+# ("stored"), then the club sheet is written ("committed").
+STAGES = ("stored", "committed")
+
+
+def content_digest(*parts) -> str:
+    """sha256 over a JSON dump of parts (non-JSON values by str())."""
+    return hashlib.sha256(json.dumps(parts, default=str, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class RunJournal:
+    """Checkpoint file for one tracker run, so a restarted run resumes where the last one stopped.
+
+    Each club's last completed stage is recorded with a content hash, and so
+    are run-wide steps such as the summary export and the sheet reorder. A run
+    is identified by its key (spreadsheet, game day and force scope). A
+    restart with the same key picks up the unfinished journal. A run that
+    completes without failures finishes the journal, and the next run starts
+    a new one.
+    """
+
+    def __init__(self, path: str, key: dict):
+        self.path = path
+        self.key = key
+        self.clubs = {}
+        self.steps = {}
+        self.resumed = False
+        self._lock = threading.Lock()
+        try:
+            with open(path, encoding="utf-8") as f:
+                saved = json.load(f)
+        except (OSError, ValueError):
+            saved = None
+        if saved and saved.get("key") == key and not saved.get("finished"):
+            self.clubs = saved.get("clubs") or {}
+            self.steps = saved.get("steps") or {}
+            self.resumed = bool(self.clubs or self.steps)
+
+    @classmethod
+    def from_env(cls, spreadsheet_id: str, game_day, force_scope=None):
+        """Journal in RUN_JOURNAL_DIR (one file per spreadsheet); None when disabled with RUN_JOURNAL=0."""
+        if os.getenv("RUN_JOURNAL", "1").strip().lower() in ("0", "false", "no", "off"):
+            return None
+        directory = os.getenv("RUN_JOURNAL_DIR") or DEFAULT_JOURNAL_DIR
+        os.makedirs(directory, exist_ok=True)
+        name = hashlib.sha1(spreadsheet_id.encode("utf-8")).hexdigest()[:16]
+        key = {"spreadsheet": spreadsheet_id, "game_day": str(game_day), "force": force_scope}
+        return cls(os.path.join(directory, f"run-{name}.json"), key)
+
+    def _save(self, finished: bool = False):
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"key": self.key, "clubs": self.clubs, "steps": self.steps,
+                           "finished": finished, "updated_at": time.time()}, f)
+            os.replace(tmp, self.path)
+        except OSError as e:
+            print(f"Warning: Failed to write run journal {self.path}: {e}", flush=True)
+
+    def stage(self, circle_id) -> str | None:
+        """Last completed stage of a club in this run."""
+        entry = self.clubs.get(str(circle_id))
+        return entry["stage"] if entry else None
+
+    def record(self, circle_id, stage: str, digest: str = None, **extra):
+        with self._lock:
+            self.clubs[str(circle_id)] = {"stage": stage, "digest": digest, "at": time.time(), **extra}
+            self._save()
+
+    def step_done(self, name: str, digest: str) -> bool:
+        """Whether a run-wide step already completed with exactly this content."""
+        return self.steps.get(name) == digest
+
+    def record_step(self, name: str, digest: str):
+        with self._lock:
+            self.steps[name] = digest
+            self._save()
+
+    def finish(self):
+        with self._lock:
+            self._save(finished=True)
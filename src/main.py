@@ -1,8 +1,9 @@
 import asyncio
+import hashlib
 import json
 import os
-import random
 import sys
+import time
 from datetime import datetime, timedelta, timezone
 
 from dotenv import load_dotenv
@@ -34,6 +35,9 @@ try:
         VERSION,
         effective_date,
         first_day_of_month,
+        game_dates,
+        last_reset,
+        latest_game_day,
     )
 except ImportError as e:
     print(f"Error: 'globals.py' not found (Base path: {base_path}). Details: {e}")
@@ -42,13 +46,29 @@ except ImportError as e:
 # Zendriver compatibility patches removed (Chrono now uses direct API)
 
 # Import Modules
-from src.processing import build_dataframe  # noqa: E402
+from src import metrics  # noqa: E402
+from src.chrono_scraper import ChronoClient, ClubPayload  # noqa: E402
+from src.daemon import ResetScheduler, run_daemon  # noqa: E402
+from src.db import close_databases, get_database  # noqa: E402
+from src.freshness import FreshnessTracker  # noqa: E402
+from src.history_store import HistoryStore  # noqa: E402
+from src.http_cache import ResponseCache  # noqa: E402
+from src.journal import RunJournal, content_digest  # noqa: E402
+from src.pg_sink import PostgresSink  # noqa: E402
+from src.pipeline import Done, Pipeline, Stage, stage_workers  # noqa: E402
+from src.processing import club_summary  # noqa: E402
+from src.sheet_metadata import metadata_cache  # noqa: E402
+from src.sheet_state import SheetStateStore  # noqa: E402
 from src.sheets import (  # noqa: E402
     export_all_club_data_to_gsheets,
+    export_spreadsheet_batched,
     export_to_gsheets,
     get_gspread_client,
     reorder_sheets,
 )
+from src.sheets_scheduler import SheetsScheduler  # noqa: E402
+from src.telemetry import annotate, span, traced_run  # noqa: E402
+from src.transform import TransformExecutor, unpack_table  # noqa: E402
 from src.utils import (  # noqa: E402
     LogColor,
     clear_screen,
@@ -56,10 +76,14 @@ from src.utils import (  # noqa: E402
     setup_windows_console,
 )
 
-# Global locks to prevent concurrent resource exhaustion
-SHEETS_LOCK = asyncio.Lock()
-# Limits concurrent Chrono API requests (per-club fetch phase). Configurable via env.
-API_SEMAPHORE = asyncio.Semaphore(int(os.getenv("API_CONCURRENCY", "3")))
+# Sheets writes: one job per worksheet at a time, independent worksheets in
+# parallel; request rate is governed by the gspread client's SheetsQuota.
+SHEETS_SCHEDULER = SheetsScheduler.from_env()
+# Last-written state of each club sheet so exports send only changed cells and
+# formats (SHEETS_INCREMENTAL=0 disables; --force always rewrites in full).
+SHEET_STATE = SheetStateStore.from_env()
+# Chrono API throughput is governed by ChronoClient's AdaptiveRateLimiter
+# (token bucket + AIMD on 429s; env API_RATE / API_RATE_MAX / API_CONCURRENCY).
 
 # Throttling logic removed (Chrono now uses direct API)
 
@@ -74,6 +98,20 @@ def _env_int(name: str, default: int) -> int:
         print(f"Warning: Invalid numeric value for {name}. Using default {default}.", flush=True)
         return default
 
+def _export_digest(cfg: dict, sdate: str, raw_data: str, join_map: dict) -> str:
+    # Fingerprint of everything that determines a club sheet's content.
+    blob = json.dumps([SHEET_ID, cfg["title"], cfg.get("club_id"), cfg["THRESHOLD"], sdate, raw_data, sorted((join_map or {}).items())])
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+def _latest_day(df) -> int:
+    # Highest "Day N" column in a club table (0 when it has none).
+    return max((int(c.split()[1]) for c in df.columns if isinstance(c, str) and c.startswith("Day ")), default=0)
+
+def _summary_digest(summary: tuple) -> str:
+    # Fingerprint of the All Club Data content: month plus every club's summary rows.
+    clubs, sdate = summary
+    return content_digest(SHEET_ID, sdate, [(c["short_name"], c["grade"], c["rank"], c["members"].to_csv()) for c in clubs])
+
 # JSON saving removed (Now syncs directly to Google Sheets)
 # Helper Functions
 
@@ -141,363 +179,380 @@ def pick_club() -> dict | str:
     return "ALL"
 
 # Main Execution
-async def process_club_workflow(
-    cfg: dict,
-    gc_client,
-    retry_delay: int,
-    max_attempts: int,
-    per_club_timeout_seconds: int,
-) -> tuple | None:
-    # Handles the retry loop and processing for a single club.
+# A club run flows through three pipeline stages (see src/pipeline.py):
+# fetch_club (Chrono API) -> transform_club (parse + DataFrame) -> commit_club
+# (sheet write). Each stage takes and returns the club's run dict:
+# {"cfg", "sdate", "fallback_attempted"} plus what earlier stages added.
+# A run with "held" set (why the club needs no update) is only rebuilt for the
+# summary sheet; its own sheet is left alone. "resume" rebuilds a club a
+# restarted run already fetched from the history store; "force" rewrites it in
+# full from a fresh fetch.
+
+def new_club_run(cfg: dict, held: str = None, resume: bool = False, force: bool = False) -> dict:
+    run = {"cfg": cfg, "sdate": cfg.get("sdate") or first_day_of_month, "fallback_attempted": False}
+    if held:
+        run["held"] = held
+    if resume:
+        run["resume"] = True
+    if force:
+        run["force"] = True
+    return run
+
+
+def parse_force(argv: list) -> tuple:
+    """(force_all, clubs) from --force or --force=<circle id or title>[,...]."""
+    force_all = "--force" in argv
+    clubs = set()
+    for arg in argv:
+        if arg.startswith("--force="):
+            clubs.update(name.strip().lower() for name in arg.split("=", 1)[1].split(",") if name.strip())
+    return force_all, frozenset(clubs)
+
+
+def _previous_month(sdate: str) -> str:
+    curr_dt = datetime.strptime(sdate, "%Y-%m-%d")
+    prev_month_date = curr_dt.replace(day=1) - timedelta(days=1)
+    return prev_month_date.replace(day=1).strftime("%Y-%m-%d")
+
+
+async def fetch_club(run: dict, chrono: ChronoClient, per_club_timeout_seconds: int) -> dict | Done:
+    # Fetch one club's month. Raises on anything retryable; the fetch stage
+    # retries it. Falls back to the previous month early in a month when the
+    # current one has no history yet.
+    cfg = run["cfg"]
     title = cfg["title"]
-    attempt = 0
-    sdate = cfg.get("sdate") or first_day_of_month
-    fallback_attempted = False
-    
-    while attempt < max_attempts:
+    sdate = run["sdate"]
+    cfg_to_use = cfg.copy()
+    cfg_to_use["sdate"] = sdate
+    cfg_to_use["force"] = run.get("force", False)
+
+    # History and join map are fetched together in one round trip; see
+    # ChronoClient.fetch_club_payload. Pacing is the rate limiter's job.
+    payload = await asyncio.wait_for(
+        chrono.fetch_club_payload(cfg_to_use),
+        timeout=per_club_timeout_seconds
+    )
+    raw_data, status_code = payload.raw, payload.status
+
+    if status_code == 429:
+        # The limiter has already backed off and paused the bucket;
+        # the retry below is admitted once it allows traffic again.
+        raise Exception("Rate limited")
+
+    # Early-month fallback: only when the API responded 200 but the
+    # current month's history is not populated yet. Any non-200 is a
+    # retryable failure, NOT a signal to reuse last month's data.
+    is_early_month = effective_date.day <= 3
+
+    # Decoding is the transform stage's job; it is only done here when the
+    # fallback decision needs it.
+    data = None
+    if not run["fallback_attempted"] and is_early_month and status_code == 200 and raw_data:
         try:
-            from src.chrono_scraper import scrape_club_data
-            
-            cfg_to_use = cfg.copy()
-            cfg_to_use["sdate"] = sdate
-            
-            async with API_SEMAPHORE:
-                raw_data, status_code = await asyncio.wait_for(
-                    scrape_club_data(cfg_to_use),
-                    timeout=per_club_timeout_seconds
-                )
-            await asyncio.sleep(2.5)
-            
-            if status_code == 429:
-                prefix = colorize("[Rate Limit]", LogColor.RETRY)
-                print(f"  {prefix} {title}: 429 hit. Cool-down 30s...", flush=True)
-                await asyncio.sleep(30)
-                raise Exception("Rate limited")
-            
-            # Early-month fallback: only when the API responded 200 but the
-            # current month's history is not populated yet. Any non-200 is a
-            # retryable failure, NOT a signal to reuse last month's data.
-            is_early_month = effective_date.day <= 3
-            
-            data = None
-            if status_code == 200 and raw_data:
-                try:
-                    data = json.loads(raw_data)
-                except (json.JSONDecodeError, ValueError) as je:
-                    print(f"  [Parse Error] {title}: Invalid JSON from API (Status 200): {je}", flush=True)
-            
-            has_no_data = isinstance(data, dict) and not data.get("club_friend_history")
-            if not fallback_attempted and is_early_month and status_code == 200 and has_no_data:
-                try:
-                    curr_dt = datetime.strptime(sdate, "%Y-%m-%d")
-                    prev_month_date = curr_dt.replace(day=1) - timedelta(days=1)
-                    prev_month_first_day = prev_month_date.replace(day=1).strftime("%Y-%m-%d")
-                    
-                    print(f"  [Fallback] {title}: Early month detected ({effective_date.strftime('%Y-%m-%d')}) and current month has no data yet. Falling back to previous month ({prev_month_first_day})...", flush=True)
-                    sdate = prev_month_first_day
-                    fallback_attempted = True
-                    attempt = 0
-                    continue
-                except Exception as fe:
-                    print(f"  [Fallback Error] Failed to calculate fallback date: {fe}", flush=True)
-
-            if status_code != 200 or not raw_data:
-                raise Exception(f"API fetch failed (Status {status_code})")
-            if data is None:
-                raise Exception("API returned invalid/unparseable JSON")
-            if not isinstance(data, dict):
-                raise Exception(f"API returned unexpected payload type: {type(data).__name__}")
-            if data.get("detail") == "Error":
-                raise Exception("API returned data error")
-
-            if not data.get("club_friend_history"):
-                prefix = colorize("[No Data]", LogColor.RETRY)
-                print(f"  {prefix} {title}: No history data available in API yet. Skipping sheet update.", flush=True)
-                return NO_DATA
-
-            # Phase 2: Export to Sheets with 429 Retry logic
-            # Join-map is best-effort: a fetch failure only disables pre-join graying
-            # for this club, it must not force a retry of the main data.
-            join_map = {}
-            try:
-                from src.chrono_scraper import scrape_club_join_map
-                async with API_SEMAPHORE:
-                    join_map = await asyncio.wait_for(
-                        scrape_club_join_map(cfg_to_use),
-                        timeout=per_club_timeout_seconds
-                    )
-            except Exception as e:
-                print(f"  [Join Map] {title}: fetch failed ({e}). Continuing without pre-join graying.", flush=True)
-            df = build_dataframe(data, join_map, sdate)
-
-            # --- Temp sheet retired (was days 22-31 filter + separate export) ---
-            # # Filter data for temp sheet (days 22 to 31)
-            # import copy
-            # temp_data = copy.deepcopy(data)
-            # if "club_friend_history" in temp_data:
-            #     temp_data["club_friend_history"] = [
-            #         x for x in temp_data["club_friend_history"]
-            #         if x.get("actual_date") is not None and 22 <= int(x.get("actual_date")) <= 31
-            #     ]
-            # if "club_daily_history" in temp_data:
-            #     temp_data["club_daily_history"] = [
-            #         x for x in temp_data["club_daily_history"]
-            #         if x.get("actual_date") is not None and 22 <= int(x.get("actual_date")) <= 31
-            #     ]
-            # temp_df = build_dataframe(temp_data)
-
-            async with SHEETS_LOCK:
-                loop = asyncio.get_running_loop()
-                
-                # 1. Update normal sheet
-                try:
-                    await loop.run_in_executor(
-                        None, 
-                        export_to_gsheets, 
-                        gc_client, df, SHEET_ID, cfg['title'], cfg["THRESHOLD"],
-                        data.get("club_daily_history"), cfg.get("club_id")
-                    )
-                except Exception as e:
-                    if "429" in str(e) or "500" in str(e):
-                        prefix = colorize("[Quota/Server]", LogColor.RETRY)
-                        print(f"  {prefix} {title}: Error ({e}). Waiting 30s for reset...", flush=True)
-                        await asyncio.sleep(30) 
-                        await loop.run_in_executor(
-                            None, 
-                            export_to_gsheets, 
-                            gc_client, df, SHEET_ID, cfg['title'], cfg["THRESHOLD"],
-                            data.get("club_daily_history"), cfg.get("club_id")
-                        )
-                    else:
-                        raise e
-                await asyncio.sleep(3.0)
-
-                # 2. Update temp sheet (retired)
-                # try:
-                #     await loop.run_in_executor(
-                #         None, 
-                #         export_to_gsheets, 
-                #         gc_client, temp_df, TEMP_SHEET_ID, cfg['title'], cfg["THRESHOLD"],
-                #         temp_data.get("club_daily_history"), cfg.get("club_id")
-                #     )
-                # except Exception as e:
-                #     if "429" in str(e) or "500" in str(e):
-                #         prefix = colorize("[Quota/Server]", LogColor.RETRY)
-                #         print(f"  {prefix} {title} (Temp): Error ({e}). Waiting 30s for reset...", flush=True)
-                #         await asyncio.sleep(30) 
-                #         await loop.run_in_executor(
-                #             None, 
-                #             export_to_gsheets, 
-                #             gc_client, temp_df, TEMP_SHEET_ID, cfg['title'], cfg["THRESHOLD"],
-                #             temp_data.get("club_daily_history"), cfg.get("club_id")
-                #         )
-                #     else:
-                #         raise e
-                # Cooldown to respect Google Sheets write quota limit
-                await asyncio.sleep(3.0)
-            
-            prefix = colorize("[Success]", LogColor.SUCCESS)
-            print(f"  {prefix} {title}", flush=True)
-            
-            # Extract data for summary sheet
-            day_cols = [c for c in df.columns if isinstance(c, str) and c.startswith("Day ")]
-            member_data = []
-            for _, row in df.iterrows():
-                perf = row[day_cols].sum() if day_cols else 0.0
-                member_data.append({
-                    "member_name": row["Member_Name"],
-                    "avg_day": row["AVG/d"],
-                    "performance": perf
-                })
-
-            # Extract data for temp summary sheet (retired)
-            # temp_day_cols = [c for c in temp_df.columns if isinstance(c, str) and c.startswith("Day ")]
-            # temp_member_data = []
-            # for _, row in temp_df.iterrows():
-            #     temp_perf = row[temp_day_cols].sum() if temp_day_cols else 0.0
-            #     temp_member_data.append({
-            #         "member_name": row["Member_Name"],
-            #         "avg_day": row["AVG/d"],
-            #         "performance": temp_perf
-            #     })
-                
-            if "(" in title and ")" in title:
-                short_name = title.split("(")[0].strip()
-                grade = title.split("(")[1].split(")")[0].strip()
-            else:
-                short_name = title
-                grade = ""
-                
-            rank = ""
-            daily_history = data.get("club_daily_history") or []
-            if daily_history:
-                try:
-                    latest_entry = max(daily_history, key=lambda x: int(x.get("actual_date", 0)))
-                    rank_val = latest_entry.get("rank")
-                    if rank_val is not None:
-                        rank = f"#{rank_val}"
-                except Exception:
-                    rank_val = daily_history[-1].get("rank")
-                    if rank_val is not None:
-                        rank = f"#{rank_val}"
-
-            # temp_rank = ""  # temp sheet retired
-            # temp_daily_history = temp_data.get("club_daily_history") or []
-            # if temp_daily_history:
-            #     try:
-            #         latest_entry = max(temp_daily_history, key=lambda x: int(x.get("actual_date", 0)))
-            #         rank_val = latest_entry.get("rank")
-            #         if rank_val is not None:
-            #             temp_rank = f"#{rank_val}"
-            #     except Exception:
-            #         rank_val = temp_daily_history[-1].get("rank")
-            #         if rank_val is not None:
-            #             temp_rank = f"#{rank_val}"
-                        
-            club_metadata = {
-                "short_name": short_name,
-                "grade": grade,
-                "rank": rank,
-                "members": member_data
-            }
-
-            # temp_club_metadata = {
-            #     "short_name": short_name,
-            #     "grade": grade,
-            #     "rank": temp_rank,
-            #     "members": temp_member_data
-            # }
-            return club_metadata, sdate
-            
+            data = json.loads(raw_data)
+        except (json.JSONDecodeError, ValueError) as je:
+            print(f"  [Parse Error] {title}: Invalid JSON from API (Status 200): {je}", flush=True)
+
+    has_no_data = isinstance(data, dict) and not data.get("club_friend_history")
+    if not run["fallback_attempted"] and is_early_month and status_code == 200 and has_no_data:
+        try:
+            prev_month_first_day = _previous_month(sdate)
+
+            print(f"  [Fallback] {title}: Early month detected ({effective_date.strftime('%Y-%m-%d')}) and current month has no data yet. Falling back to previous month ({prev_month_first_day})...", flush=True)
+            # Retries after this point stay on the previous month.
+            run["sdate"] = prev_month_first_day
+            run["fallback_attempted"] = True
+            return await fetch_club(run, chrono, per_club_timeout_seconds)
+        except Exception as fe:
+            if run["fallback_attempted"]:
+                raise
+            print(f"  [Fallback Error] Failed to calculate fallback date: {fe}", flush=True)
+
+    if status_code != 200 or not raw_data:
+        raise Exception(f"API fetch failed (Status {status_code})")
+
+    run["payload"] = payload
+    return run
+
+
+def _load_stored(run: dict, history: HistoryStore) -> bool:
+    # Set the run's payload from the local history store; False if the month is not stored.
+    cfg = run["cfg"]
+    month = history.month_payload(cfg.get("club_id"), run["sdate"])
+    if month is None and effective_date.day <= 3 and not run["fallback_attempted"]:
+        prev_month_first_day = _previous_month(run["sdate"])
+        month = history.month_payload(cfg.get("club_id"), prev_month_first_day)
+        if month is not None:
+            run["sdate"] = prev_month_first_day
+            run["fallback_attempted"] = True
+            print(f"  [Fallback] {cfg['title']}: Current month not in history store. Falling back to previous month ({prev_month_first_day})...", flush=True)
+    if month is None:
+        return False
+    # Treated like a disk-cache hit: the sheet is only rewritten if the stored
+    # month differs from what was last exported (or with --force).
+    run["payload"] = ClubPayload(json.dumps(month), 200, history.join_map(cfg.get("club_id")), from_cache=True)
+    run["from_store"] = True
+    return True
+
+
+async def load_club(run: dict, history: HistoryStore) -> dict | Done:
+    # --from-store replacement for fetch_club: the month comes from the local
+    # history store, so rebuilding and re-exporting costs no API calls.
+    if not _load_stored(run, history):
+        prefix = colorize("[No Data]", LogColor.RETRY)
+        print(f"  {prefix} {run['cfg']['title']}: Month not in history store. Skipping sheet update.", flush=True)
+        return Done(NO_DATA)
+    return run
+
+
+async def reload_club(run: dict, history: HistoryStore, chrono: ChronoClient, per_club_timeout_seconds: int) -> dict | Done:
+    # Fetch stage for a held or resumed club: the month comes from the history
+    # store, or from a (normally disk-cached) fetch when it is not stored.
+    if history is not None and _load_stored(run, history):
+        return run
+    return await fetch_club(run, chrono, per_club_timeout_seconds)
+
+
+async def transform_club(
+    run: dict,
+    executor: TransformExecutor,
+    cache: ResponseCache = None,
+    force_export: bool = False,
+    history: HistoryStore = None,
+    sink: PostgresSink = None,
+    journal: RunJournal = None,
+) -> dict | Done:
+    # Decode the payload and build the club DataFrame (in the transform
+    # executor), then its summary rows and (unless the sheet is already
+    # current) the export job for the commit stage.
+    cfg = run["cfg"]
+    title = cfg["title"]
+    sdate = run["sdate"]
+    payload = run.pop("payload")
+    force_export = force_export or run.get("force", False)
+
+    # Join-map is best-effort: a fetch failure only disables pre-join graying
+    # for this club, it must not force a retry of the main data.
+    result = await executor.run(payload.raw, payload.join_map, sdate)
+    if result["status"] == "no_data":
+        prefix = colorize("[No Data]", LogColor.RETRY)
+        print(f"  {prefix} {title}: No history data available in API yet. Skipping sheet update.", flush=True)
+        return Done(NO_DATA)
+    if result["status"] != "ok":
+        raise Exception(result["error"])
+    df = unpack_table(result["table"])
+    metrics.BUILD_DATAFRAME_SECONDS.observe(result["build_seconds"])
+    metrics.ROWS_PROCESSED.inc(len(df))
+
+    # Merge the fetched month into the local history store. Chrono only serves
+    # whole months, so the store works out what is actually new: days past the
+    # club's high-water mark, and earlier days Chrono revised (interpolated
+    # gains can change after the fact).
+    delta = None
+    if history is not None and not run.get("from_store"):
+        try:
+            delta = await asyncio.to_thread(history.save_raw, cfg.get("club_id"), sdate, payload.raw, payload.join_map)
         except Exception as e:
-            import traceback
-            traceback.print_exc()
-            attempt_no = attempt + 1
-            prefix = colorize("[Error]", LogColor.ERROR)
-            print(f"  {prefix} on {title} (Attempt {attempt_no}): {e}", flush=True)
-
-            attempt += 1
-            if attempt >= max_attempts:
-                return None
-
-            delay = retry_delay + random.uniform(1, 4)
-            prefix = colorize("[Retry]", LogColor.RETRY)
-            print(f"  {prefix} {title}: sleeping {delay:.1f}s before attempt {attempt + 1}...", flush=True)
-            await asyncio.sleep(delay)
-
-async def fetch_db_active_clubs(database_url: str, check_date, guild_id: str = None) -> list:
+            print(f"Warning: Failed to save {title} to the history store: {e}", flush=True)
+    if delta is not None and journal is not None:
+        # A restart can rebuild this club from the store instead of refetching it.
+        journal.record(cfg.get("club_id"), "stored", content_digest(payload.raw), sdate=sdate)
+    if sink is not None and not run.get("held"):
+        sink.add_club(cfg.get("club_id"), sdate, df, result["club_daily_history"])
+    if delta is not None and (delta.new_days or delta.revised_days):
+        prefix = colorize("[Ingest]", LogColor.API)
+        parts = [f"high-water day {delta.high_water_before} -> {delta.high_water}"]
+        if len(delta.new_days) > 3:
+            parts.append(f"new days {delta.new_days[0]}-{delta.new_days[-1]}")
+        elif delta.new_days:
+            parts.append(f"new day(s) {', '.join(map(str, delta.new_days))}")
+        if delta.revised_days:
+            parts.append(colorize(f"revised day(s) {', '.join(map(str, delta.revised_days))}", LogColor.RETRY))
+        print(f"  {prefix} {title}: {'; '.join(parts)}", flush=True)
+
+    # --- Temp sheet retired (was days 22-31 filter + separate export) ---
+    # # Filter data for temp sheet (days 22 to 31)
+    # import copy
+    # temp_data = copy.deepcopy(data)
+    # if "club_friend_history" in temp_data:
+    #     temp_data["club_friend_history"] = [
+    #         x for x in temp_data["club_friend_history"]
+    #         if x.get("actual_date") is not None and 22 <= int(x.get("actual_date")) <= 31
+    #     ]
+    # if "club_daily_history" in temp_data:
+    #     temp_data["club_daily_history"] = [
+    #         x for x in temp_data["club_daily_history"]
+    #         if x.get("actual_date") is not None and 22 <= int(x.get("actual_date")) <= 31
+    #     ]
+    # temp_df = build_dataframe(temp_data)
+
+    # Sheet stage is skippable when the payload came straight from the disk
+    # cache (or matched the history store row for row) and the sheet was last
+    # written from exactly this content. Otherwise the sheet writer's diff
+    # re-emits only the cells the new or revised days touched.
+    export_digest = _export_digest(cfg, sdate, payload.raw, payload.join_map)
+    export_marker = f"export:{SHEET_ID}:{title}"
+    run["export_job"] = None
+    unchanged = payload.from_cache or (delta is not None and delta.unchanged)
+    if run.get("held"):
+        prefix = colorize("[Held]", LogColor.BATCH)
+        print(f"  {prefix} {title}: {run['held']}. Skipping sheet update.", flush=True)
+    elif (unchanged and not force_export and cache is not None
+            and cache.get_marker(export_marker) == export_digest):
+        prefix = colorize("[Cached]", LogColor.BATCH)
+        print(f"  {prefix} {title}: Unchanged since last export. Skipping sheet update.", flush=True)
+    else:
+        run["export_job"] = {
+            "title": title,
+            "df": df,
+            "threshold": cfg["THRESHOLD"],
+            "club_daily_history": result["club_daily_history"],
+            "circle_id": cfg.get("club_id"),
+            "marker": export_marker,
+            "digest": export_digest,
+        }
+
+    # Extract data for summary sheet
+    member_data = club_summary(df)
+
+    # Extract data for temp summary sheet (retired)
+    # temp_day_cols = [c for c in temp_df.columns if isinstance(c, str) and c.startswith("Day ")]
+    # temp_member_data = []
+    # for _, row in temp_df.iterrows():
+    #     temp_perf = row[temp_day_cols].sum() if temp_day_cols else 0.0
+    #     temp_member_data.append({
+    #         "member_name": row["Member_Name"],
+    #         "avg_day": row["AVG/d"],
+    #         "performance": temp_perf
+    #     })
+        
+    if "(" in title and ")" in title:
+        short_name = title.split("(")[0].strip()
+        grade = title.split("(")[1].split(")")[0].strip()
+    else:
+        short_name = title
+        grade = ""
+        
+    rank = ""
+    daily_history = result["club_daily_history"] or []
+    if daily_history:
+        try:
+            latest_entry = max(daily_history, key=lambda x: int(x.get("actual_date", 0)))
+            rank_val = latest_entry.get("rank")
+            if rank_val is not None:
+                rank = f"#{rank_val}"
+        except Exception:
+            rank_val = daily_history[-1].get("rank")
+            if rank_val is not None:
+                rank = f"#{rank_val}"
+
+    # temp_rank = ""  # temp sheet retired
+    # temp_daily_history = temp_data.get("club_daily_history") or []
+    # if temp_daily_history:
+    #     try:
+    #         latest_entry = max(temp_daily_history, key=lambda x: int(x.get("actual_date", 0)))
+    #         rank_val = latest_entry.get("rank")
+    #         if rank_val is not None:
+    #             temp_rank = f"#{rank_val}"
+    #     except Exception:
+    #         rank_val = temp_daily_history[-1].get("rank")
+    #         if rank_val is not None:
+    #             temp_rank = f"#{rank_val}"
+                
+    club_metadata = {
+        "short_name": short_name,
+        "grade": grade,
+        "rank": rank,
+        "members": member_data
+    }
+
+    # temp_club_metadata = {
+    #     "short_name": short_name,
+    #     "grade": grade,
+    #     "rank": temp_rank,
+    #     "members": temp_member_data
+    # }
+    run["club_metadata"] = club_metadata
+    run["latest_day"] = _latest_day(df)
+    return run
+
+
+async def commit_club(run: dict, gc_client, cache: ResponseCache = None, force_export: bool = False, defer_export: bool = False, journal: RunJournal = None) -> tuple:
+    # Write the club sheet. With defer_export the write is not performed here;
+    # the export job is returned as a third tuple element for one batched
+    # commit in main().
+    cfg = run["cfg"]
+    title = cfg["title"]
+    export_job = run["export_job"]
+    force_export = force_export or run.get("force", False)
+    if export_job is not None and defer_export:
+        export_job["incremental"] = not force_export
+    if export_job is not None and not defer_export:
+        # 429/5xx are retried with backoff inside the quota-aware client.
+        await SHEETS_SCHEDULER.run(
+            title,
+            export_to_gsheets,
+            gc_client, export_job["df"], SHEET_ID, title, export_job["threshold"],
+            export_job["club_daily_history"], export_job["circle_id"],
+            SHEET_STATE, not force_export
+        )
+
+        # 2. Update temp sheet (retired)
+        # await SHEETS_SCHEDULER.run(
+        #     f"temp:{cfg['title']}",
+        #     export_to_gsheets,
+        #     gc_client, temp_df, TEMP_SHEET_ID, cfg['title'], cfg["THRESHOLD"],
+        #     temp_data.get("club_daily_history"), cfg.get("club_id")
+        # )
+        if cache is not None:
+            cache.set_marker(export_job["marker"], export_job["digest"])
+    if journal is not None and not defer_export and not run.get("held"):
+        journal.record(cfg.get("club_id"), "committed", export_job and export_job["digest"], sdate=run["sdate"])
+
+    prefix = colorize("[Success]", LogColor.SUCCESS)
+    print(f"  {prefix} {title}", flush=True)
+    if defer_export:
+        return run["club_metadata"], run["sdate"], export_job
+    return run["club_metadata"], run["sdate"]
+
+
+async def fetch_db_active_clubs(database_url: str, check_date, guild_id: str = None, use_cache: bool = True) -> list:
     """
     Fetch active clubs and their daily quotas from the database for the given date.
     
     Intent:
         Retrieve circle ID, name, and current daily quota for all active clubs in the database.
+        Served from the per-game-day cache when possible (see src/db.py).
     """
-    import asyncpg
-    conn = None
     try:
-        # SSH-tunneled databases can refuse the very first connection attempt;
-        # retry transient network errors (ConnectionRefusedError subclasses OSError).
-        last_err = None
-        for attempt in range(3):
-            try:
-                conn = await asyncpg.connect(database_url)
-                break
-            except OSError as e:
-                last_err = e
-                print(f"  [Retry] DB connect refused (attempt {attempt + 1}/3): {e}", flush=True)
-                await asyncio.sleep(1 + attempt * 2)
-        if conn is None:
-            raise last_err
-        if guild_id:
-            query = """
-                SELECT c.circle_id, c.club_name, c.quota_period,
-                       COALESCE(
-                           (SELECT daily_quota FROM quota_requirements qr 
-                            WHERE qr.club_id = c.club_id AND qr.effective_date <= $1 
-                            ORDER BY qr.effective_date DESC LIMIT 1),
-                           c.daily_quota
-                       ) as quota
-                FROM clubs c
-                WHERE c.circle_id IS NOT NULL 
-                  AND c.is_active = TRUE 
-                  AND c.guild_id = $2
-            """
-            rows = await conn.fetch(query, check_date, int(guild_id))
-        else:
-            query = """
-                SELECT c.circle_id, c.club_name, c.quota_period,
-                       COALESCE(
-                           (SELECT daily_quota FROM quota_requirements qr 
-                            WHERE qr.club_id = c.club_id AND qr.effective_date <= $1 
-                            ORDER BY qr.effective_date DESC LIMIT 1),
-                           c.daily_quota
-                       ) as quota
-                FROM clubs c
-                WHERE c.circle_id IS NOT NULL AND c.is_active = TRUE
-            """
-            rows = await conn.fetch(query, check_date)
-        return [dict(row) for row in rows]
+        return await get_database(database_url).active_clubs(check_date, guild_id, use_cache)
     except Exception as e:
         print(f"Error: Failed to fetch active clubs from database: {e}.", flush=True)
         raise e
-    finally:
-        if conn:
-            await conn.close()
 
 
-async def export_summary_with_retry(gc_client, spreadsheet_id: str, all_clubs_data: list, sdate: str, label: str, max_attempts: int = 3) -> bool:
-    """Exports the summary sheet, retrying with a 30s cool-down on 429/500."""
-    loop = asyncio.get_running_loop()
-    for attempt in range(max_attempts):
-        try:
-            await loop.run_in_executor(None, export_all_club_data_to_gsheets, gc_client, spreadsheet_id, all_clubs_data, sdate)
-            return True
-        except Exception as e:
-            if "429" in str(e) or "500" in str(e):
-                print(f"  [Quota/Server] {label} summary: Error ({e}). Waiting 30s for reset...", flush=True)
-                await asyncio.sleep(30)
-            else:
-                print(f"Warning: Failed to update {label} summary sheet: {e}", flush=True)
-                return False
-    print(f"Warning: Failed to update {label} summary sheet after retries.", flush=True)
-    return False
-
-
-async def reorder_sheets_with_retry(gc_client, spreadsheet_id: str, ordered_titles: list, label: str, max_attempts: int = 3) -> bool:
-    """Reorders sheets, retrying with escalating cool-downs on 429/500."""
-    loop = asyncio.get_running_loop()
-    for attempt in range(max_attempts):
-        try:
-            await loop.run_in_executor(None, reorder_sheets, gc_client, spreadsheet_id, ordered_titles)
-            return True
-        except Exception as e:
-            if "429" in str(e) or "500" in str(e):
-                wait = 30 * (attempt + 1)
-                print(f"  [Quota] {label} Reordering hit limit ({e}). Waiting {wait}s...", flush=True)
-                await asyncio.sleep(wait)
-            else:
-                print(f"Warning: Failed to reorder {label} sheets: {e}", flush=True)
-                return False
-    print(f"Warning: Failed to reorder {label} sheets after retries.", flush=True)
-    return False
+async def export_summary_with_retry(gc_client, spreadsheet_id: str, all_clubs_data: list, sdate: str, label: str) -> bool:
+    """Exports the summary sheet; 429/500 back-off happens inside the quota-aware client."""
+    try:
+        await SHEETS_SCHEDULER.run("All Club Data", export_all_club_data_to_gsheets, gc_client, spreadsheet_id, all_clubs_data, sdate)
+        return True
+    except Exception as e:
+        print(f"Warning: Failed to update {label} summary sheet: {e}", flush=True)
+        return False
 
 
-async def main():
-    setup_windows_console(VERSION)
-    is_cron = "--cron" in sys.argv
-    
-    # Startup
-    if not is_cron:
-        print(f"Starting Endless v{VERSION}...", flush=True)
+async def reorder_sheets_with_retry(gc_client, spreadsheet_id: str, ordered_titles: list, label: str) -> bool:
+    """Reorders sheets; 429/500 back-off happens inside the quota-aware client."""
+    try:
+        await SHEETS_SCHEDULER.run(None, reorder_sheets, gc_client, spreadsheet_id, ordered_titles)
+        return True
+    except Exception as e:
+        print(f"Warning: Failed to reorder {label} sheets: {e}", flush=True)
+        return False
 
-    # Initialize Google Sheets Client
-    GC = get_gspread_client(base_path)
 
-    if not SHEET_ID:
-        print("Error: SHEET_ID must be configured (via .env or config/globals.py).", flush=True)
-        sys.exit(1)
-    
-    # Load dynamic quotas and active clubs from UmaCore PostgreSQL database
+def resolve_database_url() -> str | None:
+    # DATABASE_URL, else the one in a sibling UmaCore checkout's .env.
     database_url = os.getenv("DATABASE_URL")
     if not database_url:
         umacore_env_path = os.path.abspath(os.path.join(base_path, "..", "UmaCore", ".env"))
@@ -508,14 +563,58 @@ async def main():
                 database_url = env_vals.get("DATABASE_URL")
             except Exception:
                 pass
+    return database_url
 
-    if not database_url:
-        print("Error: DATABASE_URL must be configured. Database connectivity is required.", flush=True)
-        sys.exit(1)
+
+def lagging_clubs(runs: list, outcomes: list) -> list:
+    """Titles of clubs whose sheet does not have the latest published game day yet."""
+    target = latest_game_day()
+    target_month = target.strftime("%Y-%m")
+    lagging = []
+    for run, outcome in zip(runs, outcomes):
+        if outcome is None or outcome == NO_DATA:
+            lagging.append(run["cfg"]["title"])
+            continue
+        month = run["sdate"][:7]
+        if month < target_month or (month == target_month and run.get("latest_day", 0) < target.day):
+            lagging.append(run["cfg"]["title"])
+    return lagging
+
+
+@traced_run("tracker.run")
+async def run_once(
+    GC,
+    chrono: ChronoClient,
+    database_url: str,
+    response_cache: ResponseCache = None,
+    history: HistoryStore = None,
+    is_cron: bool = False,
+    force_run: bool = False,
+    freshness: FreshnessTracker = None,
+    force_clubs: frozenset = frozenset(),
+) -> list:
+    """One tracker run over the shared clients; returns the titles of clubs still behind.
+
+    force_run forces every club; force_clubs (circle ids or lowercased titles)
+    only those clubs. Each run writes a telemetry report (see src/telemetry.py).
+    """
+    run_started = time.monotonic()
+    # The game day moves on between runs of a resident process.
+    global effective_date, first_day_of_month
+    effective_date, first_day_of_month = game_dates()
+    # Same-game-day re-runs are served from the disk cache (bypassed by --force).
+    chrono.use_fresh_cache = not force_run
+    chrono.reset_stats()
+    if history is not None:
+        history.changes = 0
+    # Sheets may have been edited since the last run; reload metadata on first use.
+    metadata_cache(GC, SHEET_ID).invalidate()
 
     try:
         from config.globals import SERVER_ID
-        db_clubs = await fetch_db_active_clubs(database_url, effective_date.date(), SERVER_ID)
+        # --force also bypasses the game-day cache of the club list.
+        with span("db.load_clubs"):
+            db_clubs = await fetch_db_active_clubs(database_url, effective_date.date(), SERVER_ID, use_cache=not force_run)
     except Exception as e:
         print(f"Fatal error: Database connection or query failed: {e}. Exiting.", flush=True)
         sys.exit(1)
@@ -574,68 +673,69 @@ async def main():
     # Rename sheets based on stored circle_id (CID) if name changed, then delete stale worksheets
     cid_to_active_cfg = {cfg['club_id']: cfg for cfg in CLUBS.values()}
     
-    try:
-        ss = GC.open_by_key(SHEET_ID)
-        all_worksheets = ss.worksheets()
-        ws_by_id = {ws.id: ws for ws in all_worksheets}
+    with span("sheets.cid_scan"):
+        try:
+            ss = metadata_cache(GC, SHEET_ID).spreadsheet
+            all_worksheets = ss.worksheets()
+            ws_by_id = {ws.id: ws for ws in all_worksheets}
         
-        # Read CID for each sheet to discover renames
-        # Read CID for each sheet to discover renames via a single batchGet call
-        sheet_to_cid = {}
-        print("Scanning worksheet IDs to check for name changes...", flush=True)
-        scan_sheets = [ws for ws in all_worksheets if ws.title != "All Club Data"]
-        if scan_sheets:
-            ranges = [f"'{ws.title}'!A1:A" for ws in scan_sheets]
-            try:
-                batch_resp = ss.values_batch_get(ranges)
-                title_to_ws = {ws.title: ws for ws in scan_sheets}
-                for vr in batch_resp.get("valueRanges", []):
-                    sheet_name = vr.get("range", "").split("!")[0].strip("'")
-                    ws = title_to_ws.get(sheet_name)
-                    if ws is None:
-                        continue
-                    col_a = [row[0] for row in vr.get("values", []) if row]
-                    for val in col_a:
-                        if val and str(val).startswith("CID:"):
-                            cid = str(val).split("CID:")[1].strip()
-                            sheet_to_cid[ws.id] = cid
-                            break
-            except Exception as ex:
-                print(f"Warning: Failed to batch-read worksheet CIDs: {ex}", flush=True)
-            
-        # Process renames
-        for ws_id, cid in sheet_to_cid.items():
-            ws = ws_by_id.get(ws_id)
-            if ws is None or cid not in cid_to_active_cfg:
-                continue
-            target_title = cid_to_active_cfg[cid]['title']
-            if ws.title != target_title:
-                print(f"Renaming worksheet '{ws.title}' to '{target_title}' (Circle ID: {cid})...", flush=True)
+            # Read CID for each sheet to discover renames
+            # Read CID for each sheet to discover renames via a single batchGet call
+            sheet_to_cid = {}
+            print("Scanning worksheet IDs to check for name changes...", flush=True)
+            scan_sheets = [ws for ws in all_worksheets if ws.title != "All Club Data"]
+            if scan_sheets:
+                ranges = [f"'{ws.title}'!A1:A" for ws in scan_sheets]
                 try:
-                    ws.update_title(target_title)
-                    print(f"Successfully renamed worksheet to '{target_title}'.", flush=True)
-                    ws.title = target_title
+                    batch_resp = ss.values_batch_get(ranges)
+                    title_to_ws = {ws.title: ws for ws in scan_sheets}
+                    for vr in batch_resp.get("valueRanges", []):
+                        sheet_name = vr.get("range", "").split("!")[0].strip("'")
+                        ws = title_to_ws.get(sheet_name)
+                        if ws is None:
+                            continue
+                        col_a = [row[0] for row in vr.get("values", []) if row]
+                        for val in col_a:
+                            if val and str(val).startswith("CID:"):
+                                cid = str(val).split("CID:")[1].strip()
+                                sheet_to_cid[ws.id] = cid
+                                break
                 except Exception as ex:
-                    print(f"Warning: Failed to rename worksheet '{ws.title}' to '{target_title}': {ex}", flush=True)
+                    print(f"Warning: Failed to batch-read worksheet CIDs: {ex}", flush=True)
+            
+            # Process renames
+            for ws_id, cid in sheet_to_cid.items():
+                ws = ws_by_id.get(ws_id)
+                if ws is None or cid not in cid_to_active_cfg:
+                    continue
+                target_title = cid_to_active_cfg[cid]['title']
+                if ws.title != target_title:
+                    print(f"Renaming worksheet '{ws.title}' to '{target_title}' (Circle ID: {cid})...", flush=True)
+                    try:
+                        ws.update_title(target_title)
+                        print(f"Successfully renamed worksheet to '{target_title}'.", flush=True)
+                        ws.title = target_title
+                    except Exception as ex:
+                        print(f"Warning: Failed to rename worksheet '{ws.title}' to '{target_title}': {ex}", flush=True)
         
-        # Refresh the worksheets list after renaming and match by stable id
-        for ws in ss.worksheets():
-            title = ws.title
-            if title == "All Club Data":
-                continue
+            # Refresh the worksheets list after renaming and match by stable id
+            for ws in ss.worksheets():
+                title = ws.title
+                if title == "All Club Data":
+                    continue
             
-            # If this sheet is in our CID list, it's a club sheet.
-            # Check if its CID is in the currently active database config.
-            sheet_cid = sheet_to_cid.get(ws.id)
-            if sheet_cid is not None and sheet_cid not in cid_to_active_cfg:
-                print(f"Detected deactivated club sheet '{title}' (Circle ID: {sheet_cid}). Deleting worksheet...", flush=True)
-                try:
-                    ss.del_worksheet(ws)
-                    print(f"Deleted worksheet '{title}'.", flush=True)
-                except Exception as ex:
-                    print(f"Warning: Failed to delete worksheet '{title}': {ex}", flush=True)
-    except Exception as e:
-        print(f"Warning: Failed to perform stale sheet cleanup & renames: {e}", flush=True)
+                # If this sheet is in our CID list, it's a club sheet.
+                # Check if its CID is in the currently active database config.
+                sheet_cid = sheet_to_cid.get(ws.id)
+                if sheet_cid is not None and sheet_cid not in cid_to_active_cfg:
+                    print(f"Detected deactivated club sheet '{title}' (Circle ID: {sheet_cid}). Deleting worksheet...", flush=True)
+                    try:
+                        ss.del_worksheet(ws)
+                        print(f"Deleted worksheet '{title}'.", flush=True)
+                    except Exception as ex:
+                        print(f"Warning: Failed to delete worksheet '{title}': {ex}", flush=True)
+        except Exception as e:
+            print(f"Warning: Failed to perform stale sheet cleanup & renames: {e}", flush=True)
     
     # Engine is now exclusively Chrono
     engine_choice = "CHRONO"
@@ -651,72 +751,146 @@ async def main():
     RETRY_DELAY = _env_int("CHRONO_RETRY_DELAY", 5)
     clubs_to_process = CLUBS if choice == "ALL" else {k: v for k, v in CLUBS.items() if v == choice}
 
-    force_run = "--force" in sys.argv
+    # Batched mode commits every club sheet, the summary and the ordering in a
+    # few spreadsheet-wide calls at the end instead of per-club writes.
+    batched = "--batched" in sys.argv or os.getenv("SHEETS_EXPORT_MODE", "").strip().lower() == "batched"
+    # Every fetched month is kept in the local history store (HISTORY_STORE=0
+    # disables); --from-store rebuilds the sheets from it without calling Chrono.
+    from_store = "--from-store" in sys.argv
+    # Optional Postgres copy of every member's daily gains and club ranks (--pg-sink / PG_SINK=1).
+    sink = PostgresSink.from_env(get_database(database_url), sys.argv)
+
+    # Per-club freshness: clubs whose sheet already has the latest game day,
+    # and lagging clubs still inside their re-poll backoff, are held: rebuilt
+    # for the summary without a Chrono request or a sheet write. Only the rest
+    # is fetched; with none left the run is skipped.
+    target = latest_game_day()
+    forced = {cfg.get("club_id") for cfg in clubs_to_process.values()
+              if force_run or cfg.get("club_id") in force_clubs or cfg["title"].lower() in force_clubs}
+    unmatched = set(force_clubs) - {cfg.get("club_id") for cfg in CLUBS.values()} - {cfg["title"].lower() for cfg in CLUBS.values()}
+    if unmatched:
+        print(f"Warning: --force names no active club: {', '.join(sorted(unmatched))}", flush=True)
+    if forced and not force_run:
+        print(f"Forcing a full refresh of {len(forced)} club(s).", flush=True)
 
-    # Redundancy check: Skip if today's data is already updated
-    if is_cron and choice == "ALL" and not force_run:
+    # Run journal: a restart of an interrupted run (same game day and force
+    # scope) skips clubs it already committed and rebuilds the ones it had
+    # already fetched from the history store.
+    journal = None
+    if not from_store:
+        journal = RunJournal.from_env(SHEET_ID, target, "all" if force_run else sorted(force_clubs) or None)
+    held = {}
+    resume = set()
+    if journal is not None and journal.resumed:
+        for cfg in clubs_to_process.values():
+            stage = journal.stage(cfg.get("club_id"))
+            if stage == "committed":
+                held[cfg.get("club_id")] = "Committed before the restart"
+            elif stage == "stored" and history is not None:
+                resume.add(cfg.get("club_id"))
+        print(f"Resuming an interrupted run: {len(held)} club(s) already committed, {len(resume)} to rebuild from the history store.", flush=True)
+
+    if freshness is not None and is_cron and choice == "ALL" and not force_run and not from_store:
         try:
-            # Chrono resets at 10:00 UTC. 
-            # The data available at 10:00 UTC reflects results from 'Yesterday'.
-            # e.g., On Day 15, after 10:00 UTC, we expect 'Day 14' to be present.
-            now_utc = datetime.now(timezone.utc)
-            reset_time = now_utc.replace(hour=10, minute=0, second=0, microsecond=0)
-            
-            # Target date calculation: Yesterday if after reset, else 2 days ago
-            target_date = now_utc - timedelta(days=1 if now_utc >= reset_time else 2)
-            target_col_name = f"Day {target_date.day}"
-            expected_month_str = target_date.strftime("%B %Y").upper()
-                
-            # Check if the summary sheet month matches the target month to prevent skipping month transitions
-            ss = GC.open_by_key(SHEET_ID)
-            try:
-                summary_ws = ss.worksheet("All Club Data")
-                first_row = summary_ws.row_values(1)
-                if not first_row or expected_month_str not in first_row[0]:
-                    print(f"--- Month transition detected ({expected_month_str}). Proceeding with update... ---")
-                else:
-                    # Same month, verify if target day's column is already present in first club's sheet
-                    first_club_title = list(CLUBS.values())[0]['title']
-                    try:
-                        ws = ss.worksheet(first_club_title)
-                        headers = ws.row_values(1)
-                        if target_col_name in headers:
-                            print(f"--- Skip: Sheet is already up to date with {target_col_name} ---")
-                            return
-                    except Exception:
-                        pass # Proceed if worksheet not found
-            except Exception as e:
-                print(f"Warning: Summary sheet month verification failed, proceeding: {e}")
+            with span("sheets.freshness_seed"):
+                seeded = freshness.seed_from_sheets(GC, list(clubs_to_process.values()))
+            if seeded:
+                print(f"Read the published day of {seeded} club(s) from their sheet headers.", flush=True)
         except Exception as e:
-            print(f"Warning: Freshness check failed, proceeding anyway: {e}")
+            print(f"Warning: Could not read club sheet headers, treating those clubs as due: {e}", flush=True)
+        resumed = bool(held or resume)
+        # Resumed clubs are rebuilt regardless of freshness and reported on their own.
+        skip = set(held) | resume | forced
+        candidates = [cfg for cfg in clubs_to_process.values() if cfg.get("club_id") not in skip]
+        due, current, waiting = freshness.plan(candidates, target)
+        held.update((cfg.get("club_id"), f"Sheet already has Day {target.day}") for cfg in current)
+        held.update((cfg.get("club_id"), f"Still waiting on Chrono for Day {target.day}") for cfg in waiting)
+        if not due and not forced and not resumed:
+            if waiting:
+                print(f"--- Skip: {len(current)} club(s) up to date with Day {target.day}, {len(waiting)} waiting on Chrono ---", flush=True)
+            else:
+                print(f"--- Skip: Sheet is already up to date with Day {target.day} ---", flush=True)
+            metrics.finish_run(run_started, "skipped", len(waiting), sys.argv)
+            return [cfg["title"] for cfg in waiting]
+        if held:
+            print(
+                f"Freshness: {len(due)} club(s) due, {len(current)} up to date with Day {target.day}, {len(waiting)} waiting on Chrono"
+                f"{f', {len(resume)} resumed' if resume else ''}.", flush=True
+            )
 
     total_failures = 0
     successful_results = []
-    concurrency = max(1, _env_int("CLUB_CONCURRENCY", 4))
-    print(f"\nProcessing {len(clubs_to_process)} clubs (Engine: {engine_choice}, concurrency: {concurrency})...\n", flush=True)
+    export_jobs = []
+    lagging = []
+    # Runs whose sheet now shows their latest day (recorded once the write is committed).
+    published = []
+    # Fetchers default to CLUB_CONCURRENCY and committers to SHEETS_CONCURRENCY;
+    # PIPELINE_FETCH_WORKERS / PIPELINE_TRANSFORM_WORKERS / PIPELINE_COMMIT_WORKERS
+    # override. The scheduler still serializes writes to the same worksheet.
+    # Decoding and DataFrame building run in the transform executor
+    # (TRANSFORM_EXECUTOR / --transform-executor: inline, thread, process, auto).
+    fetchers = stage_workers("fetch", _env_int("CLUB_CONCURRENCY", 4))
+    transform_executor = TransformExecutor.from_env(sys.argv, len(clubs_to_process))
+    transformers = stage_workers("transform", transform_executor.workers)
+    committers = stage_workers("commit", SHEETS_SCHEDULER.concurrency)
+    print(f"\nProcessing {len(clubs_to_process)} clubs (Engine: {engine_choice}, fetchers: {fetchers}, transformers: {transformers} {transform_executor.mode}, committers: {committers})...\n", flush=True)
 
     items = list(clubs_to_process.items())
     if not items:
+        transform_executor.close()
         print("No clubs to process.", flush=True)
     else:
-        sem = asyncio.Semaphore(concurrency)
+        async def fetch_stage(run: dict) -> dict | Done:
+            # --from-store reads the stored payload; held and resumed clubs refetch
+            # with their stored history, everything else is a plain Chrono fetch.
+            if from_store:
+                return await load_club(run, history)
+            elif run.get("held") or run.get("resume"):
+                return await reload_club(run, history, chrono, 90)
+            return await fetch_club(run, chrono, 90)
 
-        async def _process_one(cfg):
-            async with sem:
-                return await process_club_workflow(cfg, GC, RETRY_DELAY, 5, 90)
-
-        outcomes = await asyncio.gather(*(_process_one(cfg) for _, cfg in items))
+        # Fetching later clubs overlaps with transforming and writing earlier
+        # ones; bounded queues hold back fetchers when the committers lag.
+        pipeline = Pipeline([
+            Stage("fetch", fetch_stage, fetchers, attempts=5, retry_delay=RETRY_DELAY),
+            Stage("transform", lambda run: transform_club(run, transform_executor, response_cache, force_run, history, sink, journal), transformers),
+            Stage("commit", lambda run: commit_club(run, GC, response_cache, force_run, batched, journal), committers, attempts=5, retry_delay=RETRY_DELAY),
+        ], queue_size=_env_int("PIPELINE_QUEUE_SIZE", 8))
+        runs = [
+            new_club_run(cfg, held.get(cfg.get("club_id")), cfg.get("club_id") in resume, cfg.get("club_id") in forced)
+            for _, cfg in items
+        ]
+        try:
+            outcomes = await pipeline.run(runs, label=lambda run: run["cfg"]["title"])
+        finally:
+            transform_executor.close()
+        chrono.print_timing_summary()
+        pipeline.print_summary()
+        lagging = lagging_clubs(runs, outcomes)
+        for run, outcome in zip(runs, outcomes):
+            if run.get("held"):
+                continue
+            if freshness is not None:
+                freshness.record(run["cfg"].get("club_id"), target, run["cfg"]["title"] not in lagging)
+            if isinstance(outcome, tuple):
+                published.append(run)
+        if history is not None:
+            prefix = colorize("[History]", LogColor.BATCH)
+            print(f"  {prefix} {history.changes} row(s) added, revised or removed in {history.path}.", flush=True)
 
         for outcome in outcomes:
             if outcome == NO_DATA:
                 continue
-            if outcome is not None and isinstance(outcome, tuple) and len(outcome) == 2:
-                normal_outcome, resolved_sdate = outcome
+            if outcome is not None and isinstance(outcome, tuple) and len(outcome) in (2, 3):
+                normal_outcome, resolved_sdate = outcome[:2]
                 if normal_outcome:
                     successful_results.append((resolved_sdate, normal_outcome))
+                if len(outcome) == 3 and outcome[2]:
+                    export_jobs.append(outcome[2])
             else:
                 total_failures += 1
 
+    summary = None
     if choice == "ALL" and successful_results:
         # Exclude clubs that resolved to a different month than the majority so the
         # dashboard never mixes months (e.g. early-month fallback to the previous month).
@@ -731,9 +905,7 @@ async def main():
         successful_clubs = [r[1] for r in conforming]
 
         if successful_clubs:
-            print("Exporting All Club Data summary sheet...", flush=True)
-            if await export_summary_with_retry(GC, SHEET_ID, successful_clubs, summary_sdate, "All Club Data"):
-                print("All Club Data summary sheet updated.", flush=True)
+            summary = (successful_clubs, summary_sdate)
 
         # Temp All Club Data summary sheet retired:
         # temp_successful_clubs = [r[2] for r in conforming]
@@ -744,12 +916,97 @@ async def main():
         #     if await export_summary_with_retry(GC, TEMP_SHEET_ID, temp_successful_clubs, temp_sdate, "Temp All Club Data"):
         #         print("Temp All Club Data summary sheet updated.", flush=True)
 
-    # Reordering is now always the final step after the parallel gather
-    print("Reordering sheets...", flush=True)
     ordered_titles = ["All Club Data"] + [CLUBS[k]['title'] for k in CLUBS]
-    await reorder_sheets_with_retry(GC, SHEET_ID, ordered_titles, "")
-    # await reorder_sheets_with_retry(GC, TEMP_SHEET_ID, ordered_titles, "Temp")
-    print("Sheets reordered.", flush=True)
+    if batched:
+        # One spreadsheet-wide commit: club sheets, summary and ordering together.
+        batch_digest = content_digest(
+            [(job["digest"], job.get("incremental", True)) for job in export_jobs],
+            _summary_digest(summary) if summary else None, ordered_titles,
+        )
+        try:
+            if journal is not None and journal.step_done("batched", batch_digest):
+                print("Batched commit already done before the restart. Skipping.", flush=True)
+            else:
+                print(f"Committing {len(export_jobs)} club sheet(s){' + summary' if summary else ''} in batched mode...", flush=True)
+                stats = await SHEETS_SCHEDULER.run(None, export_spreadsheet_batched, GC, SHEET_ID, export_jobs, summary, ordered_titles, SHEET_STATE, not force_run)
+                print(
+                    f"Batched commit done: {stats['requests']} requests in {stats['batch_update_calls']} batchUpdate call(s), "
+                    f"{stats['value_ranges']} ranges in {stats['values_calls']} values call(s).",
+                    flush=True
+                )
+                if response_cache is not None:
+                    for job in export_jobs:
+                        response_cache.set_marker(job["marker"], job["digest"])
+                if journal is not None:
+                    for run in published:
+                        journal.record(run["cfg"].get("club_id"), "committed", run["export_job"] and run["export_job"]["digest"], sdate=run["sdate"])
+                    journal.record_step("batched", batch_digest)
+        except Exception as e:
+            print(f"Error: Batched sheet commit failed: {e}", flush=True)
+            total_failures += len(export_jobs) or 1
+            published = []
+    else:
+        if summary:
+            summary_digest = _summary_digest(summary)
+            if journal is not None and journal.step_done("summary", summary_digest):
+                print("All Club Data summary sheet already updated before the restart. Skipping.", flush=True)
+            else:
+                print("Exporting All Club Data summary sheet...", flush=True)
+                if await export_summary_with_retry(GC, SHEET_ID, summary[0], summary[1], "All Club Data"):
+                    print("All Club Data summary sheet updated.", flush=True)
+                    if journal is not None:
+                        journal.record_step("summary", summary_digest)
+
+        # Reordering is now always the final step after the parallel gather
+        # The live sheet list is part of the digest: a club sheet added after a
+        # recorded reorder (a club retried on restart) must still be moved.
+        try:
+            live_titles = sorted(metadata_cache(GC, SHEET_ID).titles())
+        except Exception:
+            live_titles = None
+        order_digest = content_digest(ordered_titles, live_titles)
+        if journal is not None and live_titles is not None and journal.step_done("reorder", order_digest):
+            print("Sheets already reordered before the restart. Skipping.", flush=True)
+        else:
+            print("Reordering sheets...", flush=True)
+            if await reorder_sheets_with_retry(GC, SHEET_ID, ordered_titles, "") and journal is not None:
+                journal.record_step("reorder", order_digest)
+            # await reorder_sheets_with_retry(GC, TEMP_SHEET_ID, ordered_titles, "Temp")
+            print("Sheets reordered.", flush=True)
+
+    if freshness is not None:
+        # Freshness lag: time since the reset until a club sheet first shows the new day.
+        lag = (datetime.now(timezone.utc) - last_reset()).total_seconds()
+        for run in published:
+            before = freshness.published(run["cfg"].get("club_id"))
+            freshness.mark_published(run["cfg"].get("club_id"), run["sdate"], run.get("latest_day"))
+            after = freshness.published(run["cfg"].get("club_id"))
+            if after is not None and after >= target and (before is None or before < target):
+                metrics.FRESHNESS_LAG_SECONDS.observe(lag)
+
+    if sink is not None:
+        try:
+            with span("pg_sink.flush"):
+                stats = await sink.flush()
+            prefix = colorize("[Postgres]", LogColor.API)
+            print(f"  {prefix} Loaded {stats['member_rows']} member-day gains and {stats['rank_rows']} club ranks.", flush=True)
+        except Exception as e:
+            print(f"Error: Postgres sink failed: {e}", flush=True)
+            total_failures += 1
+
+    quota = GC.http_client.quota.summary()
+    print(
+        f"Sheets API: {quota['reads']} reads, {quota['writes']} writes, "
+        f"{quota['throttle_seconds']}s waiting for quota, {quota['backoffs']} backoffs ({quota['backoff_seconds']}s).",
+        flush=True
+    )
+
+    annotate(clubs=len(clubs_to_process), batched=batched, failures=total_failures, **{f"sheets_{k}": v for k, v in quota.items()})
+
+    # A clean run closes its journal; after failures it stays open so the
+    # retry resumes only the unfinished work.
+    if journal is not None and total_failures == 0:
+        journal.finish()
 
     print("-" * 30)
     if total_failures > 0:
@@ -758,11 +1015,86 @@ async def main():
         print("All operations complete.", flush=True)
     
     print("-" * 30)
+    # Process-wide counters; scraped from METRICS_PORT or dumped to METRICS_FILE.
+    metrics.finish_run(run_started, "failed" if total_failures else "ok", len(lagging), sys.argv)
+    return lagging
+
+
+async def main():
+    setup_windows_console(VERSION)
+    # --daemon stays resident and schedules its own runs around the reset
+    # (see src/daemon.py); it never prompts, like --cron.
+    daemon = "--daemon" in sys.argv
+    is_cron = "--cron" in sys.argv or daemon
     
+    # Startup
+    if not is_cron:
+        print(f"Starting Endless v{VERSION}...", flush=True)
+
+    # Initialize Google Sheets Client
+    GC = get_gspread_client(base_path)
+
+    # Prometheus endpoint on METRICS_PORT (mostly for --daemon).
+    try:
+        if metrics.serve_from_env() is not None:
+            print(f"Serving metrics on {os.getenv('METRICS_HOST') or '127.0.0.1'}:{os.getenv('METRICS_PORT')}/metrics.", flush=True)
+    except OSError as e:
+        print(f"Warning: Could not start the metrics endpoint: {e}", flush=True)
+
+    if not SHEET_ID:
+        print("Error: SHEET_ID must be configured (via .env or config/globals.py).", flush=True)
+        sys.exit(1)
+    
+    # Load dynamic quotas and active clubs from UmaCore PostgreSQL database
+    database_url = resolve_database_url()
+    if not database_url:
+        print("Error: DATABASE_URL must be configured. Database connectivity is required.", flush=True)
+        sys.exit(1)
+
+    # --force refreshes every club; --force=<circle id or title>,... only those.
+    force_run, force_clubs = parse_force(sys.argv)
+    # Every fetched month is kept in the local history store (HISTORY_STORE=0
+    # disables); --from-store rebuilds the sheets from it without calling Chrono.
+    history = HistoryStore.from_env()
+    if "--from-store" in sys.argv and history is None:
+        print("Error: --from-store needs the history store (HISTORY_STORE is disabled).", flush=True)
+        sys.exit(1)
+    response_cache = ResponseCache.from_env()
+    # Latest game day on each club sheet, so runs fetch only clubs that can advance.
+    freshness = FreshnessTracker.from_env(response_cache, SHEET_ID)
+
+    # One pooled Chrono client for the whole process: connections are reused
+    # across clubs, retries and (in daemon mode) runs instead of re-handshaking.
+    async with ChronoClient(cache=response_cache) as chrono:
+        if daemon:
+            scheduler = ResetScheduler.from_env()
+            # A month still missing the new day must not be served from disk
+            # between polls.
+            chrono.pending_ttl = min(chrono.pending_ttl, scheduler.poll_seconds)
+            print(f"Starting Endless v{VERSION} in daemon mode...", flush=True)
+            # --force applies to the first run only.
+            await run_daemon(
+                lambda force: run_once(
+                    GC, chrono, database_url, response_cache, history, True,
+                    force and force_run, freshness, force_clubs if force else frozenset(),
+                ),
+                scheduler, force_first=force_run or bool(force_clubs), next_poll=freshness.next_poll,
+            )
+        else:
+            await run_once(GC, chrono, database_url, response_cache, history, is_cron, force_run, freshness, force_clubs)
+
     if not is_cron:
         input("Press Enter to close...")
 
+async def run_main():
+    # Closes the shared database pool however main() ends.
+    try:
+        await main()
+    finally:
+        await close_databases()
+
+
 if __name__ == "__main__":
     if sys.platform == 'win32': 
         asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
-    asyncio.run(main())
\ No newline at end of file
+    asyncio.run(run_main())
\ No newline at end of file
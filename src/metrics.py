@@ -0,0 +1,257 @@
+import math
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Latency buckets (seconds) shared by the request and transform histograms.
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+# Reset-to-sheet lag buckets: 1 minute up to a day.
+LAG_BUCKETS = (60, 300, 600, 1800, 3600, 2 * 3600, 4 * 3600, 6 * 3600, 12 * 3600, 24 * 3600)
+
+
+def _fmt(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value))
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: tuple, values: tuple, extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class _Family:
+    """A metric with a fixed set of label names; one child per label-value tuple."""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = (), registry=None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        self._lock = threading.Lock()
+        if not self.labelnames:
+            # Unlabelled metrics are exposed (as zero) before their first update.
+            self.labels()
+        (registry if registry is not None else REGISTRY).register(self)
+
+    def labels(self, *values):
+        if len(values) != len(self.labelnames):
+            raise ValueError(f"{self.name} takes labels {self.labelnames}, got {values}")
+        key = tuple(str(v) for v in values)
+        with self._lock:
+            child = self._children.get(key)
+            if child is None:
+                child = self._children[key] = self._new_child()
+        return child
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            children = sorted(self._children.items())
+        for key, child in children:
+            lines.extend(self._render_child(key, child))
+        return lines
+
+
+class _Value:
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0):
+        with self._lock:
+            self.value += amount
+
+    def set(self, value: float):
+        with self._lock:
+            self.value = float(value)
+
+
+class Counter(_Family):
+    kind = "counter"
+
+    def _new_child(self):
+        return _Value()
+
+    def inc(self, amount: float = 1.0):
+        self.labels().inc(amount)
+
+    def _render_child(self, key, child) -> list:
+        return [f"{self.name}{_labels(self.labelnames, key)} {_fmt(child.value)}"]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value: float):
+        self.labels().set(value)
+
+
+class _Buckets:
+    def __init__(self, bounds: tuple):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        with self._lock:
+            index = next((i for i, b in enumerate(self.bounds) if value <= b), len(self.bounds))
+            self.counts[index] += 1
+            self.sum += value
+
+
+class Histogram(_Family):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = (), buckets: tuple = LATENCY_BUCKETS, registry=None):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames, registry)
+
+    def _new_child(self):
+        return _Buckets(self.buckets)
+
+    def observe(self, value: float):
+        self.labels().observe(value)
+
+    def _render_child(self, key, child) -> list:
+        with child._lock:
+            counts, total = list(child.counts), child.sum
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + (math.inf,), counts):
+            cumulative += count
+            le = 'le="' + _fmt(bound) + '"'
+            lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, le)} {cumulative}")
+        lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {_fmt(total)}")
+        lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {cumulative}")
+        return lines
+
+
+class Registry:
+    """Every metric of the process, rendered in the Prometheus text exposition format."""
+
+    def __init__(self):
+        self._families = []
+
+    def register(self, family: _Family):
+        self._families.append(family)
+
+    def render(self) -> str:
+        lines = []
+        for family in self._families:
+            lines.extend(family.render())
+        return "\n".join(lines) + "\n"
+
+    def write_textfile(self, path: str):
+        """Dump the metrics for node_exporter's textfile collector (atomic replace)."""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(self.render())
+        os.replace(tmp, path)
+
+
+REGISTRY = Registry()
+
+CHRONO_REQUEST_SECONDS = Histogram(
+    "uma_chrono_request_duration_seconds", "Chrono API request latency.", ("endpoint", "status"))
+CHRONO_THROTTLED = Counter(
+    "uma_chrono_throttled_total", "Chrono API responses with status 429.", ("endpoint",))
+SHEETS_CALLS = Counter(
+    "uma_sheets_api_calls_total", "Sheets API calls, retries included.", ("method", "status"))
+SHEETS_REQUEST_SECONDS = Histogram(
+    "uma_sheets_request_duration_seconds", "Sheets API call latency, quota waits excluded.", ("method",))
+SHEETS_QUOTA_WAIT_SECONDS = Counter(
+    "uma_sheets_quota_wait_seconds_total", "Time spent waiting for the Sheets per-minute quota.", ("kind",))
+SHEETS_BACKOFF_SECONDS = Counter(
+    "uma_sheets_backoff_seconds_total", "Time spent backing off after Sheets 429/5xx responses.")
+SHEETS_EXPORTS = Counter(
+    "uma_sheets_club_exports_total", "Club sheets written, by path (incremental, full, new).", ("path",))
+ROWS_PROCESSED = Counter(
+    "uma_rows_processed_total", "Member rows built into club tables.")
+BUILD_DATAFRAME_SECONDS = Histogram(
+    "uma_build_dataframe_duration_seconds", "Time to decode a club payload and build its table.")
+FRESHNESS_LAG_SECONDS = Histogram(
+    "uma_freshness_lag_seconds", "Time from the daily reset until a club sheet shows the new day.", buckets=LAG_BUCKETS)
+CLUBS_LAGGING = Gauge(
+    "uma_clubs_lagging", "Clubs still missing the latest game day after the last run.")
+RUNS = Counter(
+    "uma_runs_total", "Tracker runs by result.", ("result",))
+RUN_SECONDS = Histogram(
+    "uma_run_duration_seconds", "Tracker run wall time.", buckets=(10, 30, 60, 120, 300, 600, 1200, 1800, 3600))
+LAST_RUN_TIMESTAMP = Gauge(
+    "uma_last_run_timestamp_seconds", "Unix time the last tracker run finished.")
+
+
+class _Handler(BaseHTTPRequestHandler):
+    registry = REGISTRY
+
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+        body = self.registry.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_http_server(port: int, host: str = "127.0.0.1", registry: Registry = REGISTRY) -> ThreadingHTTPServer:
+    """Serve GET /metrics from a daemon thread; returns the server (shutdown() stops it)."""
+    handler = type("MetricsHandler", (_Handler,), {"registry": registry})
+    server = ThreadingHTTPServer((host, port), handler)
+    threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+    return server
+
+
+def serve_from_env() -> ThreadingHTTPServer | None:
+    """Start the endpoint on METRICS_PORT (METRICS_HOST, default 127.0.0.1); None when unset."""
+    try:
+        port = int(os.getenv("METRICS_PORT", "0"))
+    except ValueError:
+        port = 0
+    if port <= 0:
+        return None
+    return start_http_server(port, os.getenv("METRICS_HOST") or "127.0.0.1")
+
+
+def dump_from_env(argv: list = None) -> str | None:
+    """Write the textfile dump to METRICS_FILE or --metrics-file=<path>; returns the path written."""
+    path = os.getenv("METRICS_FILE") or None
+    for arg in argv or []:
+        if arg.startswith("--metrics-file="):
+            path = arg.split("=", 1)[1] or None
+    if not path:
+        return None
+    try:
+        REGISTRY.write_textfile(path)
+    except OSError as e:
+        print(f"Warning: Failed to write metrics file {path}: {e}", flush=True)
+        return None
+    return path
+
+
+def finish_run(started: float, result: str, lagging: int, argv: list = None):
+    """Record one finished tracker run (started is a time.monotonic() value) and write the textfile dump."""
+    RUNS.labels(result).inc()
+    RUN_SECONDS.observe(time.monotonic() - started)
+    CLUBS_LAGGING.set(lagging)
+    LAST_RUN_TIMESTAMP.set(time.time())
+    dump_from_env(argv)
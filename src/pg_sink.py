@@ -0,0 +1,126 @@
+import os
+from datetime import date
+
+import numpy as np
+
+from src.db import Database
+
+MEMBER_GAINS_TABLE = "tracker_member_daily_gains"
+CLUB_RANKS_TABLE = "tracker_club_daily_ranks"
+
+_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS {MEMBER_GAINS_TABLE} (
+    circle_id TEXT NOT NULL,
+    viewer_id TEXT NOT NULL,
+    game_date DATE NOT NULL,
+    member_name TEXT,
+    fan_gain BIGINT,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    PRIMARY KEY (circle_id, viewer_id, game_date)
+);
+CREATE INDEX IF NOT EXISTS {MEMBER_GAINS_TABLE}_date ON {MEMBER_GAINS_TABLE} (circle_id, game_date);
+CREATE TABLE IF NOT EXISTS {CLUB_RANKS_TABLE} (
+    circle_id TEXT NOT NULL,
+    game_date DATE NOT NULL,
+    rank INTEGER,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    PRIMARY KEY (circle_id, game_date)
+);
+"""
+
+MEMBER_COLUMNS = ("circle_id", "viewer_id", "game_date", "member_name", "fan_gain")
+RANK_COLUMNS = ("circle_id", "game_date", "rank")
+
+
+def _game_dates(sdate: str, days: list) -> list:
+    first = date.fromisoformat(sdate)
+    out = []
+    for day in days:
+        try:
+            out.append(first.replace(day=day))
+        except ValueError:
+            out.append(None)
+    return out
+
+
+class PostgresSink:
+    """Bulk-loads each run's per-member daily gains and per-club daily ranks into Postgres.
+
+    Clubs are collected as they are transformed; flush() then sends each
+    table in one COPY into a temporary staging table and merges it with
+    INSERT ... ON CONFLICT, so re-runs update rows in place and unchanged
+    rows are not rewritten. Gains are the sheet's values: days before a
+    member joined are left out.
+    """
+
+    def __init__(self, db: Database):
+        self.db = db
+        self.member_rows = []
+        self.rank_rows = []
+
+    @classmethod
+    def from_env(cls, db: Database, argv: list = None):
+        """Sink when enabled with --pg-sink or PG_SINK=1, else None."""
+        enabled = "--pg-sink" in (argv or []) or os.getenv("PG_SINK", "0").strip().lower() in ("1", "true", "yes", "on")
+        return cls(db) if enabled else None
+
+    def add_club(self, circle_id, sdate: str, df, club_daily_history: list = None):
+        cid = str(circle_id)
+        day_cols = [c for c in df.columns if isinstance(c, str) and c.startswith("Day ")]
+        if day_cols and len(df):
+            dates = _game_dates(sdate, [int(c.split()[1]) for c in day_cols])
+            gains = df[day_cols].to_numpy(dtype=float)
+            rows, cols = np.nonzero(~np.isnan(gains))
+            ids = df["Member_ID"].to_numpy(dtype=object)
+            names = df["Member_Name"].to_numpy(dtype=object)
+            values = np.rint(gains[rows, cols]).astype(np.int64).tolist()
+            self.member_rows.extend(
+                (cid, ids[r], dates[c], names[r], v)
+                for r, c, v in zip(rows.tolist(), cols.tolist(), values)
+                if dates[c] is not None
+            )
+        for entry in club_daily_history or []:
+            try:
+                day = int(entry.get("actual_date"))
+            except (TypeError, ValueError):
+                continue
+            game_date = _game_dates(sdate, [day])[0]
+            try:
+                rank = int(entry.get("rank"))
+            except (TypeError, ValueError):
+                rank = None
+            if game_date is not None:
+                self.rank_rows.append((cid, game_date, rank))
+
+    async def flush(self) -> dict:
+        """Load everything collected so far in one transaction; returns row counts."""
+        if not self.member_rows and not self.rank_rows:
+            return {"member_rows": 0, "rank_rows": 0}
+        pool = await self.db.pool()
+        async with pool.acquire() as conn:
+            await conn.execute(_SCHEMA)
+            async with conn.transaction():
+                await self._merge(conn, MEMBER_GAINS_TABLE, MEMBER_COLUMNS, ("circle_id", "viewer_id", "game_date"), self.member_rows)
+                await self._merge(conn, CLUB_RANKS_TABLE, RANK_COLUMNS, ("circle_id", "game_date"), self.rank_rows)
+        stats = {"member_rows": len(self.member_rows), "rank_rows": len(self.rank_rows)}
+        self.member_rows, self.rank_rows = [], []
+        return stats
+
+    @staticmethod
+    async def _merge(conn, table: str, columns: tuple, key: tuple, records: list):
+        if not records:
+            return
+        # Last row per key wins, as ON CONFLICT cannot touch the same row twice in one statement.
+        records = list({tuple(r[columns.index(k)] for k in key): r for r in records}.values())
+        stage = f"{table}_stage"
+        await conn.execute(f"CREATE TEMP TABLE {stage} (LIKE {table} INCLUDING DEFAULTS) ON COMMIT DROP")
+        await conn.copy_records_to_table(stage, records=records, columns=list(columns))
+        cols = ", ".join(columns)
+        updates = [c for c in columns if c not in key]
+        await conn.execute(
+            f"INSERT INTO {table} ({cols}) SELECT {cols} FROM {stage} "
+            f"ON CONFLICT ({', '.join(key)}) DO UPDATE SET "
+            + ", ".join(f"{c} = EXCLUDED.{c}" for c in updates)
+            + ", updated_at = now() "
+            f"WHERE ({', '.join(f'{table}.{c}' for c in updates)}) IS DISTINCT FROM ({', '.join(f'EXCLUDED.{c}' for c in updates)})"
+        )
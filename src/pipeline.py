@@ -0,0 +1,148 @@
+import asyncio
+import os
+import random
+import time
+from dataclasses import dataclass
+
+from src.telemetry import add, fail, record_sleep, span
+from src.utils import LogColor, colorize
+
+# Marks the end of a stage's input queue.
+_END = object()
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, str(default)))
+    except (TypeError, ValueError):
+        return default
+
+
+@dataclass
+class Done:
+    """Returned by a stage to finish an item early; value becomes its result."""
+    value: object
+
+
+class Stage:
+    """One step of a Pipeline: `workers` coroutines running fn(item) -> next item.
+
+    A failing call is retried up to `attempts` times in total, sleeping
+    retry_delay plus 1-4s of jitter in between; an item that still fails
+    yields None and skips the remaining stages.
+    """
+
+    def __init__(self, name: str, fn, workers: int = 1, attempts: int = 1, retry_delay: float = 0.0):
+        self.name = name
+        self.fn = fn
+        self.workers = max(1, workers)
+        self.attempts = max(1, attempts)
+        self.retry_delay = retry_delay
+        self.items = 0
+        self.failures = 0
+        self.retries = 0
+        self.busy_seconds = 0.0
+        self.blocked_seconds = 0.0
+
+    async def call(self, item, label: str):
+        # One telemetry span per club and stage, retries and their delays included.
+        with span(self.name, club=label):
+            attempt = 0
+            while True:
+                started = time.perf_counter()
+                try:
+                    return await self.fn(item)
+                except Exception as e:
+                    attempt += 1
+                    prefix = colorize("[Error]", LogColor.ERROR)
+                    print(f"  {prefix} {self.name} failed on {label} (Attempt {attempt}): {e}", flush=True)
+                    if attempt >= self.attempts:
+                        self.failures += 1
+                        fail(str(e))
+                        return None
+                    self.retries += 1
+                    add("retries")
+                    delay = self.retry_delay + random.uniform(1, 4)
+                    prefix = colorize("[Retry]", LogColor.RETRY)
+                    print(f"  {prefix} {label}: sleeping {delay:.1f}s before {self.name} attempt {attempt + 1}...", flush=True)
+                finally:
+                    self.busy_seconds += time.perf_counter() - started
+                record_sleep(delay, "retry")
+                await asyncio.sleep(delay)
+
+    def summary(self) -> dict:
+        return {
+            "workers": self.workers,
+            "items": self.items,
+            "failures": self.failures,
+            "retries": self.retries,
+            "busy_seconds": round(self.busy_seconds, 2),
+            "blocked_seconds": round(self.blocked_seconds, 2),
+        }
+
+
+class Pipeline:
+    """Runs items through stages connected by bounded asyncio queues.
+
+    Every stage has its own worker pool, so fetching one club overlaps with
+    transforming and committing others; a full queue blocks the upstream
+    stage (back-pressure) instead of piling finished work in memory.
+    run() returns one result per input item, in input order.
+    """
+
+    def __init__(self, stages: list, queue_size: int = 8):
+        self.stages = stages
+        self.queue_size = max(1, queue_size)
+        self.wall_seconds = 0.0
+
+    async def run(self, items: list, label=str) -> list:
+        results = [None] * len(items)
+        queues = [asyncio.Queue(self.queue_size) for _ in self.stages]
+        started = time.perf_counter()
+
+        async def feed():
+            for index, item in enumerate(items):
+                await queues[0].put((index, item))
+            for _ in range(self.stages[0].workers):
+                await queues[0].put(_END)
+
+        async def work(i: int, stage: Stage):
+            last = i == len(self.stages) - 1
+            while True:
+                entry = await queues[i].get()
+                if entry is _END:
+                    return
+                index, item = entry
+                out = await stage.call(item, label(items[index]))
+                stage.items += 1
+                if isinstance(out, Done):
+                    results[index] = out.value
+                elif out is None or last:
+                    results[index] = out
+                else:
+                    waited = time.perf_counter()
+                    await queues[i + 1].put((index, out))
+                    stage.blocked_seconds += time.perf_counter() - waited
+
+        async def run_stage(i: int, stage: Stage):
+            await asyncio.gather(*(work(i, stage) for _ in range(stage.workers)))
+            if i + 1 < len(self.stages):
+                for _ in range(self.stages[i + 1].workers):
+                    await queues[i + 1].put(_END)
+
+        await asyncio.gather(feed(), *(run_stage(i, s) for i, s in enumerate(self.stages)))
+        self.wall_seconds = time.perf_counter() - started
+        return results
+
+    def print_summary(self):
+        prefix = colorize("[Pipeline]", LogColor.BATCH)
+        parts = []
+        for stage in self.stages:
+            s = stage.summary()
+            parts.append(f"{stage.name} x{s['workers']}: {s['items']} items, {s['busy_seconds']}s busy, {s['blocked_seconds']}s blocked, {s['retries']} retries")
+        print(f"  {prefix} {self.wall_seconds:.1f}s wall. " + "; ".join(parts), flush=True)
+
+
+def stage_workers(name: str, default: int) -> int:
+    """Worker count for a stage from PIPELINE_<NAME>_WORKERS."""
+    return max(1, _env_int(f"PIPELINE_{name.upper()}_WORKERS", default))
@@ -1,30 +1,69 @@
-from datetime import datetime, timedelta, timezone
+import re
 
+import numpy as np
 import pandas as pd
 
+_TZ_SUFFIX = re.compile(r"[+-]\d{2}:?\d{2}$")
 
-def _join_day(join_time_str, ref_date_str) -> int:
-    """Game-day the member joined, using the 10:00 UTC day flip.
+
+def _join_days(join_map: dict, ref_date_str: str) -> pd.Series:
+    """Game-day each member joined, using the 10:00 UTC day flip, indexed by str(viewer_id).
 
     Chrono join_time is JST ("2026-08-03T20:29:41"). The game day turns over
     at 10:00 UTC (19:00 JST), so the effective game date of a timestamp is its
     UTC date shifted back by 10 hours. A join before the reference period
     (current month start) means the member was present from day 1. Any parse
-    failure degrades to day 1.
+    failure degrades to day 1. All timestamps are parsed in one pass.
     """
-    if not join_time_str:
-        return 1
-    try:
-        dt = datetime.fromisoformat(str(join_time_str).replace("Z", "+00:00"))
-        if dt.tzinfo is None:
-            dt = dt.replace(tzinfo=timezone(timedelta(hours=9)))
-        game_date = (dt.astimezone(timezone.utc) - timedelta(hours=10)).date()
-        ref_date = datetime.strptime(ref_date_str, "%Y-%m-%d").date()
-        if game_date < ref_date:
-            return 1
-        return game_date.day
-    except (ValueError, TypeError):
-        return 1
+    keys = [str(k) for k in join_map]
+    stamps = []
+    for v in join_map.values():
+        text = str(v).replace("Z", "+00:00") if v not in (None, "") else ""
+        if text and not _TZ_SUFFIX.search(text):
+            # Naive timestamps are JST.
+            text += ("" if "T" in text or " " in text else "T00:00:00") + "+09:00"
+        stamps.append(text or None)
+
+    utc = pd.to_datetime(pd.Series(stamps, dtype=object), utc=True, errors="coerce", format="ISO8601")
+    game_date = (utc.dt.tz_localize(None) - pd.Timedelta(hours=10)).to_numpy(dtype="datetime64[D]")
+    day = (game_date - game_date.astype("datetime64[M]")).astype(np.int64) + 1
+    valid = ~np.isnat(game_date) & (game_date >= np.datetime64(ref_date_str, "D"))
+    return pd.Series(np.where(valid, day, 1), index=keys, dtype=int)
+
+
+def _pivot_days(df: pd.DataFrame) -> pd.DataFrame:
+    """Member x day matrix: one row per (friend_viewer_id, friend_name), one "Day N" column per day.
+
+    Equivalent to pivot_table(aggfunc="first") but scatters the values straight
+    into a preallocated array: members are factorized into row codes and the
+    integer actual_date picks the column. Rows with a missing key or value are
+    ignored, the first value per member/day wins, and members and days without
+    any value are left out. Columns come out in numeric day order.
+    """
+    values = df["adjusted_interpolated_fan_gain"]
+    vid = df["friend_viewer_id"].to_numpy()
+    name = df["friend_name"].to_numpy()
+    gain = values.to_numpy()
+    keep = pd.notna(vid) & pd.notna(name) & pd.notna(gain)
+    if not keep.any():
+        return pd.DataFrame(columns=["friend_viewer_id", "friend_name"])
+
+    # Sorted factorization of each key, combined so row order matches a (viewer_id, name) sort.
+    vid_codes, vids = pd.factorize(vid[keep], sort=True)
+    name_codes, names = pd.factorize(name[keep], sort=True)
+    members, codes = np.unique(vid_codes.astype(np.int64) * len(names) + name_codes, return_inverse=True)
+    days, cols = np.unique(df["actual_date"].to_numpy(dtype=np.int64)[keep], return_inverse=True)
+
+    # First occurrence of each (member, day) cell, as pivot_table's "first".
+    _, first = np.unique(codes * len(days) + cols, return_index=True)
+    grid = np.full((len(members), len(days)), np.nan)
+    grid[codes[first], cols[first]] = gain[keep].astype(float)[first]
+    if np.issubdtype(values.dtype, np.integer) and not np.isnan(grid).any():
+        grid = grid.astype(values.dtype)
+
+    out = pd.DataFrame(grid, columns=[f"Day {d}" for d in days])
+    keys = pd.DataFrame({"friend_viewer_id": vids.take(members // len(names)), "friend_name": names.take(members % len(names))})
+    return pd.concat([keys, out], axis=1)
 
 
 def build_dataframe(data: dict, join_map: dict = None, sdate: str = None) -> pd.DataFrame:
@@ -39,17 +78,7 @@ def build_dataframe(data: dict, join_map: dict = None, sdate: str = None) -> pd.
         df["actual_date"] = pd.to_numeric(df["actual_date"], errors="coerce").astype("Int64")
         df = df.dropna(subset=["actual_date"]).copy()
 
-    df = (
-        df.assign(day_col=lambda d: "Day " + d["actual_date"].astype(str))
-            .pivot_table(
-                index=["friend_viewer_id", "friend_name"],
-                columns="day_col",
-                values="adjusted_interpolated_fan_gain",
-                aggfunc="first"
-            )
-            .reset_index()
-    )
-    df.columns.name = None
+    df = _pivot_days(df)
 
     def _day_num(x: str):
         if not isinstance(x, str) or not x.startswith("Day "):
@@ -73,14 +102,11 @@ def build_dataframe(data: dict, join_map: dict = None, sdate: str = None) -> pd.
     # Gray out pre-join days: a member who joined on game-day N has no real data
     # before N. Chrono backfills 0 (or interpolated phantoms) for those days, so
     # blank them and let the sheet's BLANK rule render them gray.
-    if join_map and sdate:
-        join_days = {str(k): _join_day(v, sdate) for k, v in join_map.items()}
-        for pos, vid in enumerate(df["friend_viewer_id"]):
-            jd = join_days.get(str(vid), 1)
-            if jd > 1:
-                for c in day_cols:
-                    if (_day_num(c) or float("inf")) < jd:
-                        df.at[df.index[pos], c] = pd.NA
+    if join_map and sdate and day_cols and len(df):
+        join_day = df["friend_viewer_id"].astype(str).map(_join_days(join_map, sdate)).fillna(1).to_numpy()
+        day_nums = np.array([_day_num(c) or np.inf for c in day_cols], dtype=float)
+        pre_join = day_nums[np.newaxis, :] < join_day[:, np.newaxis]
+        df[day_cols] = df[day_cols].mask(pre_join)
 
     df["AVG/d"] = df[day_cols].mean(axis=1).round(0) if day_cols else 0
     df["Total"] = df[day_cols].sum(axis=1) if day_cols else 0
@@ -95,3 +121,22 @@ def build_dataframe(data: dict, join_map: dict = None, sdate: str = None) -> pd.
 
     df = df.sort_values(["AVG/d", "Member_Name"], ascending=[False, True], na_position="last", kind="mergesort").reset_index(drop=True)
     return df
+
+
+def club_summary(df: pd.DataFrame) -> pd.DataFrame:
+    """Per-member summary columns (member_name, avg_day, performance) of a build_dataframe result.
+
+    Rows keep the club sheet's order (AVG/d descending), so the first three
+    are the club's carry members. performance is the month total, which
+    build_dataframe already computed as Total.
+    """
+    if "Total" in df.columns:
+        performance = df["Total"]
+    else:
+        day_cols = [c for c in df.columns if isinstance(c, str) and c.startswith("Day ")]
+        performance = df[day_cols].sum(axis=1) if day_cols else pd.Series(0.0, index=df.index)
+    return pd.DataFrame({
+        "member_name": df["Member_Name"].to_numpy(),
+        "avg_day": pd.to_numeric(df["AVG/d"], errors="coerce").to_numpy(dtype=float),
+        "performance": performance.fillna(0).to_numpy(),
+    })
@@ -0,0 +1,187 @@
+import asyncio
+import json
+import os
+import time
+from contextlib import asynccontextmanager
+from email.utils import parsedate_to_datetime
+
+from src.telemetry import record_sleep
+from src.utils import LogColor, colorize
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, str(default)))
+    except (TypeError, ValueError):
+        return default
+
+
+def _parse_retry_after(value) -> float | None:
+    # Retry-After is either delta-seconds or an HTTP date.
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError, IndexError, OverflowError):
+        return None
+
+
+def _parse_reset(value) -> float | None:
+    # X-RateLimit-Reset is either seconds-until-reset or an epoch timestamp.
+    try:
+        v = float(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, v - time.time()) if v > 1e9 else max(0.0, v)
+
+
+class AdaptiveRateLimiter:
+    """Token bucket in front of the Chrono API with AIMD rate control.
+
+    Requests draw one token each; tokens refill at `rate` per second up to
+    `burst`. Every successful response raises the rate additively (+increase)
+    up to max_rate; a 429 halves it (x decrease, at most once per cool-down
+    window so a burst of concurrent 429s counts once) and pauses the bucket
+    for Retry-After / the advertised rate-limit reset. max_in_flight bounds
+    concurrent requests. The learned rate can be persisted so the next run
+    (or the OnlyRex tracker) starts where the last one ended.
+    """
+
+    def __init__(
+        self,
+        rate: float = 2.0,
+        min_rate: float = 0.2,
+        max_rate: float = 10.0,
+        burst: float = 3.0,
+        max_in_flight: int = 3,
+        increase: float = 0.1,
+        decrease: float = 0.5,
+        state_path: str = None,
+    ):
+        self.min_rate = min_rate
+        self.max_rate = max(max_rate, min_rate)
+        self.rate = min(max(rate, self.min_rate), self.max_rate)
+        self.burst = max(1.0, burst)
+        self.increase = increase
+        self.decrease = decrease
+        self.state_path = state_path
+        self._tokens = self.burst
+        self._last_refill = time.monotonic()
+        self._blocked_until = 0.0
+        self._last_decrease = 0.0
+        self._lock = asyncio.Lock()
+        self._in_flight = asyncio.Semaphore(max(1, max_in_flight))
+        self.requests = 0
+        self.throttled = 0
+        self.wait_seconds = 0.0
+        self._load_state()
+
+    @classmethod
+    def from_env(cls, **overrides):
+        """Limiter configured via API_RATE, API_RATE_MIN, API_RATE_MAX, API_BURST and API_CONCURRENCY."""
+        params = {
+            "rate": _env_float("API_RATE", 2.0),
+            "min_rate": _env_float("API_RATE_MIN", 0.2),
+            "max_rate": _env_float("API_RATE_MAX", 10.0),
+            "burst": _env_float("API_BURST", 3.0),
+            "max_in_flight": int(_env_float("API_CONCURRENCY", 3)),
+        }
+        if os.getenv("CHRONO_CACHE", "1").strip().lower() not in ("0", "false", "no", "off"):
+            cache_dir = os.getenv("CHRONO_CACHE_DIR") or os.path.join(".cache", "chrono")
+            params["state_path"] = os.path.join(cache_dir, "rate_limiter.json")
+        params.update(overrides)
+        return cls(**params)
+
+    def _refill(self, now: float):
+        self._tokens = min(self.burst, self._tokens + (now - self._last_refill) * self.rate)
+        self._last_refill = now
+
+    async def acquire(self):
+        """Wait until the bucket holds a token (and any server-imposed pause has passed)."""
+        started = time.monotonic()
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self._blocked_until:
+                    record_sleep(self._blocked_until - now, "chrono_rate_limit")
+                    await asyncio.sleep(self._blocked_until - now)
+                    continue
+                self._refill(now)
+                if self._tokens >= 1.0:
+                    self._tokens -= 1.0
+                    break
+                record_sleep((1.0 - self._tokens) / self.rate, "chrono_rate_limit")
+                await asyncio.sleep((1.0 - self._tokens) / self.rate)
+        self.requests += 1
+        self.wait_seconds += time.monotonic() - started
+
+    @asynccontextmanager
+    async def slot(self):
+        """One request's worth of admission: a concurrency slot plus a token."""
+        async with self._in_flight:
+            await self.acquire()
+            yield
+
+    def on_response(self, status: int, headers=None):
+        """Feed a response back into the controller (AIMD + header hints)."""
+        headers = {k.lower(): v for k, v in (headers or {}).items()}
+        now = time.monotonic()
+
+        pause = None
+        remaining = headers.get("x-ratelimit-remaining", headers.get("ratelimit-remaining"))
+        if remaining is not None and str(remaining).strip() == "0":
+            pause = _parse_reset(headers.get("x-ratelimit-reset", headers.get("ratelimit-reset")))
+
+        if status == 429:
+            self.throttled += 1
+            retry_after = _parse_retry_after(headers.get("retry-after"))
+            if retry_after is not None:
+                pause = max(pause or 0.0, retry_after)
+            # Multiplicative decrease, once per cool-down window.
+            if now - self._last_decrease > max(1.0 / self.rate, pause or 0.0):
+                self.rate = max(self.min_rate, self.rate * self.decrease)
+                self._last_decrease = now
+                prefix = colorize("[Rate Limit]", LogColor.RETRY)
+                print(f"  {prefix} 429 from Chrono: backing off to {self.rate:.2f} req/s", flush=True)
+            self._tokens = 0.0
+            if pause is None:
+                pause = 1.0 / self.rate
+        elif 200 <= status < 300 or status == 304:
+            # Additive increase while the API keeps accepting requests; other 4xx leave the rate alone.
+            self.rate = min(self.max_rate, self.rate + self.increase)
+
+        if pause:
+            self._blocked_until = max(self._blocked_until, now + pause)
+
+    def summary(self) -> dict:
+        return {
+            "requests": self.requests,
+            "throttled": self.throttled,
+            "rate": round(self.rate, 2),
+            "wait_seconds": round(self.wait_seconds, 2),
+        }
+
+    def _load_state(self):
+        if not self.state_path:
+            return
+        try:
+            with open(self.state_path, encoding="utf-8") as f:
+                learned = float(json.load(f).get("rate"))
+            self.rate = min(max(learned, self.min_rate), self.max_rate)
+        except (OSError, ValueError, TypeError, AttributeError):
+            pass
+
+    def save_state(self):
+        """Persist the learned rate for the next run."""
+        if not self.state_path:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.state_path) or ".", exist_ok=True)
+            with open(self.state_path, "w", encoding="utf-8") as f:
+                json.dump({"rate": self.rate, "updated_at": time.time()}, f)
+        except OSError as e:
+            print(f"Warning: Failed to save rate limiter state: {e}", flush=True)
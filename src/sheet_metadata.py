@@ -0,0 +1,213 @@
+import copy
+import threading
+
+from gspread import Spreadsheet, WorksheetNotFound
+from gspread.worksheet import Worksheet
+
+# Everything the exporters need to know about a spreadsheet, in one spreadsheets.get.
+METADATA_FIELDS = (
+    "properties.title,"
+    "sheets(properties,conditionalFormats(ranges(sheetId)),bandedRanges(bandedRangeId),merges)"
+)
+
+
+def _overlaps(a: dict, b: dict) -> bool:
+    for lo, hi in (("startRowIndex", "endRowIndex"), ("startColumnIndex", "endColumnIndex")):
+        if a.get(lo, 0) >= b.get(hi, float("inf")) or b.get(lo, 0) >= a.get(hi, float("inf")):
+            return False
+    return True
+
+
+def _merge_props(target: dict, patch: dict):
+    for key, value in patch.items():
+        if isinstance(value, dict) and isinstance(target.get(key), dict):
+            _merge_props(target[key], value)
+        else:
+            target[key] = copy.deepcopy(value)
+
+
+class SpreadsheetMetadataCache:
+    """In-memory copy of a spreadsheet's sheet metadata.
+
+    Sheet ids, titles, order, grid sizes, conditional format rule counts,
+    banded range ids and merges are fetched once with a field mask and then
+    kept current by apply(), which replays every batchUpdate this process
+    sends (QuotaHTTPClient calls it automatically). invalidate() forces a
+    fresh fetch on the next lookup, e.g. at the start of a daemon cycle.
+    """
+
+    def __init__(self, http_client, spreadsheet_id: str):
+        self.http_client = http_client
+        self.spreadsheet_id = spreadsheet_id
+        self.title = None
+        self.fetches = 0
+        self._sheets = None  # ordered list of {"properties", "cf_count", "banded_ids", "merges"}
+        self._lock = threading.RLock()
+
+    def refresh(self):
+        res = self.http_client.fetch_sheet_metadata(self.spreadsheet_id, params={"fields": METADATA_FIELDS})
+        sheets = []
+        for sheet in res.get("sheets", []):
+            sheets.append({
+                "properties": sheet.get("properties", {}),
+                "cf_count": len(sheet.get("conditionalFormats", [])),
+                "banded_ids": [b["bandedRangeId"] for b in sheet.get("bandedRanges", []) if b.get("bandedRangeId") is not None],
+                "merges": sheet.get("merges", []),
+            })
+        sheets.sort(key=lambda s: s["properties"].get("index", 0))
+        with self._lock:
+            self.title = res.get("properties", {}).get("title")
+            self._sheets = sheets
+            self.fetches += 1
+
+    def invalidate(self):
+        with self._lock:
+            self._sheets = None
+
+    def _entries(self) -> list:
+        with self._lock:
+            if self._sheets is None:
+                self.refresh()
+            return self._sheets
+
+    def _find(self, title: str = None, sheet_id: int = None) -> dict | None:
+        for entry in self._entries():
+            props = entry["properties"]
+            if (title is not None and props.get("title") == title) or (sheet_id is not None and props.get("sheetId", 0) == sheet_id):
+                return entry
+        return None
+
+    def sheet_properties(self) -> list:
+        """Properties of every sheet, in tab order."""
+        with self._lock:
+            return [copy.deepcopy(e["properties"]) for e in self._entries()]
+
+    def properties(self, title: str) -> dict | None:
+        with self._lock:
+            entry = self._find(title=title)
+            return copy.deepcopy(entry["properties"]) if entry else None
+
+    def titles(self) -> list:
+        return [p.get("title") for p in self.sheet_properties()]
+
+    def cf_count(self, title: str) -> int:
+        with self._lock:
+            entry = self._find(title=title)
+            return entry["cf_count"] if entry else 0
+
+    def banded_ids(self, title: str) -> list:
+        with self._lock:
+            entry = self._find(title=title)
+            return list(entry["banded_ids"]) if entry else []
+
+    def merges(self, title: str) -> list:
+        with self._lock:
+            entry = self._find(title=title)
+            return copy.deepcopy(entry["merges"]) if entry else []
+
+    @property
+    def spreadsheet(self) -> "CachedSpreadsheet":
+        """gspread Spreadsheet handle that answers worksheet lookups from this cache."""
+        return CachedSpreadsheet(self)
+
+    def apply(self, requests: list, response: dict = None):
+        """Replay a successful batchUpdate on the cached metadata."""
+        with self._lock:
+            if self._sheets is None:
+                return
+            replies = (response or {}).get("replies", [])
+            for i, request in enumerate(requests):
+                kind, body = next(iter(request.items()))
+                reply = (replies[i] if i < len(replies) else None) or {}
+                self._apply_one(kind, body, reply)
+            for index, entry in enumerate(self._sheets):
+                entry["properties"]["index"] = index
+
+    def _apply_one(self, kind: str, body: dict, reply: dict):
+        sheets = self._sheets
+        if kind == "addSheet":
+            props = copy.deepcopy(reply.get("addSheet", {}).get("properties") or body.get("properties", {}))
+            index = min(props.get("index", len(sheets)), len(sheets))
+            sheets.insert(index, {"properties": props, "cf_count": 0, "banded_ids": [], "merges": []})
+        elif kind == "deleteSheet":
+            entry = self._find(sheet_id=body.get("sheetId", 0))
+            if entry:
+                sheets.remove(entry)
+        elif kind == "updateSheetProperties":
+            props = body.get("properties", {})
+            entry = self._find(sheet_id=props.get("sheetId", 0))
+            if entry is None:
+                return
+            patch = {k: v for k, v in props.items() if k not in ("sheetId", "index")}
+            _merge_props(entry["properties"], patch)
+            if "index" in props:
+                sheets.remove(entry)
+                sheets.insert(min(props["index"], len(sheets)), entry)
+        elif kind == "addConditionalFormatRule":
+            ranges = body.get("rule", {}).get("ranges") or [{}]
+            entry = self._find(sheet_id=ranges[0].get("sheetId", 0))
+            if entry:
+                entry["cf_count"] += 1
+        elif kind == "deleteConditionalFormatRule":
+            entry = self._find(sheet_id=body.get("sheetId", 0))
+            if entry:
+                entry["cf_count"] = max(0, entry["cf_count"] - 1)
+        elif kind == "addBanding":
+            banded = reply.get("addBanding", {}).get("bandedRange") or body.get("bandedRange", {})
+            entry = self._find(sheet_id=banded.get("range", {}).get("sheetId", 0))
+            if entry and banded.get("bandedRangeId") is not None:
+                entry["banded_ids"].append(banded["bandedRangeId"])
+        elif kind == "deleteBanding":
+            for entry in sheets:
+                if body.get("bandedRangeId") in entry["banded_ids"]:
+                    entry["banded_ids"].remove(body["bandedRangeId"])
+        elif kind == "mergeCells":
+            rng = body.get("range", {})
+            entry = self._find(sheet_id=rng.get("sheetId", 0))
+            if entry:
+                entry["merges"].append(copy.deepcopy(rng))
+        elif kind == "unmergeCells":
+            rng = body.get("range", {})
+            entry = self._find(sheet_id=rng.get("sheetId", 0))
+            if entry:
+                entry["merges"] = [m for m in entry["merges"] if not _overlaps(m, rng)]
+
+
+class CachedSpreadsheet(Spreadsheet):
+    """Spreadsheet whose worksheets()/worksheet() are served from a SpreadsheetMetadataCache.
+
+    Unlike gspread.Client.open_by_key, creating one costs no request.
+    """
+
+    def __init__(self, metadata: SpreadsheetMetadataCache):
+        self.client = metadata.http_client
+        self.metadata = metadata
+        self._properties = {"id": metadata.spreadsheet_id, "title": metadata.title}
+
+    def worksheets(self, exclude_hidden: bool = False) -> list:
+        return [
+            Worksheet(self, props, self.id, self.client)
+            for props in self.metadata.sheet_properties()
+            if not (exclude_hidden and props.get("hidden"))
+        ]
+
+    def worksheet(self, title: str) -> Worksheet:
+        props = self.metadata.properties(title)
+        if props is None:
+            raise WorksheetNotFound(title)
+        return Worksheet(self, props, self.id, self.client)
+
+
+_REGISTRY_LOCK = threading.Lock()
+
+
+def metadata_cache(gc_client, spreadsheet_id: str) -> SpreadsheetMetadataCache:
+    """The run's shared metadata cache for spreadsheet_id on this gspread client."""
+    http_client = gc_client.http_client
+    caches = getattr(http_client, "metadata_caches", None)
+    if caches is None:
+        return SpreadsheetMetadataCache(http_client, spreadsheet_id)
+    with _REGISTRY_LOCK:
+        if spreadsheet_id not in caches:
+            caches[spreadsheet_id] = SpreadsheetMetadataCache(http_client, spreadsheet_id)
+        return caches[spreadsheet_id]
@@ -0,0 +1,387 @@
+import bisect
+import hashlib
+import json
+import os
+import time
+
+DEFAULT_STATE_DIR = os.path.join(".cache", "sheets")
+
+# Requests that fully overwrite their target, so a changed one can be resent alone.
+OVERWRITE_KINDS = ("setBasicFilter", "updateDimensionProperties", "updateSheetProperties", "updateBorders")
+# Beyond this many dirty format rectangles, one bounding box is cheaper.
+MAX_DIRTY_RANGES = 20
+
+
+class SheetStateStore:
+    """Last-written state of each club sheet, used to send diffs instead of full rewrites.
+
+    One JSON file per (spreadsheet, title) holds the sheetId, grid size, cell
+    values, the formatting requests that produced the sheet, and the banded
+    range ids Google assigned to them. Anything that no longer matches the live
+    sheet (id, grid size, conditional format count or banded range ids) makes
+    the exporter fall back to a full rewrite; a state is dropped before each
+    write so one that fails halfway is never diffed against.
+    """
+
+    def __init__(self, directory: str = None):
+        self.directory = directory or DEFAULT_STATE_DIR
+        os.makedirs(self.directory, exist_ok=True)
+
+    @classmethod
+    def from_env(cls):
+        """Store configured via SHEETS_STATE_DIR; None when disabled with SHEETS_INCREMENTAL=0."""
+        if os.getenv("SHEETS_INCREMENTAL", "1").strip().lower() in ("0", "false", "no", "off"):
+            return None
+        return cls(os.getenv("SHEETS_STATE_DIR") or DEFAULT_STATE_DIR)
+
+    def _path(self, spreadsheet_id: str, title: str) -> str:
+        digest = hashlib.sha1(json.dumps([spreadsheet_id, title]).encode()).hexdigest()
+        return os.path.join(self.directory, f"sheet-{digest[:20]}.json")
+
+    def get(self, spreadsheet_id: str, title: str) -> dict | None:
+        try:
+            with open(self._path(spreadsheet_id, title), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def put(self, spreadsheet_id: str, title: str, state: dict):
+        path = self._path(spreadsheet_id, title)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({**state, "updated_at": time.time()}, f, default=str)
+            os.replace(tmp, path)
+        except OSError as e:
+            print(f"Warning: Failed to save sheet state for {title}: {e}", flush=True)
+
+    def drop(self, spreadsheet_id: str, title: str):
+        try:
+            os.remove(self._path(spreadsheet_id, title))
+        except OSError:
+            pass
+
+
+def diff_values(old: list, new: list, max_ranges: int = 100, max_ratio: float = 0.5) -> list:
+    """Changed rectangles between two value grids as (row0, col0, block), 0-based.
+
+    Cells that exist only in the old grid are written back as "" so shrinking
+    tables leave nothing behind. Changed cells are grouped into per-column row
+    runs and neighbouring columns with the same run are merged; when the
+    change is large or fragmented a single full-grid block is returned.
+    """
+    n_rows = max(len(old), len(new))
+    n_cols = max([len(r) for r in old] + [len(r) for r in new] + [0])
+
+    def cell(grid, r, c):
+        return grid[r][c] if r < len(grid) and c < len(grid[r]) else ""
+
+    runs = {}
+    changed = 0
+    for c in range(n_cols):
+        r = 0
+        while r < n_rows:
+            if cell(old, r, c) == cell(new, r, c):
+                r += 1
+                continue
+            start = r
+            while r < n_rows and cell(old, r, c) != cell(new, r, c):
+                r += 1
+            runs.setdefault((start, r), []).append(c)
+            changed += r - start
+    if not changed:
+        return []
+
+    rects = []
+    for (r0, r1), cols in runs.items():
+        c0 = prev = cols[0]
+        for c in cols[1:] + [None]:
+            if c is not None and c == prev + 1:
+                prev = c
+                continue
+            rects.append((r0, c0, r1, prev + 1))
+            if c is not None:
+                c0 = prev = c
+    if len(rects) > max_ranges or changed > max_ratio * n_rows * n_cols:
+        rects = [(0, 0, n_rows, n_cols)]
+    return [
+        (r0, c0, [[cell(new, r, c) for c in range(c0, c1)] for r in range(r0, r1)])
+        for r0, c0, r1, c1 in sorted(rects)
+    ]
+
+
+def row_order(old_keys: list, new_keys: list) -> list | None:
+    """For each new row, the old row that should end up there, matching rows by key.
+
+    Keys are per row (None when a row has none). Old rows whose key is gone
+    fill the new rows whose key is new, in order, so both lists cover
+    max(len(old_keys), len(new_keys)) rows. Returns None when a key repeats.
+    """
+    n = max(len(old_keys), len(new_keys))
+    old_keys = list(old_keys) + [None] * (n - len(old_keys))
+    new_keys = list(new_keys) + [None] * (n - len(new_keys))
+    for keys in (old_keys, new_keys):
+        present = [k for k in keys if k is not None]
+        if len(set(present)) != len(present):
+            return None
+    wanted = set(new_keys)
+    where = {k: i for i, k in enumerate(old_keys) if k is not None}
+    fillers = iter([i for i, k in enumerate(old_keys) if k is None or k not in wanted])
+    return [where[k] if k is not None and k in where else next(fillers) for k in new_keys]
+
+
+def move_requests(order: list, sheet_id: int, offset: int = 0) -> list:
+    """moveDimension requests after which row offset + i holds what was row offset + order[i].
+
+    Rows on a longest increasing run of `order` stay put; each other row is
+    moved once, right after its new predecessor.
+    """
+    tails, tail_at, prev = [], [], [None] * len(order)
+    for i, v in enumerate(order):
+        p = bisect.bisect_left(tails, v)
+        if p == len(tails):
+            tails.append(v)
+            tail_at.append(i)
+        else:
+            tails[p], tail_at[p] = v, i
+        prev[i] = tail_at[p - 1] if p else None
+    stable = set()
+    i = tail_at[-1] if tail_at else None
+    while i is not None:
+        stable.add(order[i])
+        i = prev[i]
+
+    requests = []
+    current = sorted(order)
+    for t, row in enumerate(order):
+        if row in stable:
+            continue
+        j = current.index(row)
+        a = current.index(order[t - 1]) if t else -1
+        if j == a + 1:
+            continue
+        requests.append({
+            "moveDimension": {
+                "source": {"sheetId": sheet_id, "dimension": "ROWS", "startIndex": offset + j, "endIndex": offset + j + 1},
+                "destinationIndex": offset + a + 1,
+            }
+        })
+        current.pop(j)
+        current.insert(a + 1 if a < j else a, row)
+    return requests
+
+
+def _kind(request: dict) -> str:
+    return next(iter(request))
+
+
+def _key(request: dict) -> str:
+    return json.dumps(request, sort_keys=True, default=str)
+
+
+def _intersect(a: dict, b: dict) -> dict | None:
+    # Intersection of two GridRanges on the same sheet (missing bounds are unbounded).
+    out = {"sheetId": a.get("sheetId")}
+    for lo, hi in (("startRowIndex", "endRowIndex"), ("startColumnIndex", "endColumnIndex")):
+        start = max(a.get(lo, 0), b.get(lo, 0))
+        ends = [x[hi] for x in (a, b) if hi in x]
+        end = min(ends) if ends else None
+        if end is not None and start >= end:
+            return None
+        out[lo] = start
+        if end is not None:
+            out[hi] = end
+    return out
+
+
+def _bounding(ranges: list) -> dict:
+    box = {"sheetId": ranges[0].get("sheetId")}
+    for lo, hi in (("startRowIndex", "endRowIndex"), ("startColumnIndex", "endColumnIndex")):
+        box[lo] = min(r.get(lo, 0) for r in ranges)
+        if all(hi in r for r in ranges):
+            box[hi] = max(r[hi] for r in ranges)
+    return box
+
+
+def _same_paint(a: dict, b: dict) -> bool:
+    return _key({k: v for k, v in a.items() if k != "range"}) == _key({k: v for k, v in b.items() if k != "range"})
+
+
+def _union(a: dict, b: dict) -> dict | None:
+    # The rectangle covered by two touching GridRanges, or None when it is not one.
+    spans = {}
+    for lo, hi in (("startRowIndex", "endRowIndex"), ("startColumnIndex", "endColumnIndex")):
+        if hi not in a or hi not in b:
+            return None
+        spans[lo] = (a[lo], a[hi], b[lo], b[hi])
+    rows, cols = spans["startRowIndex"], spans["startColumnIndex"]
+    if rows[:2] == rows[2:] and cols[2] <= cols[1] and cols[0] <= cols[3]:
+        return {**a, "startColumnIndex": min(cols[0], cols[2]), "endColumnIndex": max(cols[1], cols[3])}
+    if cols[:2] == cols[2:] and rows[2] <= rows[1] and rows[0] <= rows[3]:
+        return {**a, "startRowIndex": min(rows[0], rows[2]), "endRowIndex": max(rows[1], rows[3])}
+    return None
+
+
+def _rule_order(adds: list) -> list:
+    # The sheet's conditional format rules, by index, after these addConditionalFormatRule requests.
+    rules = []
+    for r in adds:
+        body = r["addConditionalFormatRule"]
+        rules.insert(min(body.get("index", len(rules)), len(rules)), body["rule"])
+    return rules
+
+
+def _cell_formats(requests: list, n_rows: int, n_cols: int) -> dict:
+    """(row, col) -> what the repeatCell and updateBorders requests leave on that cell, in order.
+
+    The effect of a repeatCell on a cell does not depend on its range, so two
+    layouts that paint a cell the same way give it the same signature even
+    when their ranges differ (e.g. a header range grown by one column).
+    """
+    out = {}
+    for r in requests:
+        kind = _kind(r)
+        if kind not in ("repeatCell", "updateBorders"):
+            continue
+        body = r[kind]
+        rng = body["range"]
+        r0, r1 = rng.get("startRowIndex", 0), rng.get("endRowIndex", n_rows)
+        c0, c1 = rng.get("startColumnIndex", 0), rng.get("endColumnIndex", n_cols)
+        effect = _key({k: v for k, v in body.items() if k != "range"})
+        edges = [body.get(k) for k in ("top", "bottom", "left", "right", "innerHorizontal", "innerVertical")]
+        # A border whose edges all match looks the same on every cell; otherwise
+        # a cell's borders depend on where it sits in the range.
+        uniform = kind == "repeatCell" or all(e is not None and e == edges[0] for e in edges)
+        for row in range(r0, r1):
+            for col in range(c0, c1):
+                sig = effect if uniform else (effect, row == r0, row == r1 - 1, col == c0, col == c1 - 1)
+                out.setdefault((row, col), []).append(sig)
+    return out
+
+
+def _cell_rects(cells: set) -> list:
+    # Per-column row runs, with neighbouring columns that share a run merged, as (r0, c0, r1, c1).
+    runs = {}
+    for col in sorted({c for _, c in cells}):
+        rows = sorted(r for r, c in cells if c == col)
+        start = prev = rows[0]
+        for row in rows[1:] + [None]:
+            if row is not None and row == prev + 1:
+                prev = row
+                continue
+            runs.setdefault((start, prev + 1), []).append(col)
+            if row is not None:
+                start = prev = row
+    rects = []
+    for (r0, r1), cols in runs.items():
+        c0 = prev = cols[0]
+        for c in cols[1:] + [None]:
+            if c is not None and c == prev + 1:
+                prev = c
+                continue
+            rects.append((r0, c0, r1, prev + 1))
+            if c is not None:
+                c0 = prev = c
+    return sorted(rects)
+
+
+def incremental_format_requests(old: list, new: list, sheet_id: int, cf_count: int, banded_ids: list, rows: list = None) -> list | None:
+    """Requests that turn a sheet formatted by `old` into one formatted by `new`.
+
+    rows, when the rows were rearranged first (see move_requests), maps each
+    row to the row it came from; cell formats travel with their rows.
+    repeatCell and border formats are diffed per cell: the rectangles of
+    cells whose resulting format changed are reset and then re-painted with
+    the new requests clipped to them, in their original order. Overwriting requests
+    (filter, widths, frozen rows, borders) are resent only when they changed;
+    changed bandings and conditional formats are updated in place, or replaced
+    as a group when their number changed. Returns None when a full rewrite is
+    required.
+    """
+    moved = {src: dst for dst, src in enumerate(rows or []) if src != dst}
+    if old == new and not moved:
+        return []
+    known = ("repeatCell", "addBanding", "addConditionalFormatRule") + OVERWRITE_KINDS
+    if any(_kind(r) not in known for r in old + new):
+        return None
+
+    requests = []
+    new_cells = [r for r in new if _kind(r) == "repeatCell"]
+    # Only cells whose final format differs are reset and repainted.
+    ends = [r[_kind(r)]["range"].get(hi, 0) for r in old + new if _kind(r) in ("repeatCell", "updateBorders")
+            for hi in ("endRowIndex", "endColumnIndex")]
+    extent = max(ends, default=0)
+    before = {(moved.get(r, r), c): sig for (r, c), sig in _cell_formats(old, extent, extent).items()}
+    after = _cell_formats(new, extent, extent)
+    changed = {cell for cell in set(before) | set(after) if before.get(cell) != after.get(cell)}
+    dirty = [
+        {"sheetId": sheet_id, "startRowIndex": r0, "endRowIndex": r1, "startColumnIndex": c0, "endColumnIndex": c1}
+        for r0, c0, r1, c1 in _cell_rects(changed)
+    ] if changed else []
+    if len(dirty) > MAX_DIRTY_RANGES:
+        dirty = [_bounding(dirty)]
+    for rng in dirty:
+        requests.append({"repeatCell": {"range": rng, "cell": {"userEnteredFormat": {}}, "fields": "userEnteredFormat"}})
+    painted = set()
+    for r in new_cells:
+        for rng in dirty:
+            part = _intersect(r["repeatCell"]["range"], rng)
+            if part:
+                clipped = {"repeatCell": {**r["repeatCell"], "range": part}}
+                if _key(clipped) in painted:
+                    continue
+                painted.add(_key(clipped))
+                # Neighbouring pieces painted the same way in a row (per-column
+                # number formats clipped to one row) go out as one rectangle.
+                last = requests[-1]["repeatCell"] if requests and _kind(requests[-1]) == "repeatCell" else None
+                union = _union(last["range"], part) if last and _same_paint(last, clipped["repeatCell"]) else None
+                if union:
+                    requests[-1] = {"repeatCell": {**last, "range": union}}
+                else:
+                    requests.append(clipped)
+
+    # Resetting a rectangle also wipes its borders, so borders follow any reset.
+    old_other = {_key(r) for r in old if _kind(r) in OVERWRITE_KINDS}
+    for r in new:
+        if _kind(r) in OVERWRITE_KINDS and (_key(r) not in old_other or (_kind(r) == "updateBorders" and dirty)):
+            requests.append(r)
+
+    # A new day column only widens these ranges, so in-place updates are the common case.
+    old_bands = [r for r in old if _kind(r) == "addBanding"]
+    new_bands = [r for r in new if _kind(r) == "addBanding"]
+    if old_bands != new_bands:
+        if len(banded_ids) != len(old_bands):
+            return None
+        if len(new_bands) == len(old_bands):
+            requests.extend(
+                {"updateBanding": {"bandedRange": {**r["addBanding"]["bandedRange"], "bandedRangeId": bid}, "fields": "*"}}
+                for bid, o, r in zip(banded_ids, old_bands, new_bands) if o != r
+            )
+        else:
+            requests.extend({"deleteBanding": {"bandedRangeId": bid}} for bid in banded_ids)
+            requests.extend(new_bands)
+
+    old_cf = [r for r in old if _kind(r) == "addConditionalFormatRule"]
+    new_cf = [r for r in new if _kind(r) == "addConditionalFormatRule"]
+    if old_cf != new_cf:
+        if len(new_cf) == len(old_cf) == cf_count:
+            old_rules, new_rules = _rule_order(old_cf), _rule_order(new_cf)
+            requests.extend(
+                {"updateConditionalFormatRule": {"index": i, "sheetId": sheet_id, "rule": r}}
+                for i, (o, r) in enumerate(zip(old_rules, new_rules)) if o != r
+            )
+        else:
+            requests.extend({"deleteConditionalFormatRule": {"index": 0, "sheetId": sheet_id}} for _ in range(cf_count))
+            requests.extend(new_cf)
+    return requests
+
+
+def banded_ids_by_sheet(responses: list) -> dict:
+    """sheetId -> bandedRangeIds created by addBanding replies in batchUpdate responses."""
+    out = {}
+    for response in responses:
+        for reply in (response or {}).get("replies", []):
+            banded = (reply or {}).get("addBanding", {}).get("bandedRange")
+            if banded and banded.get("bandedRangeId") is not None:
+                out.setdefault(banded.get("range", {}).get("sheetId", 0), []).append(banded["bandedRangeId"])
+    return out
@@ -1,64 +1,55 @@
+import json
 import os
+import random
 import sys
 
 import gspread
+import numpy as np
 import pandas as pd
 from google.oauth2.service_account import Credentials
-from gspread.utils import rowcol_to_a1
-
-
-def get_gspread_client(base_path: str, creds_folder: str = 'config'):
+from gspread.utils import absolute_range_name, rowcol_to_a1
+
+from src.metrics import SHEETS_EXPORTS
+from src.sheet_metadata import metadata_cache
+from src.sheet_state import (
+    SheetStateStore,
+    banded_ids_by_sheet,
+    diff_values,
+    incremental_format_requests,
+    move_requests,
+    row_order,
+)
+from src.sheets_scheduler import QuotaHTTPClient, SheetsQuota
+from src.telemetry import annotate, traced
+
+
+def get_gspread_client(base_path: str, creds_folder: str = 'config', quota: SheetsQuota = None, session=None):
+    # session replaces the authorized HTTP session (no credentials are read),
+    # e.g. benchmarks.sheets_emulator.SheetsEmulator to run exports offline.
     SCOPES = ["https://www.googleapis.com/auth/spreadsheets"]
     try:
+        if session is not None:
+            GC = gspread.Client(None, session=session, http_client=QuotaHTTPClient)
+            GC.http_client.quota = quota or SheetsQuota.from_env()
+            return GC
         # Construct path to credentials.json in specified folder
         creds_path = os.path.join(base_path, creds_folder, 'credentials.json')
         CREDS = Credentials.from_service_account_file(creds_path, scopes=SCOPES)
-        GC = gspread.authorize(CREDS)
+        # Every Sheets call is admitted through the per-minute quota budget and
+        # retried with backoff only when Google answers 429/5xx.
+        GC = gspread.authorize(CREDS, http_client=QuotaHTTPClient)
+        GC.http_client.quota = quota or SheetsQuota.from_env()
         return GC
     except Exception as e:
         print(f"Config Error: {e}")
         sys.exit(1)
 
 
-def get_conditional_format_rules_count(gc_client, spreadsheet_id: str, sheet_title: str) -> int:
-    # Retrieves the count of conditional formatting rules active on the specified sheet.
-    try:
-        import urllib.parse
-        q_range = urllib.parse.quote(f"'{sheet_title}'")
-        url = f"https://sheets.googleapis.com/v4/spreadsheets/{spreadsheet_id}?ranges={q_range}&includeGridData=false"
-        res_obj = gc_client.http_client.session.get(url)
-        if res_obj.status_code == 200:
-            res = res_obj.json()
-            sheets = res.get('sheets', [])
-            if sheets:
-                return len(sheets[0].get('conditionalFormats', []))
-    except Exception as e:
-        print(f"Warning: Failed to get conditional formatting rules count: {e}")
-    return 0
-
-
-def get_banded_range_ids(gc_client, spreadsheet_id: str, sheet_title: str) -> list[str]:
-    # Retrieves all bandedRangeIds active on the specified sheet.
-    try:
-        import urllib.parse
-        q_range = urllib.parse.quote(f"'{sheet_title}'")
-        url = f"https://sheets.googleapis.com/v4/spreadsheets/{spreadsheet_id}?ranges={q_range}&includeGridData=false"
-        res_obj = gc_client.http_client.session.get(url)
-        if res_obj.status_code == 200:
-            res = res_obj.json()
-            sheets = res.get('sheets', [])
-            if sheets:
-                banded_ranges = sheets[0].get('bandedRanges', [])
-                return [b.get('bandedRangeId') for b in banded_ranges if b.get('bandedRangeId')]
-    except Exception as e:
-        print(f"Warning: Failed to get banded range IDs: {e}")
-    return []
-
-
+@traced("sheets.reorder")
 def reorder_sheets(gc_client, spreadsheet_id: str, ordered_titles: list[str]):
     # Reorders the worksheets in the spreadsheet to match the order of ordered_titles.
     # Exceptions propagate to the caller, which handles 429/500 retries.
-    ss = gc_client.open_by_key(spreadsheet_id)
+    ss = metadata_cache(gc_client, spreadsheet_id).spreadsheet
     worksheets = ss.worksheets()
     ws_map = {ws.title: ws for ws in worksheets}
     
@@ -76,9 +67,12 @@ def reorder_sheets(gc_client, spreadsheet_id: str, ordered_titles: list[str]):
     if ordered_ws:
         ss.reorder_worksheets(ordered_ws)
 
-def export_to_gsheets(gc_client, df: pd.DataFrame, spreadsheet_id: str, sheet_title: str, threshold: int, club_daily_history: list = None, circle_id: str = None):
-    # Exports individual club data and daily history to Google Sheets.
-    GAP_COL = " "
+
+GAP_COL = " "
+
+
+def build_club_sheet(df: pd.DataFrame, club_daily_history: list = None, circle_id: str = None) -> dict:
+    """Builds a club sheet's cell values and layout in memory (no API calls)."""
     dcols = [c for c in df.columns if isinstance(c, str) and c.startswith("Day ")]
     df_to_write = df.copy()
 
@@ -147,27 +141,80 @@ def export_to_gsheets(gc_client, df: pd.DataFrame, spreadsheet_id: str, sheet_ti
     if club_row:
         values.append(club_row)
 
-    ss = gc_client.open_by_key(spreadsheet_id)
-    is_new_sheet = False
-    try:
-        ws = ss.worksheet(sheet_title)
-        ws.clear()
-        ws.resize(rows=max(len(values) + 50, 120), cols=max(len(header) + 10, 26))
-    except gspread.WorksheetNotFound:
-        ws = ss.add_worksheet(title=sheet_title, rows=max(len(values) + 50, 120), cols=max(len(header) + 10, 26))
-        is_new_sheet = True
-
-    num_cf_rules = 0 if is_new_sheet else get_conditional_format_rules_count(gc_client, spreadsheet_id, sheet_title)
-    existing_banded_ids = [] if is_new_sheet else get_banded_range_ids(gc_client, spreadsheet_id, sheet_title)
+    # Top 3 members by Total get a green name cell.
+    green_members = set()
+    if "Member_Name" in df_to_write.columns and "Total" in df_to_write.columns:
+        top_by_total = df_to_write.dropna(subset=["Total"]).sort_values("Total", ascending=False, kind="mergesort")
+        green_members = set(top_by_total["Member_Name"].head(3).tolist())
+    green_rows = []
+    if green_members and "Member_Name" in header:
+        name_col_index = header.index("Member_Name")
+        green_rows = [1 + i for i, row_data_vals in enumerate(data_rows) if row_data_vals[name_col_index] in green_members]
 
-    end_row = len(values)
-    end_col = len(header)
-    end_a1 = rowcol_to_a1(end_row, end_col)
     values = [[("" if pd.isna(cell) else cell) for cell in row] for row in values]
-    ws.update(values, f"A1:{end_a1}")
+    return {
+        "values": values,
+        "header": header,
+        "dcols": dcols,
+        "gidx": gidx,
+        "data_rows": len(data_rows),
+        "green_rows": green_rows,
+    }
+
+
+def club_reset_requests(sheet_id: int, end_row: int, end_col: int, num_cf_rules: int, banded_ids: list) -> list:
+    """Requests that wipe a reused club sheet's merges, formats, conditional formats and bandings."""
+    requests = []
+    requests.extend([
+        {
+            "unmergeCells": {
+                "range": {
+                    "sheetId": sheet_id,
+                    "startRowIndex": 0,
+                    "endRowIndex": max(end_row + 100, 200),
+                    "startColumnIndex": 0,
+                    "endColumnIndex": max(end_col + 20, 50)
+                }
+            }
+        },
+        {
+            "repeatCell": {
+                "range": {
+                    "sheetId": sheet_id,
+                    "startRowIndex": 0,
+                    "endRowIndex": max(end_row + 100, 200),
+                    "startColumnIndex": 0,
+                    "endColumnIndex": max(end_col + 20, 50)
+                },
+                "cell": {"userEnteredFormat": {}},
+                "fields": "userEnteredFormat"
+            }
+        }
+    ])
+    for _ in range(num_cf_rules):
+        requests.append({
+            "deleteConditionalFormatRule": {
+                "index": 0,
+                "sheetId": sheet_id
+            }
+        })
+    for banded_id in banded_ids:
+        requests.append({
+            "deleteBanding": {
+                "bandedRangeId": banded_id
+            }
+        })
+    return requests
+
 
-    sheet_id = int(ws.id)  # Adjustment: cast to int for API
-    last_data_row_1based = 1 + len(data_rows) 
+def club_format_requests(layout: dict, sheet_id: int, threshold: int) -> list:
+    """Formatting requests (styles, banding, conditional formats, widths, top-3 highlight) for a club sheet."""
+    header = layout["header"]
+    dcols = layout["dcols"]
+    gidx = layout["gidx"]
+    end_row = len(layout["values"])
+    end_col = len(header)
+    last_data_row_1based = 1 + layout["data_rows"]
 
     header_range = {"sheetId": sheet_id, "startRowIndex": 0, "endRowIndex": 1, "startColumnIndex": 0, "endColumnIndex": end_col}
     totals_range = {"sheetId": sheet_id, "startRowIndex": last_data_row_1based, "endRowIndex": end_row, "startColumnIndex": 0, "endColumnIndex": end_col}
@@ -232,47 +279,6 @@ def export_to_gsheets(gc_client, df: pd.DataFrame, spreadsheet_id: str, sheet_ti
             })
 
     requests = []
-    if not is_new_sheet:
-        requests.extend([
-            {
-                "unmergeCells": {
-                    "range": {
-                        "sheetId": sheet_id,
-                        "startRowIndex": 0,
-                        "endRowIndex": max(end_row + 100, 200),
-                        "startColumnIndex": 0,
-                        "endColumnIndex": max(end_col + 20, 50)
-                    }
-                }
-            },
-            {
-                "repeatCell": {
-                    "range": {
-                        "sheetId": sheet_id,
-                        "startRowIndex": 0,
-                        "endRowIndex": max(end_row + 100, 200),
-                        "startColumnIndex": 0,
-                        "endColumnIndex": max(end_col + 20, 50)
-                    },
-                    "cell": {"userEnteredFormat": {}},
-                    "fields": "userEnteredFormat"
-                }
-            }
-        ])
-        for _ in range(num_cf_rules):
-            requests.append({
-                "deleteConditionalFormatRule": {
-                    "index": 0,
-                    "sheetId": sheet_id
-                }
-            })
-        for banded_id in existing_banded_ids:
-            requests.append({
-                "deleteBanding": {
-                    "bandedRangeId": banded_id
-                }
-            })
-
     requests.extend([
         {"setBasicFilter": {"filter": {"range": header_plus_data_range}}},
         {
@@ -386,83 +392,270 @@ def export_to_gsheets(gc_client, df: pd.DataFrame, spreadsheet_id: str, sheet_ti
         }
     })
 
-    green_members = set()
-    if "Member_Name" in df_to_write.columns and "Total" in df_to_write.columns:
-        top_by_total = df_to_write.dropna(subset=["Total"]).sort_values("Total", ascending=False, kind="mergesort")
-        green_members = set(top_by_total["Member_Name"].head(3).tolist())
-
-    if green_members and "Member_Name" in header:
+    if layout["green_rows"] and "Member_Name" in header:
         name_col_index = header.index("Member_Name")
         green_fill = {"red": 0.576, "green": 0.769, "blue": 0.490}
-        for i, row_data_vals in enumerate(data_rows):
-            member_name = row_data_vals[name_col_index]
-            if member_name in green_members:
-                row_idx = 1 + i
-                requests.append({
-                    "repeatCell": {
-                        "range": {
-                            "sheetId": sheet_id,
-                            "startRowIndex": row_idx,
-                            "endRowIndex": row_idx + 1,
-                            "startColumnIndex": name_col_index,
-                            "endColumnIndex": name_col_index + 1
-                        },
-                        "cell": {"userEnteredFormat": {"backgroundColor": green_fill}},
-                        "fields": "userEnteredFormat.backgroundColor"
-                    }
-                })
+        for row_idx in layout["green_rows"]:
+            requests.append({
+                "repeatCell": {
+                    "range": {
+                        "sheetId": sheet_id,
+                        "startRowIndex": row_idx,
+                        "endRowIndex": row_idx + 1,
+                        "startColumnIndex": name_col_index,
+                        "endColumnIndex": name_col_index + 1
+                    },
+                    "cell": {"userEnteredFormat": {"backgroundColor": green_fill}},
+                    "fields": "userEnteredFormat.backgroundColor"
+                }
+            })
 
-    ws.spreadsheet.batch_update({"requests": requests})
+    return requests
 
 
-def export_all_club_data_to_gsheets(gc_client, spreadsheet_id: str, all_clubs_data: list, sdate: str = None):
-    """Exports combined member and club statistics across all tracked clubs to a formatted side-by-side dashboard in Google Sheets."""
-    # Define green members dynamically as the top 3 members of each club
-    green_members = set()
-    for club in all_clubs_data:
-        # Get first 3 members of this club (they are sorted by AVG/d descending)
-        for m in club["members"][:3]:
-            green_members.add(m["member_name"])
-
-    # 1. Compile Member Rows
-    left_rows = []
-    for club in all_clubs_data:
-        short_name = club["short_name"]
-        for member in club["members"]:
-            left_rows.append({
-                "Club Spec": short_name,
-                "Members": member["member_name"],
-                "Average Day": member["avg_day"],
-                "Perfomance": member["performance"]
-            })
-    # Sort members by Average Day descending (NaN = just-joined, no data yet -> last)
-    left_rows.sort(key=lambda x: 0 if x["Average Day"] is None or pd.isna(x["Average Day"]) else x["Average Day"], reverse=True)
-
-    # 2. Compile Club Rows
-    right_rows = []
-    for club in all_clubs_data:
-        short_name = club["short_name"]
-        grade = club["grade"]
-        rank = club["rank"]
-        members = club["members"]
-        
-        # Members who just joined (no post-join data yet) have a NaN avg_day;
-        # exclude them from club aggregates so round() never sees NaN.
-        active = [m for m in members if m["avg_day"] is not None and not pd.isna(m["avg_day"])]
-        total_avg_day = sum(m["avg_day"] for m in active)
-        total_perf = sum(m["performance"] for m in members if m["performance"] is not None)
-        avg_per_player = round(total_avg_day / len(active)) if active else 0
-        
-        right_rows.append({
-            "GRADE": grade,
-            "RANK": rank,
-            "CLUB NAME": short_name,
-            "Average Day": total_avg_day,
-            "Average/player": avg_per_player,
-            "Perfomance": total_perf
+def club_grid(layout: dict) -> tuple:
+    """Grid size (rows, cols) a club sheet is given when written from scratch."""
+    return max(len(layout["values"]) + 50, 120), max(len(layout["header"]) + 10, 26)
+
+
+def club_rewrite(layout: dict, title: str, sheet_id: int, threshold: int, cf_count: int, banded_ids: list) -> tuple:
+    """(requests, data) that rewrite an existing club sheet from scratch.
+
+    requests resize the grid, clear the old values and formatting and apply
+    the new formatting; data is the values.batchUpdate entry for the table.
+    """
+    values = layout["values"]
+    end_col = len(layout["header"])
+    rows, cols = club_grid(layout)
+    requests = [
+        {
+            "updateSheetProperties": {
+                "properties": {"sheetId": sheet_id, "gridProperties": {"rowCount": rows, "columnCount": cols}},
+                "fields": "gridProperties(rowCount,columnCount)"
+            }
+        },
+        {"updateCells": {"range": {"sheetId": sheet_id}, "fields": "userEnteredValue"}},
+    ]
+    requests.extend(club_reset_requests(sheet_id, len(values), end_col, cf_count, banded_ids))
+    requests.extend(club_format_requests(layout, sheet_id, threshold))
+    data = [{"range": absolute_range_name(title, f"A1:{rowcol_to_a1(len(values), end_col)}"), "values": values}]
+    return requests, data
+
+
+def _row_keys(values: list) -> list:
+    # Member rows are keyed by Member_ID, the rows below them by their label.
+    header = values[0] if values else []
+    if "Member_ID" not in header or "Member_Name" not in header:
+        return [None] * max(0, len(values) - 1)
+    id_col, name_col = header.index("Member_ID"), header.index("Member_Name")
+    keys = []
+    for row in values[1:]:
+        member_id = row[id_col] if id_col < len(row) else ""
+        label = row[name_col] if name_col < len(row) else ""
+        keys.append(member_id if member_id != "" else ("label", label) if label != "" else None)
+    return keys
+
+
+def plan_club_update(layout: dict, threshold: int, state: dict, title: str, sheet_id: int, grid_rows: int, grid_cols: int, cf_count: int = None, banded_ids: list = None) -> tuple | None:
+    """Incremental (requests, data, grid) for a club sheet from its last-written state.
+
+    Rows are matched by member (see _row_keys) and moved into the new order
+    first, so a day that re-sorts the ranking only moves rows; data then holds
+    values.batchUpdate entries for the changed cells and requests carry the
+    changed formatting. cf_count and banded_ids are the live sheet's, from the
+    metadata cache. Returns None when the stored state does not match the live
+    sheet, when the changed values cover the whole table, or when the update
+    would send more requests or bytes than club_rewrite.
+    """
+    if not state or state.get("sheetId") != sheet_id or (state.get("rows"), state.get("cols")) != (grid_rows, grid_cols):
+        return None
+    if cf_count is not None and cf_count != state.get("cf_count", 0):
+        return None
+    if banded_ids is not None and sorted(banded_ids) != sorted(state.get("banded_ids") or []):
+        return None
+
+    old, values = state.get("values") or [], layout["values"]
+    end_col = len(layout["header"])
+    rows, cols = grid_rows, grid_cols
+    if len(values) > grid_rows or end_col > grid_cols:
+        rows, cols = max(grid_rows, len(values) + 50), max(grid_cols, end_col + 10)
+    order = row_order(_row_keys(old), _row_keys(values)) if old and values else None
+    order = [0] + [1 + i for i in order] if order else None
+    moves = move_requests(order[1:], sheet_id, offset=1) if order and len(order) <= rows else []
+    if not moves:
+        order = None
+
+    requests = incremental_format_requests(
+        state.get("formats") or [], club_format_requests(layout, sheet_id, threshold),
+        sheet_id, state.get("cf_count", 0), state.get("banded_ids") or [], order
+    )
+    if requests is None:
+        return None
+    requests[:0] = moves
+    if (rows, cols) != (grid_rows, grid_cols):
+        requests.insert(0, {
+            "updateSheetProperties": {
+                "properties": {"sheetId": sheet_id, "gridProperties": {"rowCount": rows, "columnCount": cols}},
+                "fields": "gridProperties(rowCount,columnCount)"
+            }
         })
-    # Sort clubs by Average Day descending (NaN-safe)
-    right_rows.sort(key=lambda x: 0 if x["Average Day"] is None or pd.isna(x["Average Day"]) else x["Average Day"], reverse=True)
+
+    if order:
+        old = [old[i] if i < len(old) else [] for i in order]
+    changes = diff_values(old, values)
+    n_rows, n_cols = max(len(old), len(values)), max([len(r) for r in old] + [len(r) for r in values] + [0])
+    if any(r0 == 0 and c0 == 0 and len(block) == n_rows and len(block[0]) == n_cols for r0, c0, block in changes):
+        return None
+    data = [
+        {"range": absolute_range_name(title, f"{rowcol_to_a1(r0 + 1, c0 + 1)}:{rowcol_to_a1(r0 + len(block), c0 + len(block[0]))}"), "values": block}
+        for r0, c0, block in changes
+    ]
+
+    # Cost gate against what a full rewrite of the same sheet would send.
+    full, full_data = club_rewrite(layout, title, sheet_id, threshold, state.get("cf_count", 0), state.get("banded_ids") or [])
+    if len(requests) > len(full) or _payload_size(requests, data) > _payload_size(full, full_data):
+        return None
+    return requests, data, (rows, cols)
+
+
+def _payload_size(requests: list, data: list) -> int:
+    # Bytes of the batchUpdate and values.batchUpdate bodies as they are sent.
+    return len(json.dumps({"requests": requests}, default=str)) + len(json.dumps({"valueInputOption": "RAW", "data": data}, default=str))
+
+
+def club_sheet_state(layout: dict, sheet_id: int, threshold: int, grid: tuple, banded_ids: list) -> dict:
+    """What SheetStateStore records after a club sheet was written."""
+    formats = club_format_requests(layout, sheet_id, threshold)
+    return {
+        "sheetId": sheet_id,
+        "rows": grid[0],
+        "cols": grid[1],
+        "values": layout["values"],
+        "formats": formats,
+        "cf_count": sum(1 for r in formats if "addConditionalFormatRule" in r),
+        "banded_ids": banded_ids,
+    }
+
+
+@traced("sheets.export_club")
+def export_to_gsheets(gc_client, df: pd.DataFrame, spreadsheet_id: str, sheet_title: str, threshold: int, club_daily_history: list = None, circle_id: str = None, state_store: SheetStateStore = None, incremental: bool = True):
+    # Exports individual club data and daily history to Google Sheets.
+    # With a state store, only changed cells and formats are sent when the live
+    # sheet still matches what this exporter last wrote.
+    layout = build_club_sheet(df, club_daily_history, circle_id)
+    values = layout["values"]
+    header = layout["header"]
+
+    metadata = metadata_cache(gc_client, spreadsheet_id)
+    ss = metadata.spreadsheet
+    try:
+        ws = ss.worksheet(sheet_title)
+    except gspread.WorksheetNotFound:
+        ws = None
+
+    if ws is not None and state_store is not None and incremental:
+        sheet_id = int(ws.id)
+        prev = state_store.get(spreadsheet_id, sheet_title)
+        plan = plan_club_update(layout, threshold, prev, sheet_title, sheet_id, ws.row_count, ws.col_count,
+                                metadata.cf_count(sheet_title), metadata.banded_ids(sheet_title))
+        if plan is not None:
+            requests, data, grid = plan
+            banded_ids = prev.get("banded_ids") or []
+            # A write that fails halfway must not leave a state the next diff trusts.
+            state_store.drop(spreadsheet_id, sheet_title)
+            if requests:
+                response = ss.batch_update({"requests": requests})
+                if any("deleteBanding" in r for r in requests):
+                    banded_ids = banded_ids_by_sheet([response]).get(sheet_id, [])
+            if data:
+                ss.values_batch_update({"valueInputOption": "RAW", "data": data})
+            state_store.put(spreadsheet_id, sheet_title, club_sheet_state(layout, sheet_id, threshold, grid, banded_ids))
+            annotate(sheet=sheet_title, path="incremental")
+            SHEETS_EXPORTS.labels("incremental").inc()
+            return
+
+    annotate(sheet=sheet_title, path="new" if ws is None else "full")
+    SHEETS_EXPORTS.labels("new" if ws is None else "full").inc()
+    if state_store is not None:
+        state_store.drop(spreadsheet_id, sheet_title)
+    grid = club_grid(layout)
+    if ws is None:
+        ws = ss.add_worksheet(title=sheet_title, rows=grid[0], cols=grid[1])
+        sheet_id = int(ws.id)  # Adjustment: cast to int for API
+        requests = club_format_requests(layout, sheet_id, threshold)
+        data = [{"range": absolute_range_name(sheet_title, f"A1:{rowcol_to_a1(len(values), len(header))}"), "values": values}]
+    else:
+        sheet_id = int(ws.id)
+        requests, data = club_rewrite(layout, sheet_title, sheet_id, threshold,
+                                      metadata.cf_count(sheet_title), metadata.banded_ids(sheet_title))
+    response = ss.batch_update({"requests": requests})
+    ss.values_batch_update({"valueInputOption": "RAW", "data": data})
+    if state_store is not None:
+        banded_ids = banded_ids_by_sheet([response]).get(sheet_id, [])
+        state_store.put(spreadsheet_id, sheet_title, club_sheet_state(layout, sheet_id, threshold, grid, banded_ids))
+
+
+def summary_tables(all_clubs_data: list) -> tuple:
+    """Ranked member and club tables for the dashboard, built column-wise.
+
+    Each club's "members" is a club_summary frame; they are concatenated once
+    and ranked/aggregated with vectorized sorts and group-bys. The member
+    table carries each row's club grade and whether the member is one of a
+    club's top 3 (carry) so formatting needs no lookups.
+    """
+    clubs = pd.DataFrame({
+        "club": range(len(all_clubs_data)),
+        "short_name": [c["short_name"] for c in all_clubs_data],
+        "grade": [c["grade"] for c in all_clubs_data],
+        "rank": [c["rank"] for c in all_clubs_data],
+    })
+    frames = [pd.DataFrame(c["members"]).assign(club=i) for i, c in enumerate(all_clubs_data)]
+    members = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+    members = members.reindex(columns=["club", "member_name", "avg_day", "performance"])
+    members["avg_day"] = pd.to_numeric(members["avg_day"], errors="coerce")
+    members["performance"] = pd.to_numeric(members["performance"], errors="coerce")
+
+    # Carry members: the top 3 of each club (club rows are sorted by AVG/d descending)
+    carry_names = set(members.groupby("club", sort=False).head(3)["member_name"])
+    # A club name that appears twice takes the first club's grade
+    grade_by_name = clubs.drop_duplicates("short_name").set_index("short_name")["grade"]
+
+    # 1. Member table, ranked by Average Day (NaN = just-joined, no data yet -> ranked as 0); stable for ties
+    order = np.argsort(-members["avg_day"].fillna(0).to_numpy(), kind="stable")
+    members = members.iloc[order].reset_index(drop=True)
+    short_names = clubs["short_name"].to_numpy(dtype=object)[members["club"].to_numpy(dtype=int)]
+    left = pd.DataFrame({
+        "Club Spec": short_names,
+        "Members": members["member_name"].to_numpy(dtype=object),
+        "Average Day": members["avg_day"].to_numpy(dtype=object),
+        "Perfomance": members["performance"].to_numpy(dtype=object),
+        "grade": pd.Series(short_names, dtype=object).map(grade_by_name).fillna("").to_numpy(dtype=object),
+        "carry": members["member_name"].isin(carry_names).to_numpy(),
+    })
+
+    # 2. Club table. Members who just joined (NaN avg_day) are left out of the
+    # club's Average Day and Average/player.
+    grouped = members.groupby("club")
+    total_avg_day = grouped["avg_day"].sum().reindex(clubs["club"], fill_value=0).to_numpy(dtype=float)
+    active = grouped["avg_day"].count().reindex(clubs["club"], fill_value=0).to_numpy()
+    total_perf = grouped["performance"].sum().reindex(clubs["club"], fill_value=0).to_numpy()
+    avg_per_player = np.round(np.divide(total_avg_day, active, out=np.zeros(len(clubs)), where=active > 0)).astype(int)
+    right = pd.DataFrame({
+        "GRADE": clubs["grade"].to_numpy(dtype=object),
+        "RANK": clubs["rank"].to_numpy(dtype=object),
+        "CLUB NAME": clubs["short_name"].to_numpy(dtype=object),
+        "Average Day": total_avg_day.astype(object),
+        "Average/player": avg_per_player.astype(object),
+        "Perfomance": total_perf.astype(object),
+    })
+    order = np.argsort(-np.nan_to_num(total_avg_day), kind="stable")
+    right = right.iloc[order].reset_index(drop=True)
+    return left, right
+
+
+def build_summary_sheet(all_clubs_data: list, sdate: str = None) -> dict:
+    """Builds the All Club Data dashboard values and layout in memory (no API calls)."""
+    left, right = summary_tables(all_clubs_data)
 
     # 3. Build side-by-side grid
     from datetime import datetime
@@ -478,34 +671,19 @@ def export_all_club_data_to_gsheets(gc_client, spreadsheet_id: str, all_clubs_da
         " ",
         "GRADE", "RANK", "CLUB NAME", "Average Day", "Average/player", "Perfomance"
     ]
-    
-    values = [row1, row2]
-    max_rows = max(len(left_rows), len(right_rows))
-    
-    for i in range(max_rows):
-        row = []
-        # Left Table
-        if i < len(left_rows):
-            m = left_rows[i]
-            row.extend([i + 1, m["Club Spec"], m["Members"], m["Average Day"], m["Perfomance"]])
-        else:
-            row.extend(["", "", "", "", ""])
-            
-        # Gap Column
-        row.append("")
-        
-        # Right Table
-        if i < len(right_rows):
-            c = right_rows[i]
-            row.extend([c["GRADE"], c["RANK"], c["CLUB NAME"], c["Average Day"], c["Average/player"], c["Perfomance"]])
-        else:
-            row.extend(["", "", "", "", "", ""])
-            
-        values.append(row)
+
+    # Left table, gap column and right table side by side; the shorter table is padded with ""
+    max_rows = max(len(left), len(right))
+    body = np.full((max_rows, 12), "", dtype=object)
+    body[:len(left), 0] = np.arange(1, len(left) + 1)
+    body[:len(left), 1:5] = left[["Club Spec", "Members", "Average Day", "Perfomance"]].to_numpy(dtype=object)
+    body[:len(right), 6:12] = right[["GRADE", "RANK", "CLUB NAME", "Average Day", "Average/player", "Perfomance"]].to_numpy(dtype=object)
+    body[pd.isna(body)] = ""
+    values = [row1, row2] + body.tolist()
 
     # Legend sits in rows 24-31 (0-based 23-30) of column H. Only place it when it
-    # cannot collide with the right-hand club table, which occupies rows 3..2+len(right_rows).
-    legend_fits = len(right_rows) + 2 <= 23
+    # cannot collide with the right-hand club table, which occupies rows 3..2+len(right).
+    legend_fits = len(right) + 2 <= 23
     if legend_fits:
         # Pad with empty rows to at least 32 rows to allow writing the legend at row 24-31
         while len(values) < 32:
@@ -527,26 +705,58 @@ def export_all_club_data_to_gsheets(gc_client, spreadsheet_id: str, all_clubs_da
             values[row_idx][6] = ""
             values[row_idx][7] = val if val is not None else ""
 
-    # 4. Write to Google Sheets
-    ss = gc_client.open_by_key(spreadsheet_id)
-    sheet_title = "All Club Data"
-    is_new_sheet = False
-    try:
-        ws = ss.worksheet(sheet_title)
-        ws.clear()
-        ws.resize(rows=max(len(values) + 50, 100), cols=15)
-    except gspread.WorksheetNotFound:
-        ws = ss.add_worksheet(title=sheet_title, rows=max(len(values) + 50, 100), cols=15)
-        is_new_sheet = True
-    
-    end_row = len(values)
-    end_a1 = rowcol_to_a1(end_row, 12)
-    values = [[("" if pd.isna(cell) else cell) for cell in row] for row in values]
-    ws.update(values, f"A1:{end_a1}")
-    
-    # 5. Format the sheet
-    sheet_id = int(ws.id)
-    
+    return {
+        "values": values,
+        "left": left,
+        "right": right,
+        "legend_fits": legend_fits,
+    }
+
+
+def summary_reset_requests(sheet_id: int, n_rows: int) -> list:
+    """Requests that wipe a reused dashboard sheet's merges, formats and filter."""
+    requests = []
+    requests.extend([
+        {
+            "unmergeCells": {
+                "range": {
+                    "sheetId": sheet_id,
+                    "startRowIndex": 0,
+                    "endRowIndex": max(n_rows + 100, 200),
+                    "startColumnIndex": 0,
+                    "endColumnIndex": 20
+                }
+            }
+        },
+        {
+            "repeatCell": {
+                "range": {
+                    "sheetId": sheet_id,
+                    "startRowIndex": 0,
+                    "endRowIndex": max(n_rows + 100, 200),
+                    "startColumnIndex": 0,
+                    "endColumnIndex": 20
+                },
+                "cell": {"userEnteredFormat": {}},
+                "fields": "userEnteredFormat"
+            }
+        },
+        {
+            "clearBasicFilter": {
+                "sheetId": sheet_id
+            }
+        }
+    ])
+    return requests
+
+
+def summary_format_requests(layout: dict, sheet_id: int) -> list:
+    """Formatting requests (headers, merges, fonts, grade colours, legend) for the dashboard."""
+    left = layout["left"]
+    right = layout["right"]
+    legend_fits = layout["legend_fits"]
+    end_row = len(layout["values"])
+
     dark_green_fill = {"red": 0.118, "green": 0.271, "blue": 0.129}
     white_font      = {"red": 1, "green": 1, "blue": 1}
     number_format   = {"type": "NUMBER", "pattern": "#,##0"}
@@ -558,39 +768,6 @@ def export_all_club_data_to_gsheets(gc_client, spreadsheet_id: str, all_clubs_da
     row2_right_range = {"sheetId": sheet_id, "startRowIndex": 1, "endRowIndex": 2, "startColumnIndex": 6, "endColumnIndex": 12}
     
     requests = []
-    if not is_new_sheet:
-        requests.extend([
-            {
-                "unmergeCells": {
-                    "range": {
-                        "sheetId": sheet_id,
-                        "startRowIndex": 0,
-                        "endRowIndex": max(len(values) + 100, 200),
-                        "startColumnIndex": 0,
-                        "endColumnIndex": 20
-                    }
-                }
-            },
-            {
-                "repeatCell": {
-                    "range": {
-                        "sheetId": sheet_id,
-                        "startRowIndex": 0,
-                        "endRowIndex": max(len(values) + 100, 200),
-                        "startColumnIndex": 0,
-                        "endColumnIndex": 20
-                    },
-                    "cell": {"userEnteredFormat": {}},
-                    "fields": "userEnteredFormat"
-                }
-            },
-            {
-                "clearBasicFilter": {
-                    "sheetId": sheet_id
-                }
-            }
-        ])
-
     requests.extend([
         # Frozen Rows (2 rows frozen to keep table titles and headers visible)
         {
@@ -755,7 +932,7 @@ def export_all_club_data_to_gsheets(gc_client, spreadsheet_id: str, all_clubs_da
         # Right Table (Columns G-L, index 6 to 12) - Only down to right_table_end
         {
             "updateBorders": {
-                "range": {"sheetId": sheet_id, "startRowIndex": 0, "endRowIndex": len(right_rows) + 2, "startColumnIndex": 6, "endColumnIndex": 12},
+                "range": {"sheetId": sheet_id, "startRowIndex": 0, "endRowIndex": len(right) + 2, "startColumnIndex": 6, "endColumnIndex": 12},
                 "top": {"style": "SOLID"},
                 "bottom": {"style": "SOLID"},
                 "left": {"style": "SOLID"},
@@ -767,7 +944,7 @@ def export_all_club_data_to_gsheets(gc_client, spreadsheet_id: str, all_clubs_da
         # Remove inner horizontal borders for GRADE and RANK data rows (indices 6 and 7)
         {
             "updateBorders": {
-                "range": {"sheetId": sheet_id, "startRowIndex": 2, "endRowIndex": len(right_rows) + 2, "startColumnIndex": 6, "endColumnIndex": 8},
+                "range": {"sheetId": sheet_id, "startRowIndex": 2, "endRowIndex": len(right) + 2, "startColumnIndex": 6, "endColumnIndex": 8},
                 "innerHorizontal": {"style": "NONE"}
             }
         },
@@ -841,12 +1018,7 @@ def export_all_club_data_to_gsheets(gc_client, spreadsheet_id: str, all_clubs_da
     ])
 
     # Color Left Table B (Club Spec) based on grade
-    for i, row in enumerate(left_rows):
-        grade = ""
-        for c in all_clubs_data:
-            if c["short_name"] == row["Club Spec"]:
-                grade = c["grade"]
-                break
+    for i, grade in enumerate(left["grade"].tolist()):
         color = GRADE_COLORS.get(grade)
         if color:
             row_idx = 2 + i
@@ -859,21 +1031,19 @@ def export_all_club_data_to_gsheets(gc_client, spreadsheet_id: str, all_clubs_da
             })
 
     # Color Left Table C (Members) green if carry member
-    for i, row in enumerate(left_rows):
-        member_name = row["Members"]
-        if green_members and member_name in green_members:
-            row_idx = 2 + i
-            requests.append({
-                "repeatCell": {
-                    "range": {"sheetId": sheet_id, "startRowIndex": row_idx, "endRowIndex": row_idx + 1, "startColumnIndex": 2, "endColumnIndex": 3},
-                    "cell": {"userEnteredFormat": {"backgroundColor": {"red": 0.576, "green": 0.769, "blue": 0.490}}},
-                    "fields": "userEnteredFormat.backgroundColor"
-                }
-            })
+    for i in np.flatnonzero(left["carry"].to_numpy()).tolist():
+        row_idx = 2 + i
+        requests.append({
+            "repeatCell": {
+                "range": {"sheetId": sheet_id, "startRowIndex": row_idx, "endRowIndex": row_idx + 1, "startColumnIndex": 2, "endColumnIndex": 3},
+                "cell": {"userEnteredFormat": {"backgroundColor": {"red": 0.576, "green": 0.769, "blue": 0.490}}},
+                "fields": "userEnteredFormat.backgroundColor"
+            }
+        })
 
     # Color and bold top 10 performance cells yellow in left table
     yellow_color = {"red": 1.0, "green": 0.851, "blue": 0.400}
-    top_n = min(10, len(left_rows))
+    top_n = min(10, len(left))
     if top_n > 0:
         requests.append({
             "repeatCell": {
@@ -906,7 +1076,7 @@ def export_all_club_data_to_gsheets(gc_client, spreadsheet_id: str, all_clubs_da
         },
         {
             "repeatCell": {
-                "range": {"sheetId": sheet_id, "startRowIndex": 2, "endRowIndex": len(right_rows) + 2, "startColumnIndex": 6, "endColumnIndex": 9},
+                "range": {"sheetId": sheet_id, "startRowIndex": 2, "endRowIndex": len(right) + 2, "startColumnIndex": 6, "endColumnIndex": 9},
                 "cell": {"userEnteredFormat": {"textFormat": {"bold": True}}},
                 "fields": "userEnteredFormat.textFormat.bold"
             }
@@ -914,8 +1084,7 @@ def export_all_club_data_to_gsheets(gc_client, spreadsheet_id: str, all_clubs_da
     ])
 
     # Color Right Table I (CLUB NAME) based on grade
-    for i, row in enumerate(right_rows):
-        grade = row["GRADE"]
+    for i, grade in enumerate(right["GRADE"].tolist()):
         color = GRADE_COLORS.get(grade)
         if color:
             row_idx = 2 + i
@@ -956,9 +1125,192 @@ def export_all_club_data_to_gsheets(gc_client, spreadsheet_id: str, all_clubs_da
                 }
             })
 
+    return requests
+
+
+@traced("sheets.summary")
+def export_all_club_data_to_gsheets(gc_client, spreadsheet_id: str, all_clubs_data: list, sdate: str = None):
+    """Exports combined member and club statistics across all tracked clubs to a formatted side-by-side dashboard in Google Sheets."""
+    layout = build_summary_sheet(all_clubs_data, sdate)
+    values = layout["values"]
+
+    # 4. Write to Google Sheets
+    ss = metadata_cache(gc_client, spreadsheet_id).spreadsheet
+    sheet_title = "All Club Data"
+    is_new_sheet = False
+    try:
+        ws = ss.worksheet(sheet_title)
+        ws.clear()
+        ws.resize(rows=max(len(values) + 50, 100), cols=15)
+    except gspread.WorksheetNotFound:
+        ws = ss.add_worksheet(title=sheet_title, rows=max(len(values) + 50, 100), cols=15)
+        is_new_sheet = True
+    
+    end_row = len(values)
+    end_a1 = rowcol_to_a1(end_row, 12)
+    ws.update(values, f"A1:{end_a1}")
+
+    # 5. Format the sheet
+    sheet_id = int(ws.id)
+    requests = [] if is_new_sheet else summary_reset_requests(sheet_id, len(values))
+    requests.extend(summary_format_requests(layout, sheet_id))
     ws.spreadsheet.batch_update({"requests": requests})
 
 
+# Keep each batched call far below the Sheets API request size limit.
+MAX_BATCH_REQUESTS = 500
+MAX_BATCH_BYTES = 2_000_000
+
+
+def _chunked(items: list, max_items: int = MAX_BATCH_REQUESTS, max_bytes: int = MAX_BATCH_BYTES):
+    # Splits a request/value list into ordered chunks bounded by count and JSON size.
+    chunk, size = [], 0
+    for item in items:
+        n = len(json.dumps(item, default=str))
+        if chunk and (len(chunk) >= max_items or size + n > max_bytes):
+            yield chunk
+            chunk, size = [], 0
+        chunk.append(item)
+        size += n
+    if chunk:
+        yield chunk
+
+
+def _sheet_states(gc_client, spreadsheet_id: str) -> dict:
+    # Per-title id, index, grid size, CF rule count and bandings from the metadata cache.
+    metadata = metadata_cache(gc_client, spreadsheet_id)
+    states = {}
+    for props in metadata.sheet_properties():
+        title = props.get("title")
+        states[title] = {
+            "sheetId": props.get("sheetId", 0),
+            "index": props.get("index", 0),
+            "rows": props.get("gridProperties", {}).get("rowCount"),
+            "cols": props.get("gridProperties", {}).get("columnCount"),
+            "cf_count": metadata.cf_count(title),
+            "banded_ids": metadata.banded_ids(title),
+        }
+    return states
+
+
+@traced("sheets.batched_commit")
+def export_spreadsheet_batched(gc_client, spreadsheet_id: str, club_exports: list, summary: tuple = None, ordered_titles: list = None, state_store: SheetStateStore = None, incremental: bool = True) -> dict:
+    """Commits every club sheet, the All Club Data dashboard and the sheet order in a handful of calls.
+
+    club_exports holds dicts with title, df, threshold, club_daily_history and
+    circle_id; summary is (all_clubs_data, sdate) or None. All values and
+    formatting are built in memory first, then sent as chunked
+    spreadsheets.batchUpdate calls (add/resize/clear, resets, formats,
+    reorder) followed by chunked values.batchUpdate calls. New sheets get
+    client-chosen ids so their formatting can ride in the same batch.
+    Club sheets whose stored state still matches are diffed instead of
+    rewritten (see plan_club_update), unless the job sets "incremental":
+    False. Returns call/request counts.
+    """
+    states = _sheet_states(gc_client, spreadsheet_id)
+    used_ids = {st["sheetId"] for st in states.values()}
+    structure, formats, data = [], [], []
+    titles = sorted(states, key=lambda t: states[t]["index"])
+    written = []
+
+    def prepare_sheet(title: str, rows: int, cols: int):
+        # Returns the target sheetId and the existing sheet state (None if new).
+        st = states.get(title)
+        if st:
+            structure.append({
+                "updateSheetProperties": {
+                    "properties": {"sheetId": st["sheetId"], "gridProperties": {"rowCount": rows, "columnCount": cols}},
+                    "fields": "gridProperties(rowCount,columnCount)"
+                }
+            })
+            structure.append({"updateCells": {"range": {"sheetId": st["sheetId"]}, "fields": "userEnteredValue"}})
+            return st["sheetId"], st
+        new_id = random.randint(1, 2**31 - 1)
+        while new_id in used_ids:
+            new_id = random.randint(1, 2**31 - 1)
+        used_ids.add(new_id)
+        titles.append(title)
+        structure.append({
+            "addSheet": {"properties": {"sheetId": new_id, "title": title, "gridProperties": {"rowCount": rows, "columnCount": cols}}}
+        })
+        return new_id, None
+
+    for job in club_exports:
+        layout = build_club_sheet(job["df"], job.get("club_daily_history"), job.get("circle_id"))
+        values = layout["values"]
+        end_col = len(layout["header"])
+        st = states.get(job["title"])
+        if st and state_store is not None and incremental and job.get("incremental", True):
+            prev = state_store.get(spreadsheet_id, job["title"])
+            plan = plan_club_update(layout, job["threshold"], prev, job["title"], st["sheetId"], st["rows"], st["cols"], st["cf_count"], st["banded_ids"])
+            if plan is not None:
+                requests, club_data, grid = plan
+                formats.extend(requests)
+                data.extend(club_data)
+                rebanded = any("deleteBanding" in r for r in requests)
+                written.append((job, layout, st["sheetId"], grid, [] if rebanded else prev.get("banded_ids") or []))
+                SHEETS_EXPORTS.labels("incremental").inc()
+                continue
+        grid = club_grid(layout)
+        if st:
+            requests, club_data = club_rewrite(layout, job["title"], st["sheetId"], job["threshold"], st["cf_count"], st["banded_ids"])
+            formats.extend(requests)
+            data.extend(club_data)
+            written.append((job, layout, st["sheetId"], grid, []))
+            SHEETS_EXPORTS.labels("full").inc()
+            continue
+        sheet_id, _ = prepare_sheet(job["title"], *grid)
+        written.append((job, layout, sheet_id, grid, []))
+        SHEETS_EXPORTS.labels("new").inc()
+        formats.extend(club_format_requests(layout, sheet_id, job["threshold"]))
+        data.append({"range": absolute_range_name(job["title"], f"A1:{rowcol_to_a1(len(values), end_col)}"), "values": values})
+
+    if summary:
+        all_clubs_data, sdate = summary
+        layout = build_summary_sheet(all_clubs_data, sdate)
+        values = layout["values"]
+        sheet_id, st = prepare_sheet("All Club Data", max(len(values) + 50, 100), 15)
+        if st:
+            formats.extend(summary_reset_requests(sheet_id, len(values)))
+        formats.extend(summary_format_requests(layout, sheet_id))
+        data.append({"range": absolute_range_name("All Club Data", f"A1:{rowcol_to_a1(len(values), 12)}"), "values": values})
+
+    reorder = []
+    if ordered_titles:
+        # Same ordering rule as reorder_sheets: listed titles first, the rest after.
+        final = [t for t in ordered_titles if t in titles] + [t for t in titles if t not in ordered_titles]
+        for index, title in enumerate(final):
+            sid = states[title]["sheetId"] if title in states else next(
+                r["addSheet"]["properties"]["sheetId"] for r in structure
+                if "addSheet" in r and r["addSheet"]["properties"]["title"] == title
+            )
+            reorder.append({
+                "updateSheetProperties": {"properties": {"sheetId": sid, "index": index}, "fields": "index"}
+            })
+
+    stats = {"batch_update_calls": 0, "values_calls": 0, "requests": 0, "value_ranges": len(data)}
+    if state_store is not None:
+        # Forget the old states first: a chunk failing halfway leaves them stale.
+        for job, *_ in written:
+            state_store.drop(spreadsheet_id, job["title"])
+    responses = []
+    for chunk in _chunked(structure + formats + reorder):
+        responses.append(gc_client.http_client.batch_update(spreadsheet_id, {"requests": chunk}))
+        stats["batch_update_calls"] += 1
+        stats["requests"] += len(chunk)
+    for chunk in _chunked(data, max_items=100):
+        gc_client.http_client.values_batch_update(spreadsheet_id, body={"valueInputOption": "RAW", "data": chunk})
+        stats["values_calls"] += 1
+
+    if state_store is not None:
+        new_bands = banded_ids_by_sheet(responses)
+        for job, layout, sheet_id, grid, kept_bands in written:
+            banded_ids = new_bands.get(sheet_id, kept_bands)
+            state_store.put(spreadsheet_id, job["title"], club_sheet_state(layout, sheet_id, job["threshold"], grid, banded_ids))
+    annotate(clubs=len(club_exports), **stats)
+    return stats
+
+
 GRADE_COLORS = {
     "SS": {"red": 0.557, "green": 0.486, "blue": 0.765},
     "S+": {"red": 0.965, "green": 0.698, "blue": 0.420},
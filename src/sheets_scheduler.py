@@ -0,0 +1,188 @@
+import asyncio
+import contextvars
+import os
+import random
+import threading
+import time
+from collections import deque
+
+from gspread.exceptions import APIError
+from gspread.http_client import HTTPClient
+
+from src.metrics import (
+    SHEETS_BACKOFF_SECONDS,
+    SHEETS_CALLS,
+    SHEETS_QUOTA_WAIT_SECONDS,
+    SHEETS_REQUEST_SECONDS,
+)
+from src.telemetry import add, record_sleep, span
+from src.utils import LogColor, colorize
+
+# Status codes on which Google is actually pushing back (quota / transient backend errors).
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, str(default)))
+    except (TypeError, ValueError):
+        return default
+
+
+class SheetsQuota:
+    """Thread-safe per-minute budget for Sheets API read and write requests.
+
+    Mirrors Google's per-user quotas (60 read + 60 write requests per minute
+    by default; SHEETS_READ_QUOTA / SHEETS_WRITE_QUOTA). Each request blocks
+    only while its sliding 60s window is full, so work runs at the quota floor
+    instead of behind fixed cooldowns.
+    """
+
+    WINDOW = 60.0
+
+    def __init__(self, read_per_minute: int = 60, write_per_minute: int = 60, max_retries: int = 6, max_backoff: float = 64.0):
+        self.limits = {"read": max(1, read_per_minute), "write": max(1, write_per_minute)}
+        self.max_retries = max_retries
+        self.max_backoff = max_backoff
+        self._windows = {"read": deque(), "write": deque()}
+        self._lock = threading.Lock()
+        self.calls = {"read": 0, "write": 0}
+        self.throttle_seconds = 0.0
+        self.backoffs = 0
+        self.backoff_seconds = 0.0
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            read_per_minute=_env_int("SHEETS_READ_QUOTA", 60),
+            write_per_minute=_env_int("SHEETS_WRITE_QUOTA", 60),
+            max_retries=_env_int("SHEETS_MAX_RETRIES", 6),
+        )
+
+    def acquire(self, kind: str):
+        """Block until the `kind` window has room, then record the request."""
+        window = self._windows[kind]
+        limit = self.limits[kind]
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                while window and now - window[0] >= self.WINDOW:
+                    window.popleft()
+                if len(window) < limit:
+                    window.append(now)
+                    self.calls[kind] += 1
+                    return
+                wait = self.WINDOW - (now - window[0])
+                self.throttle_seconds += wait
+            SHEETS_QUOTA_WAIT_SECONDS.labels(kind).inc(wait)
+            record_sleep(wait, "sheets_quota")
+            time.sleep(wait)
+
+    def backoff_delay(self, attempt: int, response=None) -> float:
+        """Exponential backoff with full jitter, honouring Retry-After when Google sends it."""
+        retry_after = None
+        if response is not None:
+            try:
+                retry_after = float(response.headers.get("Retry-After"))
+            except (TypeError, ValueError):
+                retry_after = None
+        delay = random.uniform(0, min(self.max_backoff, 2.0 * (2 ** attempt)))
+        return max(delay, retry_after or 0.0)
+
+    def summary(self) -> dict:
+        return {
+            "reads": self.calls["read"],
+            "writes": self.calls["write"],
+            "throttle_seconds": round(self.throttle_seconds, 1),
+            "backoffs": self.backoffs,
+            "backoff_seconds": round(self.backoff_seconds, 1),
+        }
+
+
+class QuotaHTTPClient(HTTPClient):
+    """gspread HTTP client that admits every request through a SheetsQuota.
+
+    GETs count against the read budget, everything else against the write
+    budget. 429/5xx responses are retried with exponential backoff + jitter;
+    any other error propagates immediately. Successful batchUpdates are
+    replayed on the matching SpreadsheetMetadataCache, if one is registered.
+    """
+
+    quota: SheetsQuota = None
+
+    def __init__(self, auth, session=None):
+        super().__init__(auth, session=session)
+        self.metadata_caches = {}
+
+    def batch_update(self, id, body):
+        response = super().batch_update(id, body)
+        cache = self.metadata_caches.get(id)
+        if cache is not None:
+            cache.apply((body or {}).get("requests", []), response)
+        return response
+
+    def request(self, method, endpoint, params=None, data=None, json=None, files=None, headers=None):
+        quota = self.quota
+        if quota is None:
+            return super().request(method, endpoint, params=params, data=data, json=json, files=files, headers=headers)
+
+        kind = "read" if method.lower() == "get" else "write"
+        attempt = 0
+        with span("sheets.request", method=method.upper(), kind=kind):
+            while True:
+                quota.acquire(kind)
+                started = time.perf_counter()
+                try:
+                    response = super().request(method, endpoint, params=params, data=data, json=json, files=files, headers=headers)
+                except APIError as e:
+                    SHEETS_REQUEST_SECONDS.labels(method.upper()).observe(time.perf_counter() - started)
+                    SHEETS_CALLS.labels(method.upper(), e.code).inc()
+                    if e.code not in RETRYABLE_STATUS or attempt >= quota.max_retries:
+                        raise
+                    delay = quota.backoff_delay(attempt, e.response)
+                    quota.backoffs += 1
+                    quota.backoff_seconds += delay
+                    SHEETS_BACKOFF_SECONDS.inc(delay)
+                    add("sheets_retries")
+                    prefix = colorize("[Quota/Server]", LogColor.RETRY)
+                    print(f"  {prefix} Sheets API {e.code} on {method.upper()}. Backing off {delay:.1f}s (retry {attempt + 1}/{quota.max_retries})...", flush=True)
+                    record_sleep(delay, "sheets_backoff")
+                    time.sleep(delay)
+                    attempt += 1
+                    continue
+                SHEETS_REQUEST_SECONDS.labels(method.upper()).observe(time.perf_counter() - started)
+                SHEETS_CALLS.labels(method.upper(), response.status_code).inc()
+                add("sheets_calls")
+                add("sheets_bytes_up", len(getattr(response.request, "body", None) or b""))
+                add("sheets_bytes_down", len(response.content))
+                return response
+
+
+class SheetsScheduler:
+    """Runs blocking gspread jobs off the event loop, one job per worksheet at a time.
+
+    Independent worksheets are written in parallel (up to SHEETS_CONCURRENCY);
+    the request rate itself is governed by the client's SheetsQuota.
+    """
+
+    def __init__(self, concurrency: int = 3):
+        self.concurrency = max(1, concurrency)
+        self._slots = asyncio.Semaphore(self.concurrency)
+        self._locks: dict[str, asyncio.Lock] = {}
+
+    @classmethod
+    def from_env(cls):
+        return cls(_env_int("SHEETS_CONCURRENCY", 3))
+
+    async def run(self, key: str | None, fn, *args):
+        """Run fn(*args) in the default executor; key serializes jobs on the same worksheet."""
+        loop = asyncio.get_running_loop()
+        # The job runs in a copy of the caller's context, so its telemetry
+        # spans nest under the caller's.
+        job = contextvars.copy_context().run
+        if key is None:
+            async with self._slots:
+                return await loop.run_in_executor(None, job, fn, *args)
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        async with lock, self._slots:
+            return await loop.run_in_executor(None, job, fn, *args)
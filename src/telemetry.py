@@ -0,0 +1,354 @@
+import contextvars
+import functools
+import inspect
+import json
+import os
+import secrets
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+from src.utils import LogColor, colorize
+
+DEFAULT_TELEMETRY_DIR = os.path.join(".cache", "telemetry")
+
+# The run being recorded and the innermost open span. Both are context
+# variables, so asyncio tasks inherit them from the code that created them,
+# and so do jobs handed to SheetsScheduler (it runs them in a copied context).
+_current_run = contextvars.ContextVar("telemetry_run", default=None)
+_current_span = contextvars.ContextVar("telemetry_span", default=None)
+
+
+def _env_flag(name: str, default: str = "1") -> bool:
+    return os.getenv(name, default).strip().lower() not in ("0", "false", "no", "off")
+
+
+class Span:
+    """One timed section of a run, measured on the monotonic clock.
+
+    Counters and sleep time are inclusive: what a nested span records is
+    also added to every span around it, up to the run's root span.
+    """
+
+    def __init__(self, name: str, parent=None, attrs: dict = None):
+        self.name = name
+        self.parent = parent
+        self.span_id = secrets.token_hex(8)
+        self.attrs = dict(attrs or {})
+        self.counters = {}
+        self.sleep_seconds = 0.0
+        self.error = None
+        self.start_ns = time.time_ns()
+        self._started = time.monotonic()
+        self.duration = None
+
+    def finish(self, error: BaseException = None):
+        self.duration = time.monotonic() - self._started
+        # A clean sys.exit() (e.g. leaving the club menu) is not a failure.
+        if isinstance(error, SystemExit) and not error.code:
+            error = None
+        if error is not None and self.error is None:
+            self.error = f"{type(error).__name__}: {error}"
+
+    @property
+    def seconds(self) -> float:
+        return self.duration if self.duration is not None else time.monotonic() - self._started
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "span_id": self.span_id,
+            "parent_id": self.parent.span_id if self.parent else None,
+            "start_unix_ns": self.start_ns,
+            "seconds": round(self.seconds, 4),
+            "sleep_seconds": round(self.sleep_seconds, 4),
+            "attrs": self.attrs,
+            "counters": self.counters,
+            "error": self.error,
+        }
+
+
+class RunTelemetry:
+    """Spans, counters and deliberate sleeps of one tracker run.
+
+    Code records through the module-level span() / add() / record_sleep()
+    helpers, which do nothing while no run is active. finish() writes a JSON
+    run report to `report_dir` (per-phase totals, per-club stages, sleep time
+    by reason, every span) and, with `trace_path`, appends the spans as one
+    OTLP/JSON ExportTraceServiceRequest line that OpenTelemetry tooling can
+    import.
+    """
+
+    def __init__(self, name: str, report_dir: str = None, trace_path: str = None, keep: int = 50, attrs: dict = None):
+        self.report_dir = report_dir
+        self.trace_path = trace_path
+        self.keep = keep
+        self.trace_id = secrets.token_hex(16)
+        self.root = Span(name, attrs=attrs)
+        self.spans = [self.root]
+        self.sleeps = {}
+        self.report_path = None
+        self._lock = threading.Lock()
+        self._tokens = None
+
+    @classmethod
+    def from_env(cls, name: str, argv: list = None, **attrs):
+        """Recorder writing to TELEMETRY_DIR; None when disabled with TELEMETRY=0.
+
+        OTLP traces go to TELEMETRY_TRACE_FILE or --trace-file=<path>.
+        """
+        if not _env_flag("TELEMETRY"):
+            return None
+        trace_path = os.getenv("TELEMETRY_TRACE_FILE") or None
+        for arg in argv or []:
+            if arg.startswith("--trace-file="):
+                trace_path = arg.split("=", 1)[1] or None
+        try:
+            keep = int(os.getenv("TELEMETRY_KEEP", "50"))
+        except ValueError:
+            keep = 50
+        return cls(name, os.getenv("TELEMETRY_DIR") or DEFAULT_TELEMETRY_DIR, trace_path, keep, attrs)
+
+    def start(self):
+        self._tokens = (_current_run.set(self), _current_span.set(self.root))
+
+    def finish(self, error: BaseException = None):
+        """Close the run and write its report (and trace line); returns the report."""
+        if self._tokens is not None:
+            _current_run.reset(self._tokens[0])
+            _current_span.reset(self._tokens[1])
+            self._tokens = None
+        self.root.finish(error)
+        report = self.report()
+        self._write_report(report)
+        self._write_trace()
+        self.print_summary(report)
+        return report
+
+    @contextmanager
+    def activate(self):
+        self.start()
+        try:
+            yield self
+        except BaseException as e:
+            self.finish(e)
+            raise
+        self.finish()
+
+    def _open(self, name: str, attrs: dict) -> Span:
+        s = Span(name, _current_span.get() or self.root, attrs)
+        with self._lock:
+            self.spans.append(s)
+        return s
+
+    def _add(self, s: Span, key: str, value):
+        with self._lock:
+            while s is not None:
+                s.counters[key] = s.counters.get(key, 0) + value
+                s = s.parent
+
+    def _sleep(self, s: Span, seconds: float, reason: str):
+        with self._lock:
+            self.sleeps[reason] = self.sleeps.get(reason, 0.0) + seconds
+            while s is not None:
+                s.sleep_seconds += seconds
+                s = s.parent
+
+    def report(self) -> dict:
+        phases = {}
+        clubs = {}
+        for s in self.spans[1:]:
+            phase = phases.setdefault(s.name, {"count": 0, "seconds": 0.0, "max_seconds": 0.0, "sleep_seconds": 0.0, "errors": 0})
+            phase["count"] += 1
+            phase["seconds"] += s.seconds
+            phase["max_seconds"] = max(phase["max_seconds"], s.seconds)
+            phase["sleep_seconds"] += s.sleep_seconds
+            phase["errors"] += s.error is not None
+            club = s.attrs.get("club")
+            if club is not None:
+                stages = clubs.setdefault(str(club), {})
+                stages[s.name] = {
+                    "seconds": round(s.seconds, 3),
+                    "sleep_seconds": round(s.sleep_seconds, 3),
+                    **s.counters,
+                    **({"error": s.error} if s.error else {}),
+                }
+        for phase in phases.values():
+            phase["work_seconds"] = round(phase["seconds"] - phase["sleep_seconds"], 3)
+            for key in ("seconds", "max_seconds", "sleep_seconds"):
+                phase[key] = round(phase[key], 3)
+        wall = self.root.seconds
+        return {
+            "run": self.root.name,
+            "trace_id": self.trace_id,
+            "started_at": datetime.fromtimestamp(self.root.start_ns / 1e9, timezone.utc).isoformat(),
+            "wall_seconds": round(wall, 3),
+            # Sleeps overlap across concurrent clubs, so the total can exceed the wall time.
+            "sleep_seconds": round(sum(self.sleeps.values()), 3),
+            "sleep_by_reason": {k: round(v, 3) for k, v in sorted(self.sleeps.items())},
+            "error": self.root.error,
+            "attrs": self.root.attrs,
+            "counters": self.root.counters,
+            "phases": phases,
+            "clubs": clubs,
+            "spans": [s.to_dict() for s in self.spans],
+        }
+
+    def _write_report(self, report: dict):
+        if not self.report_dir:
+            return
+        stamp = datetime.fromtimestamp(self.root.start_ns / 1e9, timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+        path = os.path.join(self.report_dir, f"run-{stamp}-{self.trace_id[:8]}.json")
+        tmp = f"{path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(self.report_dir, exist_ok=True)
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(report, f, default=str)
+            os.replace(tmp, path)
+            self.report_path = path
+            # Oldest reports beyond TELEMETRY_KEEP are dropped (names sort by time).
+            reports = sorted(n for n in os.listdir(self.report_dir) if n.startswith("run-") and n.endswith(".json"))
+            for name in reports[:max(0, len(reports) - self.keep)] if self.keep > 0 else []:
+                os.remove(os.path.join(self.report_dir, name))
+        except OSError as e:
+            print(f"Warning: Failed to write run report {path}: {e}", flush=True)
+
+    def _write_trace(self):
+        if not self.trace_path:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.trace_path) or ".", exist_ok=True)
+            with open(self.trace_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(otlp_traces(self), default=str) + "\n")
+        except OSError as e:
+            print(f"Warning: Failed to write trace file {self.trace_path}: {e}", flush=True)
+
+    def print_summary(self, report: dict):
+        prefix = colorize("[Telemetry]", LogColor.BATCH)
+        top = [s for s in self.spans if s.parent is self.root]
+        totals = {}
+        for s in top:
+            totals[s.name] = totals.get(s.name, 0.0) + s.seconds
+        parts = ", ".join(f"{name} {seconds:.1f}s" for name, seconds in sorted(totals.items(), key=lambda kv: -kv[1]))
+        where = f" Report: {self.report_path}" if self.report_path else ""
+        print(f"  {prefix} {report['wall_seconds']:.1f}s wall, {report['sleep_seconds']:.1f}s sleeping. {parts}.{where}", flush=True)
+
+
+def _otlp_value(value) -> dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def otlp_traces(run: RunTelemetry) -> dict:
+    """The run's spans as an OTLP/JSON ExportTraceServiceRequest."""
+    spans = []
+    for s in run.spans:
+        attrs = {**s.attrs, **{f"counter.{k}": v for k, v in s.counters.items()}, "sleep_seconds": round(s.sleep_seconds, 4)}
+        span = {
+            "traceId": run.trace_id,
+            "spanId": s.span_id,
+            "name": s.name,
+            "kind": 1,
+            "startTimeUnixNano": str(s.start_ns),
+            "endTimeUnixNano": str(s.start_ns + int(s.seconds * 1e9)),
+            "attributes": [{"key": k, "value": _otlp_value(v)} for k, v in attrs.items()],
+            "status": {"code": 2, "message": s.error} if s.error else {"code": 1},
+        }
+        if s.parent is not None:
+            span["parentSpanId"] = s.parent.span_id
+        spans.append(span)
+    return {"resourceSpans": [{
+        "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": "uma-club-tracker"}}]},
+        "scopeSpans": [{"scope": {"name": "src.telemetry"}, "spans": spans}],
+    }]}
+
+
+def current_run() -> RunTelemetry | None:
+    return _current_run.get()
+
+
+@contextmanager
+def span(name: str, **attrs):
+    """Time the enclosed block as a child of the current span; a no-op outside a run."""
+    run = _current_run.get()
+    if run is None:
+        yield None
+        return
+    s = run._open(name, attrs)
+    token = _current_span.set(s)
+    try:
+        yield s
+    except BaseException as e:
+        s.finish(e)
+        raise
+    else:
+        s.finish()
+    finally:
+        _current_span.reset(token)
+
+
+def traced(name: str):
+    """Decorator form of span() for plain and async functions."""
+    def wrap(fn):
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def run_async(*args, **kwargs):
+                with span(name):
+                    return await fn(*args, **kwargs)
+            return run_async
+
+        @functools.wraps(fn)
+        def run(*args, **kwargs):
+            with span(name):
+                return fn(*args, **kwargs)
+        return run
+    return wrap
+
+
+def traced_run(name: str):
+    """Decorator: every call of the async function is one recorded run (see RunTelemetry.from_env)."""
+    def wrap(fn):
+        @functools.wraps(fn)
+        async def run(*args, **kwargs):
+            telemetry = RunTelemetry.from_env(name, sys.argv)
+            if telemetry is None:
+                return await fn(*args, **kwargs)
+            with telemetry.activate():
+                return await fn(*args, **kwargs)
+        return run
+    return wrap
+
+
+def annotate(**attrs):
+    """Set attributes on the current span."""
+    s = _current_span.get()
+    if s is not None and _current_run.get() is not None:
+        s.attrs.update(attrs)
+
+
+def fail(message: str):
+    """Mark the current span as failed when the error is handled rather than raised."""
+    s = _current_span.get()
+    if s is not None and _current_run.get() is not None:
+        s.error = message
+
+
+def add(key: str, value=1):
+    """Add to a counter on the current span (and the spans around it)."""
+    run = _current_run.get()
+    if run is not None:
+        run._add(_current_span.get(), key, value)
+
+
+def record_sleep(seconds: float, reason: str):
+    """Account a deliberate wait (quota, backoff, retry delay) before it is slept."""
+    run = _current_run.get()
+    if run is not None and seconds > 0:
+        run._sleep(_current_span.get(), seconds, reason)
@@ -0,0 +1,108 @@
+import asyncio
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import pandas as pd
+
+from src.processing import build_dataframe
+
+# inline: on the event loop (no pool startup; best for a handful of clubs).
+# thread / process: in a pool of TRANSFORM_WORKERS. auto: process pool once a
+# run has at least TRANSFORM_POOL_MIN_CLUBS clubs, inline below that.
+TRANSFORM_MODES = ("inline", "thread", "process", "auto")
+
+
+def pack_table(df: pd.DataFrame) -> dict:
+    """Compact, picklable form of a DataFrame: column names plus one NumPy array per column."""
+    return {"columns": list(df.columns), "arrays": [df[c].to_numpy() for c in df.columns]}
+
+
+def unpack_table(table: dict) -> pd.DataFrame:
+    return pd.DataFrame(dict(zip(table["columns"], table["arrays"])), columns=table["columns"])
+
+
+def transform_payload(raw, join_map: dict, sdate: str) -> dict:
+    """Decode a club_data_by_month body and build the club table.
+
+    Runs in whichever executor is configured, so it takes the raw response
+    (str or bytes) and returns only plain data: {"status": "ok", "table",
+    "club_daily_history", "build_seconds"}, {"status": "no_data"} when the month has no
+    history yet, or {"status": "error", "error"} for an unusable payload.
+    """
+    started = time.perf_counter()
+    try:
+        data = json.loads(raw)
+    except (json.JSONDecodeError, TypeError, ValueError):
+        return {"status": "error", "error": "API returned invalid/unparseable JSON"}
+    if not isinstance(data, dict):
+        return {"status": "error", "error": f"API returned unexpected payload type: {type(data).__name__}"}
+    if data.get("detail") == "Error":
+        return {"status": "error", "error": "API returned data error"}
+    if not data.get("club_friend_history"):
+        return {"status": "no_data"}
+    df = build_dataframe(data, join_map, sdate)
+    return {"status": "ok", "table": pack_table(df), "club_daily_history": data.get("club_daily_history"),
+            "build_seconds": time.perf_counter() - started}
+
+
+class TransformExecutor:
+    """Where transform_payload runs: inline on the event loop, or in a thread/process pool."""
+
+    def __init__(self, mode: str = "inline", workers: int = None):
+        if mode not in TRANSFORM_MODES or mode == "auto":
+            raise ValueError(f"Unknown transform executor '{mode}' (expected inline, thread or process)")
+        self.mode = mode
+        self.workers = max(1, workers or os.cpu_count() or 1) if mode != "inline" else 1
+        self._pool = None
+        if mode == "thread":
+            self._pool = ThreadPoolExecutor(self.workers, thread_name_prefix="transform")
+        elif mode == "process":
+            self._pool = ProcessPoolExecutor(self.workers)
+
+    @classmethod
+    def from_env(cls, argv: list = None, clubs: int = 0):
+        """Executor from --transform-executor=<mode> or TRANSFORM_EXECUTOR (default inline).
+
+        TRANSFORM_WORKERS sizes the pool (default: CPU count).
+        """
+        mode = os.getenv("TRANSFORM_EXECUTOR", "inline")
+        argv = list(argv or [])
+        for i, arg in enumerate(argv):
+            if arg.startswith("--transform-executor="):
+                mode = arg.split("=", 1)[1]
+            elif arg == "--transform-executor" and i + 1 < len(argv):
+                mode = argv[i + 1]
+        mode = mode.strip().lower() or "inline"
+        if mode not in TRANSFORM_MODES:
+            print(f"Warning: Unknown transform executor '{mode}'. Using inline.", flush=True)
+            mode = "inline"
+        if mode == "auto":
+            try:
+                min_clubs = int(os.getenv("TRANSFORM_POOL_MIN_CLUBS", "20"))
+            except ValueError:
+                min_clubs = 20
+            mode = "process" if clubs >= min_clubs else "inline"
+        try:
+            workers = int(os.getenv("TRANSFORM_WORKERS", "0")) or None
+        except ValueError:
+            workers = None
+        return cls(mode, workers)
+
+    async def run(self, raw, join_map: dict, sdate: str) -> dict:
+        if self._pool is None:
+            return transform_payload(raw, join_map, sdate)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._pool, transform_payload, raw, join_map, sdate)
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()